@@ -0,0 +1,122 @@
+import asyncio
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+
+
+class Overloaded(Exception):
+    """Raised when a lane cannot admit a request; carries a Retry-After hint in seconds"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionLane:
+    """Bounded in-flight limit plus a bounded, deadline-limited wait queue.
+
+    Each lane runs its work on its own thread pool, so a busy lane (e.g.
+    ingestion) can never take threads away from another (e.g. queries).
+    A lane that yields_to another is lower priority: it starts no new work
+    while requests are queued on the other lane.
+    """
+
+    def __init__(self, name: str, max_in_flight: int, max_queue: int, queue_timeout: float,
+                 yields_to: "AdmissionLane" = None):
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.yields_to = yields_to
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.avg_service_time = 1.0  # Seconds, exponentially weighted
+        self._semaphore = None
+        self._queue_empty = None
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix=f"{name}-lane")
+
+    def _retry_after(self) -> int:
+        """Estimate how long until the current backlog drains"""
+        backlog = self.waiting + self.in_flight
+        return max(1, math.ceil(self.avg_service_time * backlog / self.max_in_flight))
+
+    def _bind(self):
+        if self._semaphore is None:
+            # Created lazily so they bind to the running event loop
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+            self._queue_empty = asyncio.Event()
+            self._queue_empty.set()
+
+    async def queue_drained(self):
+        """Return once no request is waiting on this lane"""
+        self._bind()
+        await self._queue_empty.wait()
+
+    async def _wait_turn(self):
+        if self.yields_to is not None:
+            await self.yields_to.queue_drained()
+        await self._semaphore.acquire()
+
+    @asynccontextmanager
+    async def admit(self, deadline=None):
+        """Hold one in-flight slot for the duration of the block, or raise Overloaded.
+
+        The queue wait is bounded by queue_timeout and by what is left of the request's deadline.
+        """
+        self._bind()
+        yielding = self.yields_to is not None and self.yields_to.waiting > 0
+
+        if not yielding and not self._semaphore.locked():
+            # A slot is free: acquire() returns without suspending
+            await self._semaphore.acquire()
+        elif self.waiting >= self.max_queue:
+            self.rejected_queue_full += 1
+            raise Overloaded(f"{self.name} queue is full", self._retry_after())
+        else:
+            timeout = self.queue_timeout if deadline is None else min(self.queue_timeout, deadline.remaining())
+            self.waiting += 1
+            self._queue_empty.clear()
+            try:
+                await asyncio.wait_for(self._wait_turn(), timeout=timeout)
+            except asyncio.TimeoutError:
+                self.rejected_timeout += 1
+                raise Overloaded(f"{self.name} queue wait exceeded {timeout:.2f}s", self._retry_after())
+            finally:
+                self.waiting -= 1
+                if self.waiting == 0:
+                    self._queue_empty.set()
+
+        self.in_flight += 1
+        self.admitted += 1
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - start
+            self.avg_service_time = 0.8 * self.avg_service_time + 0.2 * elapsed
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    async def run(self, fn, *args, queue_deadline=None, **kwargs):
+        """Admit, then run a blocking function on this lane's thread pool"""
+        async with self.admit(queue_deadline):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, partial(fn, *args, **kwargs))
+
+    def get_stats(self):
+        """Get queue depth and rejection counters for this lane"""
+        return {
+            'in_flight': self.in_flight,
+            'queue_depth': self.waiting,
+            'max_in_flight': self.max_in_flight,
+            'max_queue': self.max_queue,
+            'admitted': self.admitted,
+            'rejected_queue_full': self.rejected_queue_full,
+            'rejected_timeout': self.rejected_timeout,
+            'avg_service_time': round(self.avg_service_time, 3)
+        }
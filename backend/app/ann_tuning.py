@@ -0,0 +1,189 @@
+"""Tune the store's nearest-neighbour index to a recall floor and a p99 latency budget.
+
+    cd backend && python -m app.ann_tuning --recall 0.95 --p99-ms 5
+
+Held-out chunk vectors serve as queries; their exact top-k from a flat search
+over the remaining vectors is the ground truth. Each candidate structure is
+built once and its search-time parameter swept:
+
+    Flat                 exact search (the baseline, kept for small corpora)
+    HNSW32               efSearch
+    IVF<n>,Flat          nprobe
+    IVF<n>,PQ<m>,RFlat   nprobe over m-byte PQ codes, k_factor * k re-ranked exactly
+
+The cheapest setting, i.e. the lowest mean latency, whose recall@k clears the
+floor and whose p99 fits the budget is written to ANN_PARAMS_FILE. The store
+builds that index the next time it loads a local index; bundles are always
+served flat, so they start without building anything. Every candidate keeps the exact
+vectors, so reconstruct() and later re-tuning stay exact. Re-run the tuning
+as the corpus grows; /api/stats suggests it once the index has doubled.
+"""
+import os
+import sys
+import json
+import math
+import time
+import argparse
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .lazy_imports import lazy_import
+
+faiss = lazy_import("faiss")
+
+# IVF and PQ training want about this many points per centroid
+TRAINING_POINTS_PER_CENTROID = 39
+PQ_CENTROIDS = 256
+
+
+def build_index(vectors: np.ndarray, factory: str):
+    """Build and fill an inner-product index described by a faiss factory string"""
+    index = faiss.index_factory(vectors.shape[1], factory, faiss.METRIC_INNER_PRODUCT)
+    if not index.is_trained:
+        index.train(vectors)
+    if len(vectors):
+        index.add(vectors)
+    try:
+        # Hybrid retrieval reconstructs lexical-only hits by id
+        faiss.extract_index_ivf(index).make_direct_map()
+    except RuntimeError:
+        pass
+    return index
+
+
+def apply_search_params(index, params: dict):
+    """Set search-time parameters (nprobe, efSearch, k_factor) on an index built by build_index"""
+    space = faiss.ParameterSpace()
+    for name, value in params.items():
+        if name == "k_factor":
+            # Candidates re-ranked exactly per result; ParameterSpace does not know this one
+            faiss.downcast_index(index).k_factor = value
+        else:
+            space.set_index_parameter(index, name, value)
+
+
+def candidate_grid(n: int, dim: int) -> List[Tuple[str, List[dict]]]:
+    """Structures worth trying for n vectors of dim dimensions, each with its parameter sweep"""
+    grid = [("Flat", [{}]), ("HNSW32", [{"efSearch": ef} for ef in (16, 32, 64, 128, 256)])]
+    nlist = 2 ** round(math.log2(max(1.0, 4 * math.sqrt(n))))
+    while nlist > 1 and n < nlist * TRAINING_POINTS_PER_CENTROID:
+        nlist //= 2
+    if nlist >= 16:
+        sweep = [{"nprobe": nprobe} for nprobe in (1, 2, 4, 8, 16, 32, 64, 128) if nprobe <= nlist]
+        grid.append((f"IVF{nlist},Flat", sweep))
+        if n >= PQ_CENTROIDS * TRAINING_POINTS_PER_CENTROID:
+            refine = [{"nprobe": nprobe, "k_factor": k_factor}
+                      for nprobe in (4, 8, 16, 32) if nprobe <= nlist for k_factor in (4, 16, 64)]
+            for m in (dim // 32, dim // 16, dim // 8):
+                if m >= 4 and dim % m == 0:
+                    grid.append((f"IVF{nlist},PQ{m},RFlat", refine))
+    return grid
+
+
+def measure(index, queries: np.ndarray, truth: np.ndarray, k: int) -> dict:
+    """Recall@k against the exact results, and per-query latency of single-query searches"""
+    latencies, found = [], 0
+    for row in range(len(queries)):
+        start = time.perf_counter()
+        _, ids = index.search(queries[row:row + 1], k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found += len(set(ids[0]) & set(truth[row]))
+    latencies.sort()
+    return {
+        'recall': round(found / (len(queries) * k), 4),
+        'mean_ms': round(sum(latencies) / len(latencies), 4),
+        'p50_ms': round(latencies[len(latencies) // 2], 4),
+        'p99_ms': round(latencies[min(len(latencies) - 1, math.ceil(0.99 * len(latencies)) - 1)], 4)
+    }
+
+
+def tune(vectors: np.ndarray, k: int = 20, recall_floor: float = 0.95, p99_ms: float = 10.0,
+         num_queries: int = 200, seed: int = 0, grid: Optional[List[Tuple[str, List[dict]]]] = None):
+    """Sweep the candidates over vectors; returns (cheapest qualifying result or None, every result)"""
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    num_queries = min(num_queries, len(vectors) // 5)
+    if num_queries < 1:
+        raise ValueError(f"Need at least 5 vectors to tune, the index has {len(vectors)}")
+    order = np.random.default_rng(seed).permutation(len(vectors))
+    queries, base = vectors[order[:num_queries]], vectors[order[num_queries:]]
+    k = min(k, len(base))
+
+    exact = faiss.IndexFlatIP(base.shape[1])
+    exact.add(base)
+    _, truth = exact.search(queries, k)
+
+    results = []
+    for factory, sweep in grid or candidate_grid(len(base), base.shape[1]):
+        started = time.perf_counter()
+        index = build_index(base, factory)
+        build_seconds = round(time.perf_counter() - started, 2)
+        for params in sweep:
+            apply_search_params(index, params)
+            result = dict(factory=factory, params=params, build_seconds=build_seconds,
+                          **measure(index, queries, truth, k))
+            result['meets_target'] = result['recall'] >= recall_floor and result['p99_ms'] <= p99_ms
+            results.append(result)
+    qualifying = [r for r in results if r['meets_target']]
+    best = min(qualifying, key=lambda r: (r['mean_ms'], r['p99_ms'])) if qualifying else None
+    return best, results
+
+
+def load_ann_params(path: str) -> Optional[dict]:
+    """The tuned setting written by this module, or None if there is none"""
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_ann_params(path: str, best: dict, **context):
+    params = dict(best, **context, tuned_at=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()))
+    params.pop("meets_target", None)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(params, f, indent=2)
+    os.replace(tmp_path, path)
+    return params
+
+
+def main(argv: Optional[List[str]] = None):
+    from .config import get_settings
+    from .faiss_store import read_index_info
+    from .embeddings_provider import EMBEDDING_MODEL
+
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Tune the ANN index to a recall floor and p99 latency budget")
+    parser.add_argument("--index", default="data/faiss.index", help="Index to sample")
+    parser.add_argument("--out", default=settings.ann_params_file)
+    parser.add_argument("--recall", type=float, default=settings.ann_recall_floor, help="Minimum recall@k")
+    parser.add_argument("--p99-ms", type=float, default=settings.ann_p99_ms, help="p99 search latency budget")
+    parser.add_argument("--k", type=int, default=settings.ann_k, help="Results per search (hybrid retrieval uses 20)")
+    parser.add_argument("--queries", type=int, default=200, help="Held-out vectors used as queries")
+    args = parser.parse_args(argv)
+
+    index = faiss.read_index(args.index)
+    vectors = index.reconstruct_n(0, index.ntotal)
+    info = read_index_info(os.path.splitext(args.index)[0] + ".info.json")
+    model = info["model"] if info is not None else EMBEDDING_MODEL
+    print(f"Tuning for {len(vectors)} vectors of {vectors.shape[1]} dimensions: recall@{args.k} >= {args.recall}, "
+          f"p99 <= {args.p99_ms} ms\n")
+
+    best, results = tune(vectors, k=args.k, recall_floor=args.recall, p99_ms=args.p99_ms, num_queries=args.queries)
+    print(f"{'index':<24}{'params':<18}{'recall':>8}{'mean ms':>9}{'p99 ms':>9}{'build s':>9}")
+    for r in results:
+        params = ",".join(f"{name}={value}" for name, value in r['params'].items()) or "-"
+        marker = " <- chosen" if r is best else (" ok" if r['meets_target'] else "")
+        print(f"{r['factory']:<24}{params:<18}{r['recall']:>8.3f}{r['mean_ms']:>9.3f}{r['p99_ms']:>9.3f}"
+              f"{r['build_seconds']:>9.2f}{marker}")
+
+    if best is None:
+        print("\nNo setting meets the target; relax the recall floor or the p99 budget")
+        sys.exit(1)
+    save_ann_params(args.out, best, k=args.k, recall_floor=args.recall, p99_budget_ms=args.p99_ms,
+                    vectors=len(vectors), dim=int(vectors.shape[1]), model=model)
+    print(f"\nWrote {best['factory']} {best['params']} to {args.out}; the store uses it from its next load")
+
+
+if __name__ == "__main__":
+    main()
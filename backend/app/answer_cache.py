@@ -0,0 +1,172 @@
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+
+def normalize_question(question: str) -> str:
+    """Normalize a question so trivially different spellings share a cache entry"""
+    text = question.lower().strip()
+    text = re.sub(r'\s+', ' ', text)  # Collapse whitespace
+    text = re.sub(r'[\s?!.]+$', '', text)  # Drop trailing punctuation
+    return text
+
+
+class LocalCacheBackend:
+    """In-process LRU backend with per-entry expiry.
+
+    Used on its own for a single instance and as a drop-in stand-in for the
+    shared backend in development and tests.
+    """
+
+    # Only this process reads the entries, so it may drop those of an index it has moved past
+    shared = False
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: dict, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self, prefix: str = ""):
+        with self._lock:
+            if not prefix:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisCacheBackend:
+    """Shared backend so several backend instances reuse each other's answers"""
+
+    # Other instances may still serve an older index, so old entries are left to expire with their TTL
+    shared = True
+
+    def __init__(self, url: str, prefix: str = "faqbot:answer:"):
+        import redis  # Optional dependency, only needed for the shared backend
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[dict]:
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw else None
+
+    def set(self, key: str, value: dict, ttl: float):
+        self.client.setex(self.prefix + key, max(1, int(ttl)), json.dumps(value, ensure_ascii=False))
+
+    def clear(self, prefix: str = ""):
+        """Delete this cache's keys starting with prefix; SCAN, so Redis is never blocked"""
+        keys = []
+        for key in self.client.scan_iter(match=f"{self.prefix}{prefix}*", count=1000):
+            keys.append(key)
+            if len(keys) >= 1000:
+                self.client.delete(*keys)
+                keys = []
+        if keys:
+            self.client.delete(*keys)
+
+    # No __len__: counting shared keys means scanning all of them, so stats report the size as unknown
+
+
+class AnswerCache:
+    """Exact-match cache of (normalized question, top_k) -> (answer, sources).
+
+    Keys embed the index version (IndexSnapshot.version), a digest of the
+    index contents that is the same in every process serving them. Any
+    change to the contents makes older entries unreachable, and instances
+    sharing a backend only reuse answers computed from the same index.
+
+    Given the snapshot generation, a process-local backend also drops the
+    entries of older versions once a newer generation is seen; requests
+    still on an older snapshot never clear a newer one's entries.
+    """
+
+    def __init__(self, backend=None, ttl: float = 3600.0):
+        self.backend = backend if backend is not None else LocalCacheBackend()
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._version = None
+        self._generation = None
+        self._lock = threading.Lock()
+
+    def _key(self, question: str, top_k: int, version) -> str:
+        return f"{version}:{top_k}:{normalize_question(question)}"
+
+    def _check_version(self, version, generation: Optional[int]):
+        """Drop the previous version's entries once this process has moved to a newer generation"""
+        if generation is None or self.backend.shared:
+            return
+        with self._lock:
+            if self._generation is not None and generation <= self._generation:
+                return
+            previous = self._version
+            self._version, self._generation = version, generation
+        if previous is not None and previous != version:
+            self.backend.clear(f"{previous}:")
+
+    def get(self, question: str, top_k: int, version,
+            generation: Optional[int] = None) -> Optional[Tuple[str, List[dict]]]:
+        self._check_version(version, generation)
+        value = self.backend.get(self._key(question, top_k, version))
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value["answer"], value["sources"]
+
+    def set(self, question: str, top_k: int, version, answer: str, sources: List[dict],
+            generation: Optional[int] = None):
+        self._check_version(version, generation)
+        self.backend.set(
+            self._key(question, top_k, version),
+            {"answer": answer, "sources": sources},
+            self.ttl
+        )
+
+    def get_stats(self):
+        """Get statistics about the cache"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'entries': len(self.backend) if hasattr(self.backend, '__len__') else 'unknown',
+            'backend': type(self.backend).__name__
+        }
+
+
+def create_answer_cache(settings) -> Optional[AnswerCache]:
+    """Build the answer cache described by the application settings"""
+    if settings.answer_cache_size <= 0:
+        return None
+    if settings.answer_cache_redis_url:
+        backend = RedisCacheBackend(settings.answer_cache_redis_url)
+    else:
+        backend = LocalCacheBackend(max_entries=settings.answer_cache_size)
+    return AnswerCache(backend=backend, ttl=settings.answer_cache_ttl)
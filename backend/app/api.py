@@ -1,13 +1,23 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, WebSocket
 from fastapi.responses import JSONResponse
-from typing import List, Optional
+from typing import List, Optional, Literal
 from pydantic import BaseModel
 import os
 import shutil
+import asyncio
 from .pdf_ingest import process_pdf
+from .pdf_extractors import candidates, extraction_stats
 from .rag import query_rag
 from .config import get_settings
-from .globals import faiss_store
+from .globals import (
+    faiss_store, answer_cache, semantic_cache, faq_store, query_lane, ingest_lane, session_store, generator,
+    replication, readiness, collection_registry, extraction_cache, reembedder
+)
+from .admission import Overloaded
+from .embeddings_provider import get_limiter
+from .hedging import Deadline
+from .chat_socket import ChatConnection, ChatTurn
+from .fast_json import FastJSONResponse, select_fields
 
 router = APIRouter()
 settings = get_settings()
@@ -16,15 +26,77 @@ class QueryRequest(BaseModel):
     question: str
     top_k: Optional[int] = 5
     session_id: Optional[str] = None
+    latency_budget_ms: Optional[int] = None
+    mode: Literal["generative", "extractive"] = "generative"
+    collection: Optional[str] = None
+
+class ReembedRequest(BaseModel):
+    model: str
 
 class QueryResponse(BaseModel):
     answer: str
     sources: List[dict]
     raw_generation: str
 
+# Lean responses leave out raw_generation, which always repeats the answer
+LEAN_FIELDS = ("answer", "sources")
+
+def parse_fields(fields: Optional[str], lean: bool) -> Optional[List[str]]:
+    """Fields of a lean response, or None for the full QueryResponse"""
+    if not fields:
+        return list(LEAN_FIELDS) if lean else None
+    selected = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in selected if name not in QueryResponse.model_fields]
+    if unknown or not selected:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields {unknown}; choose from {list(QueryResponse.model_fields)}"
+        )
+    return selected
+
+def not_ready_response() -> HTTPException:
+    """Reject work that needs the index while this instance is still starting up"""
+    return HTTPException(
+        status_code=503,
+        detail=f"Index is not ready yet ({readiness.state})",
+        headers={"Retry-After": "5"}
+    )
+
+async def acquire_collection(name: Optional[str]):
+    """Pin the named collection (loading it off the event loop if needed); None means the default index"""
+    if not name:
+        return None
+    if collection_registry is None or name not in collection_registry:
+        raise HTTPException(status_code=404, detail=f"Unknown collection {name!r}")
+    return await asyncio.to_thread(collection_registry.acquire, name)
+
+def overloaded_response(error: Overloaded) -> HTTPException:
+    """Shed load with a 503 that tells clients when to come back"""
+    return HTTPException(
+        status_code=503,
+        detail=str(error),
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
 @router.post("/ingest")
-async def ingest_pdf(files: List[UploadFile] = File(...)):
-    """Ingest PDF files and store their embeddings in FAISS"""
+async def ingest_pdf(files: List[UploadFile] = File(...), collection: Optional[str] = Form(None),
+                     extractor: Optional[str] = Form(None)):
+    """Ingest PDF files and store their embeddings in FAISS (the default index or a named collection)"""
+    if settings.node_role == "replica":
+        raise HTTPException(status_code=409, detail="This node is a read replica; send ingestion to the primary")
+    extractor = extractor or settings.pdf_extractor
+    try:
+        candidates(extractor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not readiness.ready:
+        raise not_ready_response()
+    target = await acquire_collection(collection)
+    store = target.store if target is not None else faiss_store
+    if store.read_only:
+        if target is not None:
+            collection_registry.release(target)
+        raise HTTPException(status_code=409, detail="This index is a prebuilt bundle; rebuild the bundle instead")
     try:
         total_chunks = 0
         for file in files:
@@ -34,11 +106,16 @@ async def ingest_pdf(files: List[UploadFile] = File(...)):
                 shutil.copyfileobj(file.file, buffer)
             
             # Process PDF and add to FAISS
-            chunks_count = process_pdf(file_path, faiss_store)
-            total_chunks += chunks_count
-            
-            # Clean up temporary file
-            os.remove(file_path)
+            try:
+                # FAQ answers are only precomputed for the default index
+                chunks_count = await ingest_lane.run(process_pdf, file_path, store,
+                                                     faq_store=faq_store if target is None else None,
+                                                     extraction_cache=extraction_cache, extractor=extractor,
+                                                     page_timeout=settings.pdf_page_timeout or None)
+                total_chunks += chunks_count
+            finally:
+                # Clean up temporary file
+                os.remove(file_path)
         
         return JSONResponse(
             content={
@@ -47,26 +124,130 @@ async def ingest_pdf(files: List[UploadFile] = File(...)):
                 "message": f"Successfully indexed {total_chunks} chunks"
             }
         )
+    except Overloaded as e:
+        raise overloaded_response(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if target is not None:
+            collection_registry.release(target)
 
-@router.post("/query", response_model=QueryResponse)
-async def query_endpoint(request: QueryRequest):
-    """Query the RAG system with a question"""
+def request_budget(request: QueryRequest) -> float:
+    return request.latency_budget_ms / 1000.0 if request.latency_budget_ms else settings.query_latency_budget
+
+async def run_query(request: QueryRequest, deadline: Deadline, on_token=None):
+    """Answer a query on the query lane; shared by the HTTP and WebSocket endpoints"""
+    collection = await acquire_collection(request.collection)
     try:
-        answer, sources, raw_generation = query_rag(
+        if collection is not None:
+            store, answers, paraphrases, faqs = collection.store, collection.answer_cache, collection.semantic_cache, None
+        else:
+            store, answers, paraphrases, faqs = faiss_store, answer_cache, semantic_cache, faq_store
+        return await query_lane.run(
+            query_rag,
             request.question, 
-            faiss_store, 
-            top_k=request.top_k
+            store, 
+            top_k=request.top_k,
+            answer_cache=answers,
+            semantic_cache=paraphrases,
+            faq_store=faqs,
+            faq_threshold=settings.faq_match_threshold,
+            session_store=session_store,
+            session_id=request.session_id,
+            deadline=deadline,
+            generator=generator,
+            mode=request.mode,
+            extractive_embeddings=settings.extractive_use_embeddings,
+            on_token=on_token,
+            queue_deadline=deadline
         )
+    finally:
+        if collection is not None:
+            collection_registry.release(collection)
+
+@router.post("/query", response_model=QueryResponse)
+async def query_endpoint(request: QueryRequest, lean: bool = False, fields: Optional[str] = None):
+    """Query the RAG system with a question.
+
+    ?lean=true returns only answer and sources, ?fields=answer picks fields;
+    either one skips response validation and uses the fast JSON encoder.
+    """
+    selected = parse_fields(fields, lean)
+    if not readiness.ready:
+        raise not_ready_response()
+    # The budget starts at arrival, so time spent queued counts against it
+    deadline = Deadline(request_budget(request))
+    try:
+        answer, sources, raw_generation = await run_query(request, deadline)
+        if selected is not None:
+            return FastJSONResponse(select_fields(
+                {"answer": answer, "sources": sources, "raw_generation": raw_generation}, selected
+            ))
         return QueryResponse(
             answer=answer,
             sources=sources,
             raw_generation=raw_generation
         )
+    except HTTPException:
+        raise
+    except Overloaded as e:
+        raise overloaded_response(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.websocket("/chat/ws")
+async def chat_socket(websocket: WebSocket):
+    """Multi-turn chat over one connection, streaming tokens and sources (see chat_socket.py)"""
+    async def answer(message: dict, turn: ChatTurn):
+        request = QueryRequest(**message)
+        deadline = turn.start_deadline(request_budget(request))
+        if not readiness.ready:
+            raise not_ready_response()
+        answer, sources, _ = await run_query(request, deadline, on_token=turn.on_token)
+        return answer, sources
+
+    await ChatConnection(websocket, answer, send_queue=settings.chat_ws_send_queue).serve()
+
+@router.post("/reembed")
+async def reembed_endpoint(request: ReembedRequest):
+    """Re-embed every chunk with another model in the background, then switch queries to it"""
+    if reembedder is None:
+        raise HTTPException(status_code=409, detail="Re-embedding needs a standalone node with a local, writable index")
+    if not readiness.ready:
+        raise not_ready_response()
+    try:
+        return reembedder.start(request.model)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.get("/stats")
+async def stats_endpoint():
+    """Report index and cache statistics"""
+    return {
+        "readiness": readiness.get_stats(),
+        "index": faiss_store.get_stats(),
+        "answer_cache": answer_cache.get_stats() if answer_cache else None,
+        "semantic_cache": semantic_cache.get_stats() if semantic_cache else None,
+        "faq": faq_store.get_stats() if faq_store is not None else None,
+        "sessions": session_store.get_stats() if session_store else None,
+        "generation": generator.get_stats(),
+        "admission": {
+            "query": query_lane.get_stats(),
+            "ingest": ingest_lane.get_stats()
+        },
+        "upstream": {
+            "embeddings": get_limiter("embeddings").get_stats(),
+            "chat": get_limiter("chat").get_stats()
+        },
+        "replication": replication.get_stats() if replication is not None else None,
+        "collections": collection_registry.get_stats() if collection_registry is not None else None,
+        "extraction_cache": extraction_cache.get_stats() if extraction_cache is not None else None,
+        "pdf_extraction": extraction_stats.get_stats(),
+        "reembed": reembedder.get_stats() if reembedder is not None else None
+    }
+
 @router.post("/rebuild-index")
 async def rebuild_index():
     """Rebuild the FAISS index from stored PDFs"""
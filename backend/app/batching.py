@@ -0,0 +1,71 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List
+
+
+class MicroBatcher:
+    """Coalesces items submitted concurrently from many threads into batched calls.
+
+    A collector thread waits for the first item, then keeps gathering until
+    `max_batch` items are queued or `max_wait` seconds have passed, and hands
+    the batch to `batch_fn` on a small worker pool. Each caller blocks only
+    on its own result, so the added latency is bounded by `max_wait`.
+    """
+
+    def __init__(self, batch_fn: Callable[[List], List], max_batch: int = 32, max_wait: float = 0.005,
+                 max_concurrent_batches: int = 4, name: str = "batcher"):
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.name = name
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+        self._queue = queue.Queue()
+        self._workers = ThreadPoolExecutor(max_workers=max_concurrent_batches, thread_name_prefix=name)
+        threading.Thread(target=self._collect, name=f"{name}-collector", daemon=True).start()
+
+    def submit(self, item):
+        """Add an item to the next batch and wait for its result"""
+        future = Future()
+        self._queue.put((item, future))
+        return future.result()
+
+    def _collect(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._workers.submit(self._run, batch)
+
+    def _run(self, batch):
+        self.batches += 1
+        self.items += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        try:
+            results = self.batch_fn([item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def get_stats(self):
+        """Get batching statistics"""
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'avg_batch_size': round(self.items / self.batches, 2) if self.batches else 0.0,
+            'largest_batch': self.largest_batch,
+            'window_ms': self.max_wait * 1000
+        }
@@ -0,0 +1,161 @@
+"""Chat over one WebSocket: many turns per connection, answers streamed as frames.
+
+Client -> server (JSON text frames):
+    {"type": "question", "id": 1, "question": "...", "session_id": "...", "top_k": 5, "mode": "generative"}
+    {"type": "cancel"}
+
+Server -> client:
+    {"type": "token", "id": 1, "text": "..."}         generated text as it streams
+    {"type": "sources", "id": 1, "sources": [...]}
+    {"type": "done", "id": 1, "answer": "..."}        the complete answer; replaces any streamed tokens
+    {"type": "cancelled", "id": 1}
+    {"type": "error", "id": 1, "status": 503, "detail": "...", "retry_after": 5}
+
+A new question cancels the one in flight. Outgoing frames go through a small
+bounded queue, so when the client reads slowly the generation thread blocks
+instead of buffering the whole answer in memory.
+"""
+import json
+import asyncio
+import concurrent.futures
+from typing import Awaitable, Callable, Optional, Tuple
+
+from fastapi import HTTPException, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+
+from .admission import Overloaded
+from .hedging import Deadline, RequestCancelled
+
+
+class ChatTurn:
+    """One question on a chat connection; cancelling the turn cancels its deadline"""
+
+    def __init__(self, connection: "ChatConnection", turn_id):
+        self.id = turn_id
+        self.connection = connection
+        self.cancelled = False
+        self.deadline = None
+
+    def start_deadline(self, budget_seconds: float) -> Deadline:
+        self.deadline = Deadline(budget_seconds)
+        if self.cancelled:
+            self.deadline.cancel()
+        return self.deadline
+
+    def cancel(self):
+        self.cancelled = True
+        if self.deadline is not None:
+            self.deadline.cancel()
+
+    def on_token(self, text: str):
+        """Called from the generation thread; waits while the client is behind"""
+        self.connection.send_threadsafe({"type": "token", "id": self.id, "text": text}, self)
+
+
+class ChatConnection:
+    """Serve one WebSocket; answer(message, turn) produces (answer, sources) for each question"""
+
+    def __init__(self, websocket: WebSocket, answer: Callable[[dict, ChatTurn], Awaitable[Tuple[str, list]]],
+                 send_queue: int = 32):
+        self.websocket = websocket
+        self.answer = answer
+        self.outbox = asyncio.Queue(maxsize=send_queue)
+        self.current: Optional[ChatTurn] = None
+        self.closed = False
+        self.turns = 0
+        self._loop = None
+        self._tasks = set()
+
+    async def serve(self):
+        await self.websocket.accept()
+        self._loop = asyncio.get_running_loop()
+        sender = asyncio.create_task(self._send_loop())
+        try:
+            while True:
+                try:
+                    message = json.loads(await self.websocket.receive_text())
+                except ValueError:
+                    await self.send({"type": "error", "id": None, "status": 400, "detail": "Frames must be JSON"})
+                    continue
+                if not isinstance(message, dict):
+                    await self.send({"type": "error", "id": None, "status": 400, "detail": "Frames must be objects"})
+                elif message.get("type") == "cancel":
+                    await self._cancel_current()
+                else:
+                    await self._start(message)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            self.closed = True
+            if self.current is not None:
+                self.current.cancel()
+            sender.cancel()
+
+    async def send(self, frame: dict, turn: Optional[ChatTurn] = None):
+        await self.outbox.put((turn, frame))
+
+    def send_threadsafe(self, frame: dict, turn: ChatTurn):
+        """Queue a frame from a worker thread, blocking while the outbox is full"""
+        future = asyncio.run_coroutine_threadsafe(self.send(frame, turn), self._loop)
+        while True:
+            try:
+                future.result(timeout=0.1)
+                return
+            except concurrent.futures.TimeoutError:
+                if turn.cancelled or self.closed:
+                    future.cancel()
+                    return
+
+    async def _send_loop(self):
+        try:
+            while True:
+                turn, frame = await self.outbox.get()
+                # Tokens of a cancelled turn are dropped; the client has moved on
+                if turn is not None and turn.cancelled:
+                    continue
+                await self.websocket.send_text(json.dumps(frame))
+        except (WebSocketDisconnect, RuntimeError):
+            self.closed = True
+
+    async def _cancel_current(self):
+        turn, self.current = self.current, None
+        if turn is not None and not turn.cancelled:
+            turn.cancel()
+            await self.send({"type": "cancelled", "id": turn.id})
+
+    async def _start(self, message: dict):
+        await self._cancel_current()
+        self.turns += 1
+        turn = ChatTurn(self, message.get("id", self.turns))
+        self.current = turn
+        task = asyncio.create_task(self._run(turn, message))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, turn: ChatTurn, message: dict):
+        error = None
+        try:
+            answer, sources = await self.answer(message, turn)
+        except RequestCancelled:
+            return
+        except ValidationError as e:
+            error = {"status": 422, "detail": e.errors(include_url=False, include_context=False)}
+        except Overloaded as e:
+            error = {"status": 503, "detail": str(e), "retry_after": e.retry_after}
+        except HTTPException as e:
+            error = {"status": e.status_code, "detail": e.detail}
+            if e.headers and "Retry-After" in e.headers:
+                error["retry_after"] = int(e.headers["Retry-After"])
+        except Exception as e:
+            error = {"status": 500, "detail": str(e)}
+
+        if turn.cancelled or self.closed:
+            return
+        # Finished before any await, so a question arriving now does not "cancel" this turn
+        if self.current is turn:
+            self.current = None
+        if error is not None:
+            await self.send({"type": "error", "id": turn.id, **error})
+        else:
+            await self.send({"type": "sources", "id": turn.id, "sources": sources})
+            await self.send({"type": "done", "id": turn.id, "answer": answer})
@@ -5,6 +5,104 @@ class Settings(BaseSettings):
     openai_api_key: str = ""
     app_name: str = "RAG OpenAI Chatbot"
     debug: bool = False
+
+    # Exact-match answer cache
+    answer_cache_size: int = 1000
+    answer_cache_ttl: float = 3600.0
+    answer_cache_redis_url: str = ""
+
+    # Semantic answer cache over past question embeddings
+    semantic_cache_size: int = 500
+    semantic_cache_threshold: float = 0.92
+
+    # Precomputed FAQ fast path; opt-in, since it makes one LLM call per new section at ingest time
+    faq_enabled: bool = False
+    faq_match_threshold: float = 0.9
+
+    # Admission control: queries and ingestion run in separate lanes; ingestion yields to queued queries
+    query_max_in_flight: int = 8
+    query_max_queue: int = 32
+    query_queue_timeout: float = 10.0
+    ingest_max_in_flight: int = 1
+    ingest_max_queue: int = 4
+    ingest_queue_timeout: float = 60.0
+
+    # Client-side limits for the upstream model API
+    embedding_rpm: int = 3000
+    embedding_tpm: int = 1000000
+    chat_rpm: int = 500
+    chat_tpm: int = 200000
+    upstream_max_concurrency: int = 16
+    upstream_max_retries: int = 6
+
+    # Server-side session memory (set SESSION_MAX_SESSIONS=0 to disable)
+    session_max_sessions: int = 1000
+    session_idle_ttl: float = 1800.0
+    session_max_turns: int = 6
+    session_history_tokens: int = 600
+
+    # Micro-batching of concurrent query embeddings and searches (0 disables)
+    query_batch_max: int = 32
+    query_batch_window_ms: float = 5.0
+
+    # Per-request latency budget and hedged generation
+    query_latency_budget: float = 20.0
+    hedge_percentile: float = 90.0
+    hedge_min_delay: float = 0.3
+    hedge_max_attempts: int = 2
+
+    # mode=extractive: score sentences by embedding similarity instead of lexically
+    extractive_use_embeddings: bool = False
+
+    # Hybrid BM25 + vector retrieval and its lexical-only fast path
+    hybrid_retrieval: bool = True
+    lexical_min_score: float = 6.0
+    lexical_ratio: float = 2.0
+
+    # Split vectors across shards searched in parallel (0 keeps one in-process index)
+    index_shards: int = 0
+    shard_processes: bool = True
+    shard_timeout: float = 0.5
+
+    # Replication: one primary ingests and ships snapshots, replicas only serve queries
+    node_role: str = "standalone"  # standalone, primary or replica
+    replication_dir: str = "data/replication"
+    replication_full_every: int = 20
+    replica_poll_interval: float = 2.0
+
+    # Serve a prebuilt bundle (python -m app.index_bundle build ...) read-only instead of data/faiss.index
+    index_bundle: str = ""
+    verify_index_bundle: bool = True
+
+    # /api/chat/ws: frames buffered per connection before generation waits for a slow client
+    chat_ws_send_queue: int = 32
+
+    # Gzip responses larger than this many bytes for clients that accept it (0 disables)
+    gzip_min_size: int = 1024
+    gzip_level: int = 5
+
+    # Named collections (see kb_collections.py), loaded on first use and evicted LRU beyond the budget
+    collections_file: str = "data/collections.json"
+    collections_dir: str = "data/collections"
+    collections_memory_mb: float = 1024.0
+
+    # Extracted PDF text keyed by file hash, so re-ingesting unchanged PDFs skips parsing ("" disables)
+    extraction_cache_dir: str = "data/extraction_cache"
+
+    # PDF text extraction backend: auto (fastest installed), pymupdf, pdfminer or pypdf2
+    pdf_extractor: str = "auto"
+    pdf_page_timeout: float = 10.0  # Seconds before a page is skipped; 0 extracts inline without a limit
+
+    # Re-embedding migrations to another embedding model (POST /api/reembed), resumed after a restart
+    reembed_dir: str = "data/reembed"
+    reembed_batch_size: int = 100
+    reembed_chunks_per_minute: float = 3000.0
+
+    # ANN index chosen by python -m app.ann_tuning for these targets; exact search until it has run ("" disables)
+    ann_params_file: str = "data/ann_params.json"
+    ann_recall_floor: float = 0.95  # Minimum recall@k against exact search
+    ann_p99_ms: float = 10.0  # p99 latency budget of one search, in milliseconds
+    ann_k: int = 20
     
     model_config = {"env_file": ".env"}
 
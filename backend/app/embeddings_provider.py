@@ -1,38 +1,100 @@
 import os
-import openai
+import base64
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
+from .config import get_settings
+from .rate_limit import UpstreamLimiter, estimate_tokens
+from .lazy_imports import lazy_import
 
-def get_embeddings(texts: List[str]) -> List[List[float]]:
-    """Get embeddings for a list of texts using OpenAI's text-embedding-3-small model"""
+openai = lazy_import("openai")
+
+# Inputs per embeddings request; the API accepts up to 2048
+EMBEDDING_BATCH_SIZE = 100
+
+# Model of new indexes; every index records the model it was embedded with (see reembed.py to switch)
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_limiter(endpoint: str) -> UpstreamLimiter:
+    """Shared limiter for the "embeddings" or "chat" endpoint, built from settings on first use"""
+    with _limiters_lock:
+        if endpoint not in _limiters:
+            settings = get_settings()
+            if endpoint == "embeddings":
+                rpm, tpm = settings.embedding_rpm, settings.embedding_tpm
+            else:
+                rpm, tpm = settings.chat_rpm, settings.chat_tpm
+            _limiters[endpoint] = UpstreamLimiter(
+                endpoint,
+                rpm=rpm,
+                tpm=tpm,
+                max_concurrency=settings.upstream_max_concurrency,
+                max_retries=settings.upstream_max_retries
+            )
+        return _limiters[endpoint]
+
+def get_client() -> "openai.OpenAI":
+    """OpenAI client; retries are handled by our own limiter, not the SDK"""
     api_key = os.environ.get("OPENAI_API_KEY")
     if not api_key:
         raise ValueError("OPENAI_API_KEY environment variable not set")
-    
-    client = openai.OpenAI(api_key=api_key)
-    
-    # Use the cost-effective text-embedding-3-small model
-    embeddings = []
-    for text in texts:
-        response = client.embeddings.create(
-            model="text-embedding-3-small",
-            input=text,
-            encoding_format="float"
+
+    # OPENAI_BASE_URL (read by the SDK) can point this at a local mock server
+    return openai.OpenAI(api_key=api_key, max_retries=0)
+
+def _decode_embeddings(response, out: np.ndarray, start: int):
+    """Decode base64 little-endian float32 embeddings straight into rows of out"""
+    for item in response.data:
+        out[start + item.index] = np.frombuffer(base64.b64decode(item.embedding), dtype="<f4")
+
+def get_embeddings(texts: List[str], model: str = None) -> np.ndarray:
+    """Get embeddings for a list of texts using `model` (default: OpenAI's text-embedding-3-small).
+
+    Returns a C-contiguous (len(texts), dim) float32 matrix that can go straight
+    into faiss.normalize_L2 and index.add.
+    """
+    client = get_client()
+    limiter = get_limiter("embeddings")
+    model = model or EMBEDDING_MODEL
+
+    def request_batch(batch: List[str]):
+        # base64 avoids building Python floats
+        return limiter.call(
+            lambda: client.embeddings.create(
+                model=model,
+                input=batch,
+                encoding_format="base64"
+            ),
+            tokens=sum(estimate_tokens(text) for text in batch)
         )
-        embeddings.append(response.data[0].embedding)
-    
-    return embeddings
 
-def generate_text(prompt: str, max_tokens: int = 1000, temperature: float = 0.7, system_prompt: str = None) -> str:
-    """Generate text using OpenAI's GPT-4o-mini model (most cost-effective)"""
-    api_key = os.environ.get("OPENAI_API_KEY")
-    if not api_key:
-        raise ValueError("OPENAI_API_KEY environment variable not set")
-    
-    client = openai.OpenAI(api_key=api_key)
-    
+    batches = [texts[i:i + EMBEDDING_BATCH_SIZE] for i in range(0, len(texts), EMBEDDING_BATCH_SIZE)]
+    if not batches:
+        return np.empty((0, 0), dtype=np.float32)
+
+    # The first response tells us the dimension, so the output matrix is allocated once
+    first = request_batch(batches[0])
+    dim = len(base64.b64decode(first.data[0].embedding)) // 4
+    out = np.empty((len(texts), dim), dtype=np.float32)
+    _decode_embeddings(first, out, 0)
+
+    if len(batches) > 1:
+        # Bulk ingest: run batches in parallel, the limiter's AIMD window sets the real concurrency
+        def embed_batch(number: int):
+            _decode_embeddings(request_batch(batches[number]), out, number * EMBEDDING_BATCH_SIZE)
+
+        with ThreadPoolExecutor(max_workers=limiter.concurrency.maximum) as pool:
+            list(pool.map(embed_batch, range(1, len(batches))))
+    return out
+
+def _build_messages(prompt: str, system_prompt: str = None) -> List[dict]:
     # Prepare messages
     messages = []
-    
+
     # If system_prompt is provided, use it; otherwise treat the prompt as both system and user
     if system_prompt:
         messages.append({"role": "system", "content": system_prompt})
@@ -40,13 +102,50 @@ def generate_text(prompt: str, max_tokens: int = 1000, temperature: float = 0.7,
     else:
         # For backward compatibility, treat the entire prompt as user message
         messages.append({"role": "user", "content": prompt})
-    
+    return messages
+
+def generate_text(prompt: str, max_tokens: int = 1000, temperature: float = 0.7, system_prompt: str = None) -> str:
+    """Generate text using OpenAI's GPT-4o-mini model (most cost-effective)"""
+    client = get_client()
+    messages = _build_messages(prompt, system_prompt)
+
     # Use GPT-4o-mini which is the most cost-effective model
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=messages,
-        max_tokens=max_tokens,
-        temperature=temperature
+    response = get_limiter("chat").call(
+        lambda: client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature
+        ),
+        tokens=estimate_tokens(prompt + (system_prompt or "")) + max_tokens
     )
-    
-    return response.choices[0].message.content
\ No newline at end of file
+
+    return response.choices[0].message.content
+
+def open_chat_stream(prompt: str, max_tokens: int = 1000, temperature: float = 0.7, system_prompt: str = None,
+                     timeout: float = None):
+    """Start a streaming GPT-4o-mini completion; closing the returned stream cancels it.
+
+    The stream holds a chat concurrency slot until it is read to the end or closed.
+    """
+    client = get_client()
+    if timeout is not None:
+        client = client.with_options(timeout=timeout)
+    messages = _build_messages(prompt, system_prompt)
+
+    return get_limiter("chat").open_stream(
+        lambda: client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True
+        ),
+        tokens=estimate_tokens(prompt + (system_prompt or "")) + max_tokens
+    )
+
+def iter_stream_text(stream):
+    """Yield the text deltas of a chat completion stream"""
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
@@ -0,0 +1,95 @@
+"""Cache of extracted PDF text, keyed by file content hash and extractor version.
+
+Parsing is the slowest local ingestion step and its output only depends on
+the file bytes and the extractor, so re-chunking or re-indexing the same
+PDFs reads normalized per-page text from here instead of parsing again.
+Entries are zlib-compressed JSON, one file per (content hash, extractor):
+
+    <directory>/<sha256>-<extractor tag>.pages.z
+"""
+import os
+import json
+import zlib
+import hashlib
+import threading
+from typing import List, Optional, Sequence, Tuple, Union
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """Per-page text of previously parsed PDFs on local disk"""
+
+    def __init__(self, directory: str = "data/extraction_cache", compression_level: int = 6):
+        self.directory = directory
+        self.compression_level = compression_level
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _path(self, sha256: str, extractor: str) -> str:
+        tag = hashlib.sha256(extractor.encode()).hexdigest()[:12]
+        return os.path.join(self.directory, f"{sha256}-{tag}.pages.z")
+
+    def get(self, sha256: str, extractor: str) -> Optional[List[str]]:
+        path = self._path(sha256, extractor)
+        try:
+            with open(path, "rb") as f:
+                entry = json.loads(zlib.decompress(f.read()))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, zlib.error) as e:
+            print(f"Ignoring unreadable extraction cache entry {path}: {e}")
+            return None
+        # The tag is a truncated hash, so the full extractor id is checked too
+        return entry["pages"] if entry.get("extractor") == extractor else None
+
+    def put(self, sha256: str, extractor: str, pages: List[str]):
+        path = self._path(sha256, extractor)
+        payload = json.dumps({"extractor": extractor, "pages": pages}, ensure_ascii=False).encode("utf-8")
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(zlib.compress(payload, self.compression_level))
+        os.replace(tmp_path, path)
+
+    def lookup(self, pdf_path: str, extractors: Union[str, Sequence[str]]) -> Tuple[str, Optional[List[str]]]:
+        """Hash pdf_path and return the hash with the pages cached for the first of extractors (None on a miss)"""
+        sha256 = file_sha256(pdf_path)
+        pages = None
+        for extractor in [extractors] if isinstance(extractors, str) else extractors:
+            pages = self.get(sha256, extractor)
+            if pages is not None:
+                break
+        with self._lock:
+            if pages is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return sha256, pages
+
+    def get_stats(self):
+        """Get hit counts and the on-disk size of the cache"""
+        names = os.listdir(self.directory) if os.path.isdir(self.directory) else []
+        entries = [name for name in names if name.endswith(".pages.z")]
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'entries': len(entries),
+            'size_mb': round(sum(os.path.getsize(os.path.join(self.directory, name)) for name in entries) / 1e6, 2)
+        }
+
+
+def create_extraction_cache(settings) -> Optional[ExtractionCache]:
+    """Build the extraction cache described by the application settings"""
+    if not settings.extraction_cache_dir:
+        return None
+    return ExtractionCache(settings.extraction_cache_dir)
@@ -0,0 +1,95 @@
+import re
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .embeddings_provider import get_embeddings
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from", "how", "i", "in",
+    "is", "it", "me", "my", "of", "on", "or", "our", "the", "to", "what", "when", "where", "which", "who",
+    "why", "with", "you", "your", "we", "about", "there", "this", "that", "tell"
+}
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split a chunk into sentences, dropping fragments too short to answer anything"""
+    sentences = re.split(r'(?<=[.!?])\s+|\s*[•▪●]\s*', text)
+    return [s.strip() for s in sentences if len(s.strip()) >= 20]
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in re.findall(r'[a-z0-9]+', text.lower()) if t not in STOPWORDS]
+
+
+def lexical_scores(question: str, sentences: List[str]) -> np.ndarray:
+    """IDF-weighted overlap between the question terms and every sentence, as one matrix product"""
+    terms = sorted(set(tokenize(question)))
+    if not terms:
+        return np.zeros(len(sentences), dtype="float32")
+    column = {term: i for i, term in enumerate(terms)}
+
+    counts = np.zeros((len(sentences), len(terms)), dtype="float32")
+    for row, sentence in enumerate(sentences):
+        for token in tokenize(sentence):
+            col = column.get(token)
+            if col is not None:
+                counts[row, col] += 1
+
+    present = counts > 0
+    idf = np.log((len(sentences) + 1) / (present.sum(axis=0) + 1)) + 1.0
+    # Saturate repeated terms and normalize by sentence length
+    lengths = np.array([len(s.split()) for s in sentences], dtype="float32")
+    return (np.minimum(counts, 2) * idf).sum(axis=1) / np.sqrt(lengths + 5)
+
+
+def semantic_scores(embedding: np.ndarray, sentences: List[str]) -> np.ndarray:
+    """Cosine similarity of every sentence to the question, embedded in one batch call"""
+    matrix = np.ascontiguousarray(get_embeddings(sentences), dtype="float32")
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-12
+    return matrix @ embedding[0]
+
+
+def extractive_answer(question: str, results: List[dict], embedding: Optional[np.ndarray] = None,
+                      max_sentences: int = 2) -> Tuple[str, List[dict]]:
+    """Return the best sentences from the retrieved chunks and the chunks they came from.
+
+    Sentences are scored lexically, or by embedding similarity when the
+    question embedding is supplied, and weighted by their chunk's retrieval
+    score. Returns ("", []) when nothing in the chunks overlaps the question.
+    """
+    sentences, owners = [], []
+    seen = set()
+    for rank, result in enumerate(results):
+        for sentence in split_sentences(result['meta']['text']):
+            key = sentence.lower()
+            if key not in seen:
+                seen.add(key)
+                sentences.append(sentence)
+                owners.append(rank)
+    if not sentences:
+        return "", []
+
+    if embedding is not None:
+        scores = semantic_scores(embedding, sentences)
+    else:
+        scores = lexical_scores(question, sentences)
+        if not scores.any():
+            return "", []
+
+    chunk_scores = np.array([results[rank]['score'] for rank in owners], dtype="float32")
+    scores = scores * (1.0 + np.clip(chunk_scores, 0.0, 1.0))
+
+    best = np.argsort(-scores)[:max_sentences]
+    best = sorted(best, key=lambda i: (owners[i], i))  # Keep reading order
+    answer = " ".join(sentences[i] for i in best)
+
+    sources = []
+    for rank in dict.fromkeys(owners[i] for i in best):
+        result = results[rank]
+        sources.append({
+            "source": result['meta']['source'],
+            "score": round(result['score'], 3),
+            "chunk_id": result['meta'].get('chunk_id', 0)
+        })
+    return answer, sources
@@ -1,36 +1,291 @@
-import faiss
 import numpy as np
 import os
 import json
+import hashlib
+import threading
 from typing import List
-from .embeddings_provider import get_embeddings
+from .embeddings_provider import get_embeddings, EMBEDDING_MODEL
+from .batching import MicroBatcher
+from .lexical_index import BM25Index, reciprocal_rank_fusion
+from .sharding import ShardRouter
+from .index_bundle import IndexBundle, BundleError
+from .ann_tuning import build_index, apply_search_params, load_ann_params
+from .lazy_imports import lazy_import
+
+faiss = lazy_import("faiss")
+
+# Maps a raw BM25 score into (0, 1) so lexical-only hits look like similarity scores downstream
+LEXICAL_SCORE_SCALE = 5.0
+
+EMPTY_DIGEST = hashlib.sha256(b"").hexdigest()
+
+def chain_digest(digest: str, texts: List[str]) -> str:
+    """Extend a hash chain over texts, so a digest of a prefix can be extended without rehashing it"""
+    for text in texts:
+        digest = hashlib.sha256((digest + text).encode("utf-8")).hexdigest()
+    return digest
+
+def content_version(version: str, metas: List[dict]) -> str:
+    """Extend an index version over appended chunks; the same contents get the same version in every process"""
+    return chain_digest(version, [json.dumps(m, sort_keys=True, ensure_ascii=False) for m in metas])
+
+def initial_version(model: str) -> str:
+    """Version of an empty index; queries embedded with another model get other answers, so it is part of it"""
+    return chain_digest(EMPTY_DIGEST, [model])
+
+class ModelChanged(Exception):
+    """Vectors were embedded with a model the index no longer uses"""
+
+def read_index_info(path: str):
+    """The model, dimension and index structure recorded next to an index, or None for indexes saved before they were"""
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+def write_index_info(path: str, model: str, dim: int, factory: str = "Flat", version: str = None):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"model": model, "dim": int(dim), "factory": factory, "version": version}, f)
+    os.replace(tmp_path, path)
+
+class IndexSnapshot:
+    """Immutable view of the store: vectors, metadata and postings that always agree.
+
+    A snapshot is never modified after it is published. Writers build the
+    next snapshot from a copy and publish it with a single reference swap,
+    so a reader holding one sees a consistent index for the whole query.
+    Each one records the embedding model and dimension of its vectors, which
+    is what queries against it must be embedded with.
+
+    generation counts changes within this process; version is a digest of
+    the model and chunks, equal in every process serving the same contents,
+    so it can key caches shared between instances.
+    """
+
+    __slots__ = ("index", "meta", "lexical", "generation", "model", "dim", "version")
+
+    def __init__(self, index, meta: List[dict], lexical, generation: int, model: str = EMBEDDING_MODEL,
+                 dim: int = None, version: str = None):
+        self.index = index
+        self.meta = meta
+        self.lexical = lexical
+        self.generation = generation
+        self.model = model
+        self.dim = dim if dim is not None else index.d
+        self.version = version if version is not None else content_version(initial_version(model), meta)
 
 class FaissStore:
-    def __init__(self, dim: int = 1536, index_file: str = "data/faiss.index", meta_file: str = "data/meta.json"):
+    def __init__(self, dim: int = 1536, index_file: str = "data/faiss.index", meta_file: str = "data/meta.json",
+                 hybrid: bool = True, lexical_min_score: float = 6.0, lexical_ratio: float = 2.0,
+                 num_shards: int = 0, shard_processes: bool = True, shard_timeout: float = 0.5,
+                 preload: bool = True, bundle_file: str = None, verify_bundle: bool = True,
+                 model: str = EMBEDDING_MODEL, ann_params_file: str = None):
+        # Model and dimension of a new index; an existing one keeps those recorded with it
         self.dim = dim
+        self.model = model
         self.index_file = index_file
         self.meta_file = meta_file
+        # BM25 postings and the embedding model/dimension are persisted next to the vector index
+        self.lexical_file = os.path.splitext(index_file)[0] + ".lexical.npz"
+        self.info_file = os.path.splitext(index_file)[0] + ".info.json"
+        self.hybrid = hybrid
+        self.lexical_min_score = lexical_min_score
+        self.lexical_ratio = lexical_ratio
+        self.num_shards = num_shards
+        self.shard_processes = shard_processes
+        self.shard_timeout = shard_timeout
+        # A prebuilt bundle is served read-only; ingestion happens offline
+        self.bundle_file = bundle_file
+        self.verify_bundle = verify_bundle
+        self.bundle_manifest = None
+        self.read_only = bool(bundle_file)
+        # Index structure and search parameters chosen by ann_tuning.py; exact flat search without them
+        self.ann_params_file = ann_params_file
+        self.ann_params = None
+        self.factory = "Flat"
+        # Serializes writers only; readers never take it
+        self._write_lock = threading.Lock()
+        self._embed_batcher = None
+        self._search_batcher = None
+        self.router = None
+        self._listeners = []
+        # None until load() has run; the app loads in the background and gates traffic on it
+        self._snapshot = None
         
         # Ensure data directory exists
         os.makedirs(os.path.dirname(index_file), exist_ok=True)
         
-        if os.path.exists(index_file) and os.path.exists(meta_file):
-            print(f"Loading existing FAISS index from {index_file}")
-            self.index = faiss.read_index(index_file)
-            with open(meta_file, "r") as f:
-                self.meta = json.load(f)
-            print(f"Loaded index with {self.index.ntotal} vectors and {len(self.meta)} metadata entries")
+        if preload:
+            self.load()
+
+    def load(self):
+        """Load the index, metadata and postings from disk and publish them as the first snapshot"""
+        if self.bundle_file:
+            self._load_bundle()
+            return
+        info = read_index_info(self.info_file)
+        version = None
+        if info is not None:
+            # Indexes saved before the model was recorded were all embedded with EMBEDDING_MODEL
+            self.model, self.dim = info["model"], info["dim"]
+            self.factory = info.get("factory", "Flat")
+        if self.num_shards > 0:
+            # Vectors live in the shards; this process only keeps metadata and postings
+            self.router = ShardRouter.open(self.dim, self.num_shards, self.index_file,
+                                           processes=self.shard_processes, timeout=self.shard_timeout)
+            index = self.router.view()
+            meta = []
+            if os.path.exists(self.meta_file):
+                with open(self.meta_file, "r") as f:
+                    meta = json.load(f)
+            if index.ntotal != len(meta):
+                print(f"Warning: Shards have {index.ntotal} vectors but metadata has {len(meta)} entries")
+        elif os.path.exists(self.index_file) and os.path.exists(self.meta_file):
+            print(f"Loading existing FAISS index from {self.index_file}")
+            index = faiss.read_index(self.index_file)
+            with open(self.meta_file, "r") as f:
+                meta = json.load(f)
+            print(f"Loaded index with {index.ntotal} vectors and {len(meta)} metadata entries")
             
             # Check for consistency
-            if self.index.ntotal != len(self.meta):
-                print(f"Warning: Index has {self.index.ntotal} vectors but metadata has {len(self.meta)} entries")
+            if index.ntotal != len(meta):
+                print(f"Warning: Index has {index.ntotal} vectors but metadata has {len(meta)} entries")
+            elif info is not None:
+                # Saved with the index; recomputed from the chunks when missing
+                version = info.get("version")
         else:
             print("Creating new FAISS index...")
-            self.index = faiss.IndexFlatIP(dim)  # Inner product similarity
-            self.meta = []
+            index = faiss.IndexFlatIP(self.dim)  # Inner product similarity
+            meta = []
+            self.factory = "Flat"
+        converted = False
+        if self.router is None:
+            index, converted = self._tuned(index)
+        elif load_ann_params(self.ann_params_file) is not None:
+            print(f"Ignoring {self.ann_params_file}: sharded stores search their shards exactly")
+        
+        # Lexical index over the same chunks, rebuilt locally if missing or stale
+        lexical = BM25Index.load_or_build(
+            self.lexical_file, [m.get("text", "") for m in meta]
+        ) if self.hybrid else None
+        self._snapshot = IndexSnapshot(index, meta, lexical, generation=0, model=self.model, dim=self.dim,
+                                       version=version)
+        if converted:
+            # Built once; later loads read the tuned index back from disk
+            self.save()
+
+    def _load_bundle(self):
+        """Publish a prebuilt bundle: no embedding calls, no postings rebuild"""
+        bundle = IndexBundle.open(self.bundle_file, verify=self.verify_bundle)
+        manifest = bundle.manifest
+        if manifest["count"] and manifest["dim"] != self.dim:
+            raise BundleError(f"Bundle has dimension {manifest['dim']}, store expects {self.dim}")
+        if manifest["embedding_model"] != self.model:
+            raise BundleError(f"Bundle was embedded with {manifest['embedding_model']}, queries use {self.model}")
+        
+        index = faiss.IndexFlatIP(self.dim)
+        if manifest["count"]:
+            # The one copy at startup: from the mapped file into FAISS's own buffer
+            index.add(bundle.vectors)
+        # Bundles are served flat: building a tuned structure here would undo the mmap fast startup
+        self.factory = "Flat"
+        if load_ann_params(self.ann_params_file) is not None:
+            print(f"Ignoring {self.ann_params_file}: bundles search exactly")
+        lexical = bundle.lexical if self.hybrid else None
+        self.bundle_manifest = manifest
+        self._snapshot = IndexSnapshot(index, bundle.metas, lexical, generation=0, model=self.model, dim=self.dim,
+                                       version=manifest["version"])
+        print(f"Loaded bundle {manifest['version']} from {self.bundle_file}: {manifest['count']} chunks "
+              f"from {len(manifest['sources'])} sources")
+
+    def _tuned(self, index):
+        """Serve the structure chosen by ann_tuning.py, rebuilding index into it if it is not one yet.
+
+        Returns (index, converted). Without parameters, or with ones tuned for
+        another model or dimension, the index is served (or rebuilt) flat.
+        """
+        params = load_ann_params(self.ann_params_file)
+        if params is not None and (params["model"] != self.model or params["dim"] != self.dim):
+            print(f"ANN parameters in {self.ann_params_file} were tuned for {params['model']} ({params['dim']} "
+                  f"dimensions); using exact search until the index is tuned again")
+            params = None
+        self.ann_params = params
+        factory = params["factory"] if params is not None else "Flat"
+        converted = self.factory != factory
+        if converted:
+            vectors = index.reconstruct_n(0, index.ntotal) if index.ntotal else np.zeros((0, self.dim), dtype="float32")
+            index = self._new_index(vectors, self.dim)
+            print(f"Rebuilt index as {self.factory} for {index.ntotal} vectors")
+        elif params is not None:
+            apply_search_params(index, params["params"])
+        return index, converted
+
+    def _new_index(self, vectors: np.ndarray, dim: int):
+        """A fresh index over vectors in the tuned structure, or a flat one"""
+        if self.ann_params is not None and dim == self.ann_params["dim"]:
+            try:
+                index = build_index(vectors, self.ann_params["factory"])
+                apply_search_params(index, self.ann_params["params"])
+                self.factory = self.ann_params["factory"]
+                return index
+            except RuntimeError as e:
+                print(f"Could not build {self.ann_params['factory']} index, using exact search: {e}")
+        index = faiss.IndexFlatIP(dim)
+        if len(vectors):
+            index.add(vectors)
+        self.factory = "Flat"
+        return index
+
+    @property
+    def loaded(self) -> bool:
+        return self._snapshot is not None
+
+    def warm_up(self):
+        """Run one full scan of the vectors and one lexical search so the first real query is not the cold one"""
+        snapshot = self._snapshot
+        if snapshot.index.ntotal:
+            probe = np.random.default_rng(0).standard_normal((1, self.dim)).astype("float32")
+            faiss.normalize_L2(probe)
+            snapshot.index.search(probe, 1)
+        if snapshot.lexical is not None and snapshot.lexical.num_docs:
+            snapshot.lexical.search(next(iter(snapshot.lexical.vocab)), 1)
+
+    @property
+    def snapshot(self) -> IndexSnapshot:
+        """The currently published snapshot; grab it once and use it for the whole read"""
+        return self._snapshot
+
+    @property
+    def index(self):
+        return self._snapshot.index
+
+    @property
+    def meta(self) -> List[dict]:
+        return self._snapshot.meta
+
+    @property
+    def lexical(self):
+        return self._snapshot.lexical
+
+    @property
+    def embedding_model(self) -> str:
+        return self._snapshot.model
+
+    @property
+    def version(self) -> str:
+        """Digest of the index contents, stable across processes and restarts"""
+        return self._snapshot.version
+
+    @property
+    def generation(self) -> int:
+        """Bumped on every change to the index contents so caches can invalidate"""
+        return self._snapshot.generation
 
     def add(self, texts: List[str], metas: List[dict]):
         """Add text embeddings to the FAISS index"""
+        if self.read_only:
+            raise RuntimeError(f"Store is serving the read-only bundle {self.bundle_file}")
         if not texts or not metas:
             print("No texts or metadata to add")
             return
@@ -41,63 +296,242 @@ class FaissStore:
             
         print(f"Adding {len(texts)} documents to FAISS index...")
         
-        # Get embeddings for texts
-        embeddings = get_embeddings(texts)
+        while True:
+            model = self._snapshot.model
+            # Get embeddings for texts as a contiguous float32 matrix (no copy if already one)
+            arr = np.ascontiguousarray(get_embeddings(texts, model=model), dtype="float32")
+            
+            # Normalize for inner product similarity
+            faiss.normalize_L2(arr)
+            
+            try:
+                self.add_vectors(arr, metas, texts, model=model)
+                return
+            except ModelChanged:
+                # A re-embedding migration cut over while these were embedded; embed them again
+                continue
+
+    def add_vectors(self, arr: np.ndarray, metas: List[dict], texts: List[str] = None, persist: bool = True,
+                    model: str = None):
+        """Publish already-embedded, normalized vectors (ingestion, or a replica applying a delta)"""
+        if self.read_only:
+            raise RuntimeError(f"Store is serving the read-only bundle {self.bundle_file}")
+        if texts is None:
+            texts = [m.get("text", "") for m in metas]
+        with self._write_lock:
+            # Build the next version from a private copy while readers keep using the current one
+            current = self._snapshot
+            if model is not None and model != current.model:
+                raise ModelChanged(f"Vectors embedded with {model}, index now uses {current.model}")
+            if self.router is not None:
+                # Shards are append-only; older views simply hide the new ids
+                self.router.add(np.arange(current.index.ntotal, current.index.ntotal + len(arr)), arr)
+                index = self.router.view()
+            else:
+                index = faiss.clone_index(current.index)
+                index.add(arr)
+            lexical = current.lexical.with_documents(texts) if current.lexical is not None else None
+            self._snapshot = IndexSnapshot(index, current.meta + list(metas), lexical, current.generation + 1,
+                                           model=current.model, dim=current.dim,
+                                           version=content_version(current.version, metas))
+            
+            print(f"Added {len(texts)} documents. Total vectors: {index.ntotal}")
+            
+            # Save index and metadata
+            if persist:
+                self.save()
+            for listener in self._listeners:
+                listener(self._snapshot, arr)
+
+    def replace(self, arr: np.ndarray, metas: List[dict], persist: bool = True):
+        """Publish a whole new index built from vectors, e.g. a replica loading a full snapshot"""
+        if self.read_only:
+            raise RuntimeError(f"Store is serving the read-only bundle {self.bundle_file}")
+        if self.router is not None:
+            raise ValueError("Replacing the contents of a sharded store is not supported")
+        with self._write_lock:
+            current = self._snapshot
+            index = self._new_index(np.ascontiguousarray(arr, dtype="float32"), current.dim)
+            lexical = BM25Index().with_documents([m.get("text", "") for m in metas]) \
+                if current.lexical is not None else None
+            self._snapshot = IndexSnapshot(index, list(metas), lexical, current.generation + 1,
+                                           model=current.model, dim=current.dim)
+            print(f"Replaced index contents. Total vectors: {index.ntotal}")
+            if persist:
+                self.save()
+
+    def cut_over(self, model: str, build_index, persist: bool = True) -> bool:
+        """Publish the same chunks embedded with another model as the next generation (see reembed.py).
+
+        build_index(snapshot) returns the new index for every chunk of the
+        current snapshot, or None to leave the store as is (cut_over then
+        returns False). It runs under the write lock, so no chunk can be
+        added in between; it should only check and swap, not call the API.
+        """
+        if self.read_only or self.router is not None:
+            raise ValueError("Only a local, writable index can switch embedding models")
+        with self._write_lock:
+            current = self._snapshot
+            index = build_index(current)
+            if index is None:
+                return False
+            if index.ntotal != len(current.meta):
+                raise ValueError(f"New index has {index.ntotal} vectors for {len(current.meta)} chunks")
+            self.model, self.dim = model, index.d
+            # Tuned parameters belong to the old model's vectors
+            self.ann_params, self.factory = None, "Flat"
+            self._snapshot = IndexSnapshot(index, current.meta, current.lexical, current.generation + 1,
+                                           model=model, dim=index.d)
+            print(f"Switched embedding model from {current.model} to {model} ({index.d} dimensions)")
+            if persist:
+                self.save()
+            return True
+
+    def on_publish(self, listener):
+        """Call listener(snapshot, added_vectors) inside the write lock after every add"""
+        self._listeners.append(listener)
+
+    def enable_batching(self, max_batch: int = 32, max_wait: float = 0.005):
+        """Coalesce concurrent query embeddings and searches into batched calls"""
+        self._embed_batcher = MicroBatcher(self._embed_batch, max_batch=max_batch, max_wait=max_wait,
+                                           name="embed-batcher")
+        self._search_batcher = MicroBatcher(self._search_batch, max_batch=max_batch, max_wait=max_wait,
+                                            name="search-batcher")
+
+    def _embed_batch(self, texts: List[str], model: str = None) -> List[np.ndarray]:
+        """Embed several queries with one API call, returning one (1, dim) row each"""
+        arr = np.ascontiguousarray(get_embeddings(texts, model=model or self._snapshot.model), dtype="float32")
+        faiss.normalize_L2(arr)
+        return [arr[i:i + 1] for i in range(len(texts))]
+
+    def embed_query(self, text: str, model: str = None) -> np.ndarray:
+        """Embed a query into a normalized (1, dim) float32 array, with the current model unless given"""
+        if self._embed_batcher is not None and model in (None, self._snapshot.model):
+            return self._embed_batcher.submit(text)
+        return self._embed_batch([text], model=model)[0]
+
+    def _search_batch(self, requests: List[tuple]) -> List[list]:
+        """Run one multi-row search per snapshot for several (snapshot, embedding, k) requests"""
+        by_snapshot = {}
+        for position, (snapshot, _, _) in enumerate(requests):
+            by_snapshot.setdefault(id(snapshot), []).append(position)
         
-        # Convert to numpy array
-        arr = np.array(embeddings).astype("float32")
+        batch_results = [None] * len(requests)
+        for positions in by_snapshot.values():
+            group = [requests[i] for i in positions]
+            for position, results in zip(positions, self._search_snapshot(group[0][0], group)):
+                batch_results[position] = results
+        return batch_results
+
+    def _search_snapshot(self, snapshot: IndexSnapshot, requests: List[tuple]) -> List[list]:
+        """Run one multi-row search against a single snapshot"""
+        arr = np.vstack([embedding for _, embedding, _ in requests])
         
-        # Normalize for inner product similarity
-        faiss.normalize_L2(arr)
+        # Adjust k to not exceed available documents
+        k = min(max(k for _, _, k in requests), snapshot.index.ntotal)
         
-        # Add to index
-        self.index.add(arr)
+        # Search index
+        scores, ids = snapshot.index.search(arr, k)
         
-        # Add metadata
-        self.meta.extend(metas)
+        batch_results = []
+        for row, (_, _, row_k) in enumerate(requests):
+            # Format results
+            results = []
+            for idx, score in zip(ids[row][:row_k], scores[row][:row_k]):
+                if idx == -1:  # FAISS returns -1 for invalid results
+                    continue
+                    
+                if idx < len(snapshot.meta):
+                    results.append({
+                        "id": int(idx),
+                        "meta": snapshot.meta[idx], 
+                        "score": float(score)
+                    })
+                else:
+                    print(f"Warning: Index {idx} exceeds metadata length {len(snapshot.meta)}")
+            
+            # Sort by score (higher is better for inner product)
+            results.sort(key=lambda x: x['score'], reverse=True)
+            batch_results.append(results)
+        return batch_results
+
+    def lexical_fast_path(self, text: str, k: int = 5, snapshot: IndexSnapshot = None):
+        """Lexical-only results when BM25 alone is decisive, so no query embedding is needed"""
+        snapshot = snapshot or self._snapshot
+        if snapshot.lexical is None or snapshot.index.ntotal == 0:
+            return None
+        hits = snapshot.lexical.search(text, k)
+        if not hits:
+            return None
+        top = hits[0][1]
+        runner_up = hits[1][1] if len(hits) > 1 else 0.0
+        if top < self.lexical_min_score or top < self.lexical_ratio * runner_up:
+            return None
         
-        print(f"Added {len(texts)} documents. Total vectors: {self.index.ntotal}")
+        print(f"Lexical fast path: BM25 {top:.2f} vs {runner_up:.2f}, skipping embedding")
+        return [
+            {
+                "id": doc,
+                "meta": snapshot.meta[doc],
+                "score": score / (score + LEXICAL_SCORE_SCALE)
+            }
+            for doc, score in hits if doc < len(snapshot.meta)
+        ]
+
+    def _fuse(self, snapshot: IndexSnapshot, text: str, arr: np.ndarray, dense: list, k: int) -> list:
+        """Combine vector and BM25 rankings with reciprocal-rank fusion"""
+        hits = snapshot.lexical.search(text, max(k * 4, 20))
+        if not hits:
+            return dense[:k]
         
-        # Save index and metadata
-        self.save()
+        dense_by_id = {result["id"]: result for result in dense}
+        results = []
+        for doc in reciprocal_rank_fusion([list(dense_by_id), [doc for doc, _ in hits]])[:k]:
+            if doc in dense_by_id:
+                results.append(dense_by_id[doc])
+            elif doc < len(snapshot.meta):
+                # Lexical-only hit: report its cosine similarity like the dense ones
+                try:
+                    score = float(snapshot.index.reconstruct(doc) @ arr[0])
+                except RuntimeError:
+                    score = 0.0
+                results.append({"id": doc, "meta": snapshot.meta[doc], "score": score})
+        return results
+
+    def query(self, text: str, k: int = 5, embedding: np.ndarray = None, lexical_checked: bool = False,
+              embedding_model: str = None):
+        """Query the FAISS index for similar texts.
 
-    def query(self, text: str, k: int = 5):
-        """Query the FAISS index for similar texts"""
-        if self.index.ntotal == 0:
+        lexical_checked: the caller already tried lexical_fast_path. embedding_model: what the caller's
+        embedding was made with; it is only reused if that is still the index's model.
+        """
+        # Every step of this query reads the same snapshot, even if a write publishes meanwhile
+        snapshot = self._snapshot
+        if snapshot.index.ntotal == 0:
             print("Index is empty")
             return []
-            
-        # Get embedding for query text
-        embedding = get_embeddings([text])[0]
-        
-        # Convert to numpy array
-        arr = np.array([embedding]).astype("float32")
-        
-        # Normalize for inner product similarity
-        faiss.normalize_L2(arr)
-        
-        # Adjust k to not exceed available documents
-        k = min(k, self.index.ntotal)
         
-        # Search index
-        scores, ids = self.index.search(arr, k)
+        # Exact terms (product codes, phone numbers) may not need the embedding at all
+        if embedding is None and not lexical_checked:
+            fast = self.lexical_fast_path(text, k, snapshot=snapshot)
+            if fast is not None:
+                return fast
+            
+        # Reuse the caller's embedding when it already has one, unless the model changed since it was made
+        if embedding is not None and (embedding.shape[1] != snapshot.dim
+                                      or embedding_model not in (None, snapshot.model)):
+            embedding = None
+        arr = embedding if embedding is not None else self.embed_query(text, model=snapshot.model)
         
-        # Format results
-        results = []
-        for idx, score in zip(ids[0], scores[0]):
-            if idx == -1:  # FAISS returns -1 for invalid results
-                continue
-                
-            if idx < len(self.meta):
-                results.append({
-                    "meta": self.meta[idx], 
-                    "score": float(score)
-                })
-            else:
-                print(f"Warning: Index {idx} exceeds metadata length {len(self.meta)}")
+        # Hybrid retrieval searches deeper so fusion has candidates to reorder
+        dense_k = max(k * 4, 20) if snapshot.lexical is not None else k
+        if self._search_batcher is not None:
+            results = self._search_batcher.submit((snapshot, arr, dense_k))
+        else:
+            results = self._search_snapshot(snapshot, [(snapshot, arr, dense_k)])[0]
         
-        # Sort by score (higher is better for inner product)
-        results.sort(key=lambda x: x['score'], reverse=True)
+        if snapshot.lexical is not None:
+            results = self._fuse(snapshot, text, arr, results, k)
         
         print(f"Query returned {len(results)} results")
         if results:
@@ -107,23 +541,69 @@ class FaissStore:
 
     def save(self):
         """Save the FAISS index and metadata to disk"""
+        snapshot = self._snapshot
         try:
-            faiss.write_index(self.index, self.index_file)
+            if self.router is not None:
+                self.router.save(self.index_file)
+            else:
+                faiss.write_index(snapshot.index, self.index_file)
             with open(self.meta_file, "w") as f:
-                json.dump(self.meta, f, ensure_ascii=False, indent=2)
-            print(f"Saved index with {self.index.ntotal} vectors to {self.index_file}")
+                json.dump(snapshot.meta, f, ensure_ascii=False, indent=2)
+            write_index_info(self.info_file, snapshot.model, snapshot.dim, self.factory, snapshot.version)
+            if snapshot.lexical is not None:
+                snapshot.lexical.save(self.lexical_file)
+            print(f"Saved index with {snapshot.index.ntotal} vectors to {self.index_file}")
         except Exception as e:
             print(f"Error saving index: {e}")
 
+    def memory_bytes(self) -> int:
+        """Approximate resident size: vector codes, chunk text and BM25 postings"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return 0
+        size = snapshot.index.ntotal * getattr(snapshot.index, "code_size", self.dim * 4)
+        size += sum(len(m.get("text", "")) for m in snapshot.meta)
+        lexical = snapshot.lexical
+        if lexical is not None:
+            size += lexical.offsets.nbytes + lexical.doc_ids.nbytes + lexical.tfs.nbytes + lexical.doc_lengths.nbytes
+        return size
+
     def get_stats(self):
         """Get statistics about the index"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return {'loaded': False, 'dimension': self.dim}
         return {
-            'total_vectors': self.index.ntotal if self.index else 0,
-            'dimension': self.dim,
-            'metadata_count': len(self.meta),
-            'index_type': type(self.index).__name__ if self.index else None
+            'loaded': True,
+            'total_vectors': snapshot.index.ntotal,
+            'dimension': snapshot.dim,
+            'embedding_model': snapshot.model,
+            'metadata_count': len(snapshot.meta),
+            'memory_mb': round(self.memory_bytes() / 1e6, 2),
+            'generation': snapshot.generation,
+            'version': snapshot.version[:12],
+            'lexical_terms': len(snapshot.lexical.vocab) if snapshot.lexical is not None else None,
+            'batching': {
+                'embed': self._embed_batcher.get_stats(),
+                'search': self._search_batcher.get_stats()
+            } if self._search_batcher is not None else None,
+            'sharding': self.router.get_stats() if self.router is not None else None,
+            'bundle': {
+                'version': self.bundle_manifest['version'],
+                'created_at': self.bundle_manifest['created_at'],
+                'sources': len(self.bundle_manifest['sources'])
+            } if self.bundle_manifest is not None else None,
+            'index_type': type(snapshot.index).__name__,
+            'ann': {
+                'factory': self.factory,
+                'params': self.ann_params['params'] if self.factory == self.ann_params['factory'] else None,
+                'tuned_recall': self.ann_params['recall'],
+                'tuned_vectors': self.ann_params['vectors'],
+                # Parameters tuned on a much smaller corpus lose recall as it grows
+                'retune_suggested': snapshot.index.ntotal > 2 * self.ann_params['vectors']
+            } if self.ann_params is not None else None
         }
 
     def __len__(self):
         """Return the number of vectors in the index"""
-        return len(self.meta)
\ No newline at end of file
+        return len(self.meta) if self._snapshot is not None else 0
\ No newline at end of file
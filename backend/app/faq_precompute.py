@@ -0,0 +1,209 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import List, Optional
+
+import numpy as np
+
+from .embeddings_provider import get_embeddings, generate_text, EMBEDDING_MODEL
+from .faiss_store import read_index_info, write_index_info
+from .lazy_imports import lazy_import
+
+faiss = lazy_import("faiss")
+
+FAQ_SYSTEM_PROMPT = """You write FAQ entries for Mi Lifestyle customers and distributors.
+Given a passage, write the questions people are most likely to ask that the passage fully answers,
+each with a short, friendly, self-contained answer written as a Mi Lifestyle representative.
+Never mention "documents", "passages" or "information provided".
+Reply with a JSON array only, e.g. [{"question": "...", "answer": "..."}]."""
+
+
+def section_hash(text: str) -> str:
+    """Stable identifier for a document section's content"""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def generate_faq_pairs(section: str, max_pairs: int = 3) -> List[dict]:
+    """Ask the model for canonical question/answer pairs covering one section"""
+    prompt = f"""Passage:
+{section}
+
+Write up to {max_pairs} FAQ entries answered by this passage."""
+    raw = generate_text(prompt=prompt, system_prompt=FAQ_SYSTEM_PROMPT, max_tokens=700, temperature=0.2)
+
+    # Tolerate code fences or chatter around the JSON array
+    match = re.search(r'\[.*\]', raw or "", re.DOTALL)
+    if not match:
+        print("FAQ generation returned no JSON array, skipping section")
+        return []
+    try:
+        pairs = json.loads(match.group(0))
+    except json.JSONDecodeError as e:
+        print(f"Could not parse FAQ pairs: {e}")
+        return []
+
+    return [
+        {"question": p["question"].strip(), "answer": p["answer"].strip()}
+        for p in pairs[:max_pairs]
+        if isinstance(p, dict) and p.get("question") and p.get("answer")
+    ]
+
+
+class FaqStore:
+    """Index of precomputed FAQ questions whose answers are served without generation"""
+
+    def __init__(self, dim: int = 1536, index_file: str = "data/faq.index", meta_file: str = "data/faq.json",
+                 preload: bool = True):
+        self.dim = dim
+        self.model = EMBEDDING_MODEL
+        self.index_file = index_file
+        self.meta_file = meta_file
+        self.info_file = os.path.splitext(index_file)[0] + ".info.json"
+        self._lock = threading.Lock()
+        self.index = None
+        self.items = []
+        if preload:
+            self.load()
+
+    def load(self):
+        """Load the precomputed entries from disk, or start an empty index"""
+        info = read_index_info(self.info_file)
+        if info is not None:
+            self.model, self.dim = info["model"], info["dim"]
+        if os.path.exists(self.index_file) and os.path.exists(self.meta_file):
+            index = faiss.read_index(self.index_file)
+            with open(self.meta_file, "r") as f:
+                items = json.load(f)
+            print(f"Loaded {len(items)} precomputed FAQ entries")
+        else:
+            index = faiss.IndexFlatIP(self.dim)
+            items = []
+        with self._lock:
+            self.index, self.items = index, items
+
+    def section_hashes(self, source: str) -> set:
+        """Hashes of the sections of a source that already have FAQ entries"""
+        return {item["section_hash"] for item in self.items if item["source"] == source}
+
+    def sync_source(self, source: str, sections: List[str], max_pairs: int = 3) -> int:
+        """Generate entries for new sections of a source and drop those of removed sections"""
+        current = {section_hash(text): (i, text) for i, text in enumerate(sections)}
+        known = self.section_hashes(source)
+
+        stale = known - set(current)
+        if stale:
+            self._remove(lambda item: item["source"] == source and item["section_hash"] in stale)
+
+        new_items = []
+        for digest, (chunk_id, text) in current.items():
+            if digest in known:
+                continue
+            for pair in generate_faq_pairs(text, max_pairs=max_pairs):
+                new_items.append({
+                    "question": pair["question"],
+                    "answer": pair["answer"],
+                    "source": source,
+                    "chunk_id": chunk_id,
+                    "section_hash": digest
+                })
+
+        if new_items:
+            self._add(new_items)
+        print(f"FAQ entries for {source}: {len(new_items)} generated, {len(stale)} stale sections removed")
+        return len(new_items)
+
+    def _embed(self, questions: List[str], model: str = None) -> np.ndarray:
+        arr = np.ascontiguousarray(get_embeddings(questions, model=model or self.model), dtype="float32")
+        faiss.normalize_L2(arr)
+        return arr
+
+    def _add(self, items: List[dict]):
+        while True:
+            model = self.model
+            arr = self._embed([item["question"] for item in items], model=model)
+            with self._lock:
+                # Embed again if a re-embedding migration switched models meanwhile
+                if model != self.model:
+                    continue
+                self.index.add(arr)
+                self.items.extend(items)
+                self.save()
+                return
+
+    def prepare_reembed(self, model: str, dim: int) -> tuple:
+        """Embed every question with another model into a new index, without installing it (see reembed.py)"""
+        with self._lock:
+            items = list(self.items)
+        index = faiss.IndexFlatIP(dim)
+        if items:
+            index.add(self._embed([item["question"] for item in items], model=model))
+        return model, items, index
+
+    def install_reembedded(self, prepared: tuple) -> bool:
+        """Swap in an index from prepare_reembed; False if entries were added or removed since"""
+        model, items, index = prepared
+        with self._lock:
+            if self.items != items:
+                return False
+            self.index, self.model, self.dim = index, model, index.d
+            self.save()
+            return True
+
+    def _remove(self, predicate):
+        """Rebuild the flat index without the items matching predicate"""
+        with self._lock:
+            keep = [i for i, item in enumerate(self.items) if not predicate(item)]
+            vectors = self.index.reconstruct_n(0, self.index.ntotal)[keep] if keep else None
+            index = faiss.IndexFlatIP(self.dim)
+            if vectors is not None:
+                index.add(vectors)
+            self.index = index
+            self.items = [self.items[i] for i in keep]
+            self.save()
+
+    def match(self, embedding: np.ndarray, threshold: float, model: str = None) -> Optional[dict]:
+        """Return the closest precomputed entry if it clears the confidence threshold.
+
+        model is what the query was embedded with; vectors of another model are not comparable even at
+        the same dimension, so a query embedded just before or after a model switch never matches.
+        """
+        with self._lock:
+            if self.index is None or self.index.ntotal == 0 or embedding.shape[1] != self.index.d:
+                return None
+            if model is not None and model != self.model:
+                return None
+            scores, ids = self.index.search(embedding, 1)
+            score, idx = float(scores[0][0]), int(ids[0][0])
+            if idx == -1 or score < threshold:
+                return None
+            return dict(self.items[idx], score=score)
+
+    def save(self):
+        """Save the FAQ index and entries to disk"""
+        try:
+            faiss.write_index(self.index, self.index_file)
+            with open(self.meta_file, "w") as f:
+                json.dump(self.items, f, ensure_ascii=False, indent=2)
+            write_index_info(self.info_file, self.model, self.dim)
+        except Exception as e:
+            print(f"Error saving FAQ index: {e}")
+
+    def get_stats(self):
+        """Get statistics about the FAQ store"""
+        return {
+            'entries': len(self.items),
+            'embedding_model': self.model,
+            'sources': len({item["source"] for item in self.items})
+        }
+
+    def __len__(self):
+        return len(self.items)
+
+
+def create_faq_store(settings, dim: int, preload: bool = True) -> Optional[FaqStore]:
+    """Build the FAQ store described by the application settings"""
+    if not settings.faq_enabled:
+        return None
+    return FaqStore(dim=dim, preload=preload)
@@ -0,0 +1,31 @@
+"""JSON responses without Pydantic validation, encoded with orjson when it is installed"""
+import json
+from typing import Any, Iterable, Optional
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON; numpy scalars and arrays are accepted when orjson is available"""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse with the faster, compact encoder"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def select_fields(content: dict, fields: Optional[Iterable[str]]) -> dict:
+    """Keep only the requested top-level fields, in the requested order"""
+    if fields is None:
+        return content
+    return {name: content[name] for name in fields}
@@ -1,5 +1,84 @@
 """Global instances for the application"""
 from .faiss_store import FaissStore
+from .answer_cache import create_answer_cache
+from .semantic_cache import create_semantic_cache
+from .faq_precompute import create_faq_store
+from .admission import AdmissionLane
+from .sessions import create_session_store
+from .hedging import HedgedGenerator
+from .replication import create_replication
+from .readiness import Readiness
+from .kb_collections import create_collections
+from .extraction_cache import create_extraction_cache
+from .reembed import create_reembedder
+from .config import get_settings
 
-# Global FAISS store instance
-faiss_store = FaissStore()
+_settings = get_settings()
+
+# Startup progress; queries are only admitted once the index is loaded and warm
+readiness = Readiness()
+
+# Global FAISS store instance, loaded in the background by the app's lifespan
+faiss_store = FaissStore(
+    hybrid=_settings.hybrid_retrieval,
+    lexical_min_score=_settings.lexical_min_score,
+    lexical_ratio=_settings.lexical_ratio,
+    num_shards=_settings.index_shards,
+    shard_processes=_settings.shard_processes,
+    shard_timeout=_settings.shard_timeout,
+    preload=False,
+    bundle_file=_settings.index_bundle or None,
+    verify_bundle=_settings.verify_index_bundle,
+    ann_params_file=_settings.ann_params_file or None
+)
+if _settings.query_batch_max > 1:
+    faiss_store.enable_batching(
+        max_batch=_settings.query_batch_max,
+        max_wait=_settings.query_batch_window_ms / 1000.0
+    )
+
+# Snapshot publisher (primary) or follower (replica); None when standalone
+replication = create_replication(_settings, faiss_store)
+
+# Exact-match answer cache shared by all query requests
+answer_cache = create_answer_cache(_settings)
+
+# Similarity-matched cache for paraphrased questions
+semantic_cache = create_semantic_cache(_settings, dim=faiss_store.dim)
+
+# Precomputed FAQ answers generated at ingest time
+faq_store = create_faq_store(_settings, dim=faiss_store.dim, preload=False)
+
+# Named collections selected per request; None unless COLLECTIONS_FILE exists
+collection_registry = create_collections(_settings)
+
+# Extracted PDF text reused when the same file is ingested again; None when disabled
+extraction_cache = create_extraction_cache(_settings)
+
+# Background migration to another embedding model; None where the index cannot be rewritten in place
+reembedder = create_reembedder(_settings, faiss_store, faq_store)
+
+# Admission lanes: queries get most of the capacity, ingestion a small separate lane that waits while queries queue
+query_lane = AdmissionLane(
+    "query",
+    max_in_flight=_settings.query_max_in_flight,
+    max_queue=_settings.query_max_queue,
+    queue_timeout=_settings.query_queue_timeout
+)
+ingest_lane = AdmissionLane(
+    "ingest",
+    max_in_flight=_settings.ingest_max_in_flight,
+    max_queue=_settings.ingest_max_queue,
+    queue_timeout=_settings.ingest_queue_timeout,
+    yields_to=query_lane
+)
+
+# Conversation memory keyed by QueryRequest.session_id
+session_store = create_session_store(_settings)
+
+# Streaming generation with hedged requests for slow first tokens
+generator = HedgedGenerator(
+    hedge_percentile=_settings.hedge_percentile,
+    min_hedge_delay=_settings.hedge_min_delay,
+    max_attempts=_settings.hedge_max_attempts
+)
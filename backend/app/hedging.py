@@ -0,0 +1,246 @@
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+from .embeddings_provider import open_chat_stream, iter_stream_text
+
+
+class DeadlineExceeded(Exception):
+    """The request's latency budget ran out before an answer was produced"""
+
+
+class RequestCancelled(Exception):
+    """The client withdrew the request (e.g. sent a new message) before it was answered"""
+
+
+class Deadline:
+    """Absolute point in time by which a request must be answered; the client may also cancel it early"""
+
+    def __init__(self, budget_seconds: float):
+        self.budget = budget_seconds
+        self.expires_at = time.monotonic() + budget_seconds
+        self.cancelled = False
+        self._cancel_callbacks = []
+        self._lock = threading.Lock()
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def cancel(self):
+        """Expire now and wake anything waiting on this deadline"""
+        with self._lock:
+            if self.cancelled:
+                return
+            self.cancelled = True
+            self.expires_at = time.monotonic()
+            callbacks, self._cancel_callbacks = self._cancel_callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def on_cancel(self, callback: Callable):
+        """Run callback when the deadline is cancelled (immediately if it already was)"""
+        with self._lock:
+            if not self.cancelled:
+                self._cancel_callbacks.append(callback)
+                return
+        callback()
+
+
+class LatencyTracker:
+    """Rolling window of observed time-to-first-token samples"""
+
+    def __init__(self, window: int = 200, default: float = 2.0, min_samples: int = 20):
+        self.samples = deque(maxlen=window)
+        self.default = default
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.samples.append(seconds)
+
+    def percentile(self, p: float) -> float:
+        """p-th percentile of the window, or the default until enough samples exist"""
+        with self._lock:
+            if len(self.samples) < self.min_samples:
+                return self.default
+            ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100.0))]
+
+
+class _Attempt:
+    """One streaming completion running on its own thread, reporting to a shared event queue"""
+
+    def __init__(self, number: int, open_stream: Callable, events: queue.Queue):
+        self.number = number
+        self.open_stream = open_stream
+        self.events = events
+        self.started_at = time.monotonic()
+        self.first_token_at = None
+        self.parts = []
+        self.stream = None
+        self.cancelled = False
+        self._sink = None
+        self._parts_lock = threading.Lock()
+        threading.Thread(target=self._run, name=f"generation-attempt-{number}", daemon=True).start()
+
+    def _run(self):
+        try:
+            self.stream = self.open_stream()
+            if self.cancelled:
+                return
+            for text in iter_stream_text(self.stream):
+                if self.cancelled:
+                    return
+                if self.first_token_at is None:
+                    self.first_token_at = time.monotonic()
+                    self.events.put(("first_token", self, None))
+                with self._parts_lock:
+                    self.parts.append(text)
+                    if self._sink is not None:
+                        self._sink(text)
+            self.events.put(("done", self, None))
+        except Exception as e:
+            if not self.cancelled:
+                self.events.put(("error", self, e))
+        finally:
+            self._close()
+
+    def _close(self):
+        stream = self.stream
+        if stream is not None:
+            try:
+                stream.close()
+            except Exception:
+                pass
+
+    def cancel(self):
+        """Stop reading and close the HTTP stream so the upstream request is abandoned"""
+        self.cancelled = True
+        self._close()
+
+    def forward(self, sink: Callable):
+        """Send the text streamed so far, then every later token, to sink (in order)"""
+        with self._parts_lock:
+            if self.parts:
+                sink("".join(self.parts))
+            self._sink = sink
+
+    @property
+    def ttft(self) -> float:
+        return self.first_token_at - self.started_at
+
+    def text(self) -> str:
+        return "".join(self.parts)
+
+
+class HedgedGenerator:
+    """Streaming generation that hedges slow first tokens and respects a deadline.
+
+    If the first attempt has not produced a token by the configured
+    percentile of recent time-to-first-token, a duplicate request is sent.
+    Whichever streams first wins and the other is cancelled. If the deadline
+    passes, every attempt is cancelled and DeadlineExceeded is raised; if it is
+    cancelled, RequestCancelled is raised. With on_token, the winner's tokens
+    are passed on as they arrive.
+    """
+
+    def __init__(self, hedge_percentile: float = 90.0, min_hedge_delay: float = 0.3, max_attempts: int = 2,
+                 tracker: Optional[LatencyTracker] = None, open_stream: Callable = open_chat_stream):
+        self.hedge_percentile = hedge_percentile
+        self.min_hedge_delay = min_hedge_delay
+        self.max_attempts = max_attempts
+        self.tracker = tracker if tracker is not None else LatencyTracker()
+        self.open_stream = open_stream
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.deadline_exceeded = 0
+        self.cancelled = 0
+
+    def generate(self, prompt: str, deadline: Deadline, max_tokens: int = 1000, temperature: float = 0.7,
+                 system_prompt: str = None, on_token: Optional[Callable[[str], None]] = None) -> str:
+        self.requests += 1
+        events = queue.Queue()
+        attempts = []
+        deadline.on_cancel(lambda: events.put(("cancelled", None, None)))
+
+        def start_attempt():
+            attempts.append(_Attempt(
+                len(attempts) + 1,
+                lambda: self.open_stream(prompt, max_tokens=max_tokens, temperature=temperature,
+                                         system_prompt=system_prompt, timeout=max(deadline.remaining(), 0.1)),
+                events
+            ))
+
+        def cancel_all(keep=None):
+            for attempt in attempts:
+                if attempt is not keep:
+                    attempt.cancel()
+
+        start_attempt()
+        hedge_at = time.monotonic() + max(self.min_hedge_delay, self.tracker.percentile(self.hedge_percentile))
+        winner = None
+        failures = 0
+
+        while True:
+            can_hedge = winner is None and len(attempts) < self.max_attempts
+            timeout = deadline.remaining()
+            if can_hedge:
+                timeout = min(timeout, max(0.0, hedge_at - time.monotonic()))
+
+            try:
+                kind, attempt, error = events.get(timeout=timeout)
+            except queue.Empty:
+                if deadline.expired():
+                    cancel_all()
+                    self.deadline_exceeded += 1
+                    raise DeadlineExceeded(f"no answer within {deadline.budget:.1f}s")
+                if can_hedge:
+                    print(f"No first token after {time.monotonic() - attempts[0].started_at:.2f}s, sending hedged request")
+                    self.hedges += 1
+                    start_attempt()
+                continue
+
+            if kind == "cancelled":
+                cancel_all()
+                self.cancelled += 1
+                raise RequestCancelled("cancelled by the client")
+            elif kind == "first_token":
+                if winner is None:
+                    winner = attempt
+                    self.tracker.record(attempt.ttft)
+                    if attempt.number > 1:
+                        self.hedge_wins += 1
+                    cancel_all(keep=winner)
+                    if on_token is not None:
+                        winner.forward(on_token)
+            elif kind == "done":
+                if winner is None or attempt is winner:
+                    cancel_all(keep=attempt)
+                    return attempt.text()
+            elif kind == "error":
+                if attempt is winner:
+                    raise error
+                failures += 1
+                if failures == len(attempts):
+                    if len(attempts) < self.max_attempts and not deadline.expired():
+                        start_attempt()
+                    else:
+                        raise error
+
+    def get_stats(self):
+        """Get hedging and deadline statistics"""
+        return {
+            'requests': self.requests,
+            'hedges': self.hedges,
+            'hedge_wins': self.hedge_wins,
+            'deadline_exceeded': self.deadline_exceeded,
+            'cancelled': self.cancelled,
+            'hedge_delay': round(max(self.min_hedge_delay, self.tracker.percentile(self.hedge_percentile)), 3)
+        }
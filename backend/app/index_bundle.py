@@ -0,0 +1,220 @@
+"""Single-file, versioned index bundles built offline and memory-mapped at startup.
+
+Layout (all integers little-endian):
+
+    magic "RAGBNDL\\0" | uint32 format | uint32 reserved | uint64 manifest length
+    manifest JSON, padded to a 64-byte boundary
+    sections at 64-byte aligned offsets relative to the end of the padding:
+        vectors  raw float32 (count, dim), L2-normalized
+        chunks   JSON list of chunk metadata (source, chunk_id, text)
+        lexical  BM25 postings (npz)
+
+The manifest records the source hashes, chunking parameters, embedding
+model and a sha256 of every section.
+
+Build with:  python -m app.index_bundle build data/*.pdf --out data/index.bundle
+Check with:  python -m app.index_bundle verify data/index.bundle
+"""
+import io
+import os
+import sys
+import json
+import time
+import struct
+import hashlib
+import argparse
+import multiprocessing
+from typing import List, Optional
+
+import numpy as np
+
+from .embeddings_provider import get_embeddings, EMBEDDING_MODEL
+from .lexical_index import BM25Index
+from .pdf_ingest import extractor_id, prepare_chunks
+from .extraction_cache import ExtractionCache, file_sha256
+from .lazy_imports import lazy_import
+
+faiss = lazy_import("faiss")
+
+MAGIC = b"RAGBNDL\0"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sIIQ")
+ALIGNMENT = 64
+
+
+class BundleError(Exception):
+    """The bundle is missing, corrupt, or was built for a different model or format"""
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _prepare_source(args):
+    """Pool worker: hash, extract and chunk one PDF"""
+    path, chunk_size, overlap, cache_dir, extractor = args
+    cache = ExtractionCache(cache_dir) if cache_dir else None
+    chunks, metas = prepare_chunks(path, chunk_size, overlap, cache, extractor)
+    return {
+        "name": os.path.basename(path),
+        "sha256": file_sha256(path),
+        "bytes": os.path.getsize(path),
+        "chunks": len(chunks)
+    }, chunks, metas
+
+
+def build_bundle(pdf_paths: List[str], out_path: str, chunk_size: int = 1200, overlap: int = 200,
+                 workers: Optional[int] = None, extraction_cache_dir: Optional[str] = None,
+                 extractor: str = "auto") -> dict:
+    """Run the ingestion pipeline over pdf_paths and write one bundle file; returns its manifest"""
+    started = time.time()
+    jobs = [(path, chunk_size, overlap, extraction_cache_dir, extractor) for path in sorted(pdf_paths)]
+    workers = workers or min(len(jobs), os.cpu_count() or 1)
+    if workers > 1:
+        # Text extraction is CPU-bound, so sources are parsed in separate processes
+        with multiprocessing.get_context("spawn").Pool(workers) as pool:
+            prepared = pool.map(_prepare_source, jobs)
+    else:
+        prepared = [_prepare_source(job) for job in jobs]
+
+    sources, texts, metas = [], [], []
+    for source, chunks, chunk_metas in prepared:
+        sources.append(source)
+        texts.extend(chunks)
+        metas.extend(chunk_metas)
+    print(f"Prepared {len(texts)} chunks from {len(sources)} sources with {workers} workers")
+
+    vectors = np.ascontiguousarray(get_embeddings(texts), dtype="<f4") if texts else np.zeros((0, 0), dtype="<f4")
+    if len(vectors):
+        faiss.normalize_L2(vectors)
+    lexical = io.BytesIO()
+    BM25Index().with_documents(texts).save(lexical)
+
+    sections = {
+        "vectors": vectors.tobytes(),
+        "chunks": json.dumps(metas, ensure_ascii=False).encode("utf-8"),
+        "lexical": lexical.getvalue()
+    }
+    manifest = {
+        "format": FORMAT_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "embedding_model": EMBEDDING_MODEL,
+        "dim": int(vectors.shape[1]) if len(vectors) else 0,
+        "count": len(texts),
+        "chunking": {"chunk_size": chunk_size, "overlap": overlap},
+        "extractor": extractor_id(extractor),
+        "sources": sources,
+        "sections": {}
+    }
+    offset = 0
+    for name, data in sections.items():
+        offset = _align(offset)
+        manifest["sections"][name] = {"offset": offset, "length": len(data),
+                                      "sha256": hashlib.sha256(data).hexdigest()}
+        offset += len(data)
+    # The version identifies the exact contents, so two builds of the same inputs share it
+    manifest["version"] = hashlib.sha256(
+        json.dumps([manifest["sections"], manifest["embedding_model"], manifest["chunking"]],
+                   sort_keys=True).encode()
+    ).hexdigest()[:16]
+
+    manifest_bytes = json.dumps(manifest, indent=2).encode("utf-8")
+    data_start = _align(HEADER.size + len(manifest_bytes))
+    tmp_path = f"{out_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(manifest_bytes)))
+        f.write(manifest_bytes)
+        for name, data in sections.items():
+            f.seek(data_start + manifest["sections"][name]["offset"])
+            f.write(data)
+    os.replace(tmp_path, out_path)
+
+    print(f"Wrote bundle {manifest['version']} to {out_path}: {manifest['count']} chunks, "
+          f"{os.path.getsize(out_path) / 1e6:.1f} MB in {time.time() - started:.1f}s")
+    return manifest
+
+
+class IndexBundle:
+    """Read-only view of a bundle file; the vectors are a memory map, not a copy"""
+
+    def __init__(self, path: str, manifest: dict, vectors: np.ndarray, metas: List[dict], lexical: BM25Index):
+        self.path = path
+        self.manifest = manifest
+        self.vectors = vectors
+        self.metas = metas
+        self.lexical = lexical
+
+    @classmethod
+    def open(cls, path: str, verify: bool = True) -> "IndexBundle":
+        """Map a bundle, check its header and manifest, and optionally its section checksums"""
+        if not os.path.exists(path):
+            raise BundleError(f"Bundle {path} does not exist")
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise BundleError(f"{path} is too short to be a bundle")
+            magic, version, _, manifest_length = HEADER.unpack(header)
+            if magic != MAGIC:
+                raise BundleError(f"{path} is not an index bundle")
+            if version != FORMAT_VERSION:
+                raise BundleError(f"{path} has format {version}, this build reads format {FORMAT_VERSION}")
+            try:
+                manifest = json.loads(f.read(manifest_length))
+            except ValueError as e:
+                raise BundleError(f"{path} has an unreadable manifest: {e}")
+
+        data_start = _align(HEADER.size + manifest_length)
+        raw = np.memmap(path, dtype=np.uint8, mode="r")
+        sections = {}
+        for name, section in manifest["sections"].items():
+            start = data_start + section["offset"]
+            sections[name] = raw[start:start + section["length"]]
+            if len(sections[name]) != section["length"]:
+                raise BundleError(f"{path} is truncated in section {name}")
+            if verify and hashlib.sha256(sections[name]).hexdigest() != section["sha256"]:
+                raise BundleError(f"{path} failed its checksum in section {name}")
+
+        count, dim = manifest["count"], manifest["dim"]
+        vectors = sections["vectors"].view("<f4").reshape(count, dim) if count else np.zeros((0, dim), "<f4")
+        try:
+            metas = json.loads(bytes(sections["chunks"]).decode("utf-8"))
+            lexical = BM25Index.load(io.BytesIO(bytes(sections["lexical"])))
+        except Exception as e:
+            raise BundleError(f"{path} has an unreadable chunk store or lexical index: {e}")
+        if len(metas) != count:
+            raise BundleError(f"{path} has {count} vectors but {len(metas)} chunks")
+        return cls(path, manifest, vectors, metas, lexical)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Build or verify an index bundle")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Ingest PDFs into a new bundle")
+    build.add_argument("pdfs", nargs="+")
+    build.add_argument("--out", default="data/index.bundle")
+    build.add_argument("--chunk-size", type=int, default=1200)
+    build.add_argument("--overlap", type=int, default=200)
+    build.add_argument("--workers", type=int, default=None)
+    build.add_argument("--extraction-cache", default="data/extraction_cache",
+                       help="Reuse extracted text of unchanged PDFs from this directory ('' to disable)")
+    build.add_argument("--extractor", default="auto", help="PDF backend: auto, pymupdf, pdfminer or pypdf2")
+    verify = commands.add_parser("verify", help="Check a bundle's header and checksums")
+    verify.add_argument("bundle")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        build_bundle(args.pdfs, args.out, chunk_size=args.chunk_size, overlap=args.overlap, workers=args.workers,
+                     extraction_cache_dir=args.extraction_cache or None, extractor=args.extractor)
+    else:
+        try:
+            bundle = IndexBundle.open(args.bundle, verify=True)
+        except BundleError as e:
+            print(f"Invalid bundle: {e}")
+            sys.exit(1)
+        manifest = dict(bundle.manifest)
+        manifest.pop("sections")
+        print(json.dumps(manifest, indent=2))
+
+
+if __name__ == "__main__":
+    main()
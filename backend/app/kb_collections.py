@@ -0,0 +1,193 @@
+"""Named knowledge-base collections, loaded on first use and evicted LRU under a memory budget.
+
+Collections are declared in COLLECTIONS_FILE (default data/collections.json):
+
+    {
+      "acme-en": {},
+      "acme-fr": {"hybrid": false},
+      "partner": {"bundle_file": "data/partner.bundle"}
+    }
+
+Each one has its own index, chunk store and BM25 postings under
+COLLECTIONS_DIR/<name>/ (unless the spec names other files), its own answer
+and semantic caches, and its own retrieval settings. Requests pick one with
+"collection"; requests without it use the default index in globals.py.
+"""
+import os
+import re
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+from .faiss_store import FaissStore
+from .answer_cache import AnswerCache, LocalCacheBackend
+from .semantic_cache import SemanticCache
+
+NAME_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class CollectionSpec(BaseModel):
+    """Per-collection settings; anything left unset uses the store defaults"""
+    name: str
+    dim: int = 1536
+    index_file: Optional[str] = None
+    meta_file: Optional[str] = None
+    bundle_file: Optional[str] = None
+    hybrid: bool = True
+    lexical_min_score: float = 6.0
+    lexical_ratio: float = 2.0
+    answer_cache_size: int = 200
+    semantic_cache_size: int = 100
+    semantic_cache_threshold: float = 0.92
+
+
+class Collection:
+    """A resident collection: its store plus caches that never see other collections' answers"""
+
+    def __init__(self, spec: CollectionSpec, store: FaissStore, answer_cache: Optional[AnswerCache],
+                 semantic_cache: Optional[SemanticCache]):
+        self.spec = spec
+        self.name = spec.name
+        self.store = store
+        self.answer_cache = answer_cache
+        self.semantic_cache = semantic_cache
+        self.memory_bytes = store.memory_bytes()
+        self.pins = 0
+        self.loaded_at = time.time()
+
+
+class CollectionRegistry:
+    """Loads collections lazily and keeps the most recently used ones within memory_budget_mb.
+
+    A collection in use (acquired and not yet released) is never evicted, so
+    the budget can be exceeded briefly while every resident collection is busy.
+    """
+
+    def __init__(self, specs: List[CollectionSpec], root: str = "data/collections", memory_budget_mb: float = 1024.0):
+        for spec in specs:
+            if not NAME_PATTERN.match(spec.name):
+                raise ValueError(f"Invalid collection name {spec.name!r}; use letters, digits, '-' and '_'")
+        self.specs: Dict[str, CollectionSpec] = {spec.name: spec for spec in specs}
+        self.root = root
+        self.memory_budget = int(memory_budget_mb * 1e6)
+        self._resident: "OrderedDict[str, Collection]" = OrderedDict()
+        self._loading: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.specs
+
+    def names(self) -> List[str]:
+        return sorted(self.specs)
+
+    def resident(self) -> List[str]:
+        with self._lock:
+            return list(self._resident)
+
+    def _build(self, spec: CollectionSpec) -> Collection:
+        directory = os.path.join(self.root, spec.name)
+        store = FaissStore(
+            dim=spec.dim,
+            index_file=spec.index_file or os.path.join(directory, "faiss.index"),
+            meta_file=spec.meta_file or os.path.join(directory, "meta.json"),
+            hybrid=spec.hybrid,
+            lexical_min_score=spec.lexical_min_score,
+            lexical_ratio=spec.lexical_ratio,
+            bundle_file=spec.bundle_file
+        )
+        answer_cache = AnswerCache(LocalCacheBackend(spec.answer_cache_size)) if spec.answer_cache_size > 0 else None
+        semantic_cache = SemanticCache(
+            dim=spec.dim, max_entries=spec.semantic_cache_size, threshold=spec.semantic_cache_threshold
+        ) if spec.semantic_cache_size > 0 else None
+        return Collection(spec, store, answer_cache, semantic_cache)
+
+    def acquire(self, name: str) -> Collection:
+        """Pin a collection for use, loading it first if it is not resident; blocks while loading"""
+        spec = self.specs.get(name)
+        if spec is None:
+            raise KeyError(f"Unknown collection {name!r}")
+        with self._lock:
+            collection = self._pin_resident(name)
+            if collection is not None:
+                return collection
+            loading = self._loading.setdefault(name, threading.Lock())
+
+        # One loader per collection; other collections stay available meanwhile
+        with loading:
+            with self._lock:
+                collection = self._pin_resident(name)
+                if collection is not None:
+                    return collection
+            started = time.time()
+            collection = self._build(spec)
+            with self._lock:
+                collection.pins += 1
+                self._resident[name] = collection
+                self.loads += 1
+                self._evict()
+            print(f"Loaded collection {name} ({collection.memory_bytes / 1e6:.1f} MB) in {time.time() - started:.2f}s")
+            return collection
+
+    def _pin_resident(self, name: str) -> Optional[Collection]:
+        collection = self._resident.get(name)
+        if collection is not None:
+            self._resident.move_to_end(name)
+            collection.pins += 1
+            self.hits += 1
+        return collection
+
+    def release(self, collection: Collection):
+        """Unpin after use; ingestion into it may have grown it, so the budget is re-checked"""
+        with self._lock:
+            collection.pins -= 1
+            collection.memory_bytes = collection.store.memory_bytes()
+            self._evict()
+
+    def _evict(self):
+        """Drop least recently used, unpinned collections until the rest fit the budget"""
+        total = sum(c.memory_bytes for c in self._resident.values())
+        for name in list(self._resident):
+            if total <= self.memory_budget:
+                break
+            collection = self._resident[name]
+            if collection.pins > 0:
+                continue
+            del self._resident[name]
+            total -= collection.memory_bytes
+            self.evictions += 1
+            print(f"Evicted collection {name} ({collection.memory_bytes / 1e6:.1f} MB) to stay within the memory budget")
+
+    def get_stats(self):
+        """Get residency and load statistics"""
+        with self._lock:
+            return {
+                'collections': self.names(),
+                'resident': {
+                    name: {'memory_mb': round(c.memory_bytes / 1e6, 2), 'in_use': c.pins,
+                           'vectors': len(c.store)}
+                    for name, c in self._resident.items()
+                },
+                'memory_mb': round(sum(c.memory_bytes for c in self._resident.values()) / 1e6, 2),
+                'memory_budget_mb': round(self.memory_budget / 1e6, 2),
+                'hits': self.hits,
+                'loads': self.loads,
+                'evictions': self.evictions
+            }
+
+
+def create_collections(settings) -> Optional[CollectionRegistry]:
+    """Build the registry from COLLECTIONS_FILE; None when the file does not exist"""
+    if not settings.collections_file or not os.path.exists(settings.collections_file):
+        return None
+    with open(settings.collections_file) as f:
+        declared = json.load(f)
+    specs = [CollectionSpec(name=name, **(options or {})) for name, options in declared.items()]
+    print(f"Declared {len(specs)} collections: {', '.join(sorted(declared))}")
+    return CollectionRegistry(specs, root=settings.collections_dir, memory_budget_mb=settings.collections_memory_mb)
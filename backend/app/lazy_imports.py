@@ -0,0 +1,31 @@
+import sys
+import importlib
+import importlib.util
+
+
+def lazy_import(name: str):
+    """Return module `name`, deferring its actual import until an attribute is first used.
+
+    Keeps heavy dependencies (faiss, openai, PyPDF2) off the startup path:
+    importing the app only registers them, and the background startup task
+    pays for loading them before the instance reports ready.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        # Let the normal import raise the usual ImportError
+        return importlib.import_module(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def preload(*names: str):
+    """Finish importing lazily imported modules now, e.g. from a startup task before serving traffic"""
+    for name in names:
+        # Any attribute access runs a pending lazy import
+        getattr(sys.modules.get(name) or importlib.import_module(name), "__name__")
@@ -0,0 +1,124 @@
+import os
+from typing import List, Optional
+
+import numpy as np
+
+from .extractive import tokenize
+
+
+class BM25Index:
+    """Immutable BM25 inverted index with array-backed (CSR) postings.
+
+    Postings for term t are doc_ids[offsets[t]:offsets[t + 1]] with matching
+    term frequencies in tfs. Document ids are positions in the FAISS store,
+    so lexical and vector hits refer to the same chunk. `with_documents`
+    returns a new index, which lets the store publish it with a single
+    reference swap.
+    """
+
+    def __init__(self, vocab: Optional[dict] = None, offsets: Optional[np.ndarray] = None,
+                 doc_ids: Optional[np.ndarray] = None, tfs: Optional[np.ndarray] = None,
+                 doc_lengths: Optional[np.ndarray] = None, k1: float = 1.2, b: float = 0.75):
+        self.vocab = vocab if vocab is not None else {}
+        self.offsets = offsets if offsets is not None else np.zeros(1, dtype="int64")
+        self.doc_ids = doc_ids if doc_ids is not None else np.zeros(0, dtype="int32")
+        self.tfs = tfs if tfs is not None else np.zeros(0, dtype="float32")
+        self.doc_lengths = doc_lengths if doc_lengths is not None else np.zeros(0, dtype="float32")
+        self.k1 = k1
+        self.b = b
+        self.avg_length = float(self.doc_lengths.mean()) if len(self.doc_lengths) else 0.0
+
+    @property
+    def num_docs(self) -> int:
+        return len(self.doc_lengths)
+
+    def with_documents(self, texts: List[str]) -> "BM25Index":
+        """Return a new index containing the current documents followed by texts"""
+        vocab = dict(self.vocab)
+        term_ids, doc_ids, tfs, lengths = [], [], [], []
+        for offset, text in enumerate(texts):
+            tokens = tokenize(text)
+            lengths.append(len(tokens))
+            counts = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, count in counts.items():
+                term_ids.append(vocab.setdefault(token, len(vocab)))
+                doc_ids.append(self.num_docs + offset)
+                tfs.append(count)
+
+        # Expand the existing CSR postings back to (term, doc, tf) triples and re-sort with the new ones
+        old_terms = np.repeat(np.arange(len(self.offsets) - 1, dtype="int64"), np.diff(self.offsets))
+        all_terms = np.concatenate([old_terms, np.array(term_ids, dtype="int64")])
+        all_docs = np.concatenate([self.doc_ids, np.array(doc_ids, dtype="int32")])
+        all_tfs = np.concatenate([self.tfs, np.array(tfs, dtype="float32")])
+        order = np.argsort(all_terms, kind="stable")
+
+        offsets = np.zeros(len(vocab) + 1, dtype="int64")
+        np.cumsum(np.bincount(all_terms, minlength=len(vocab)), out=offsets[1:])
+        return BM25Index(
+            vocab=vocab,
+            offsets=offsets,
+            doc_ids=all_docs[order],
+            tfs=all_tfs[order],
+            doc_lengths=np.concatenate([self.doc_lengths, np.array(lengths, dtype="float32")]),
+            k1=self.k1,
+            b=self.b
+        )
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every document for the query"""
+        scores = np.zeros(self.num_docs, dtype="float32")
+        if not self.num_docs:
+            return scores
+        norm = self.k1 * (1 - self.b + self.b * self.doc_lengths / max(self.avg_length, 1e-6))
+        for term in set(tokenize(query)):
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            docs, tf = self.doc_ids[start:end], self.tfs[start:end]
+            idf = np.log(1 + (self.num_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            scores[docs] += idf * tf * (self.k1 + 1) / (tf + norm[docs])
+        return scores
+
+    def search(self, query: str, k: int) -> List[tuple]:
+        """Top-k (doc_id, score) pairs with a positive score, best first"""
+        scores = self.scores(query)
+        k = min(k, int((scores > 0).sum()))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(doc), float(scores[doc])) for doc in top]
+
+    def save(self, path: str):
+        terms = np.array(sorted(self.vocab, key=self.vocab.get))
+        np.savez_compressed(path, terms=terms, offsets=self.offsets, doc_ids=self.doc_ids,
+                            tfs=self.tfs, doc_lengths=self.doc_lengths)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        data = np.load(path)
+        vocab = {str(term): i for i, term in enumerate(data["terms"])}
+        return cls(vocab=vocab, offsets=data["offsets"], doc_ids=data["doc_ids"],
+                   tfs=data["tfs"], doc_lengths=data["doc_lengths"])
+
+    @classmethod
+    def load_or_build(cls, path: str, texts: List[str]) -> "BM25Index":
+        """Load the persisted index if it matches the chunk store, otherwise rebuild it locally"""
+        if os.path.exists(path):
+            index = cls.load(path)
+            if index.num_docs == len(texts):
+                return index
+            print(f"Lexical index has {index.num_docs} documents but store has {len(texts)}, rebuilding")
+        return cls().with_documents(texts)
+
+
+def reciprocal_rank_fusion(rankings: List[List[int]], k: int = 60) -> List[int]:
+    """Fuse several ranked id lists; ids ranked well by any list come first"""
+    fused = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking):
+            fused[doc] = fused.get(doc, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(fused, key=fused.get, reverse=True)
@@ -1,12 +1,18 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse
 import os
 import glob
+import asyncio
 from contextlib import asynccontextmanager
 
 from .api import router as api_router
 from .pdf_ingest import process_pdf
-from .globals import faiss_store
+from .globals import faiss_store, faq_store, replication, readiness, extraction_cache, reembedder
+from .replication import ReplicaFollower, SnapshotPublisher
+from .lazy_imports import preload
+from .config import get_settings
 
 async def auto_ingest_pdfs():
     """Automatically ingest PDFs from the data folder on startup"""
@@ -29,7 +35,9 @@ async def auto_ingest_pdfs():
     for pdf_file in pdf_files:
         try:
             print(f"Processing {pdf_file}...")
-            chunks_count = process_pdf(pdf_file, faiss_store)
+            chunks_count = await asyncio.to_thread(process_pdf, pdf_file, faiss_store, faq_store=faq_store,
+                                                 extraction_cache=extraction_cache, extractor=settings.pdf_extractor,
+                                                 page_timeout=settings.pdf_page_timeout or None)
             total_chunks += chunks_count
             print(f"Successfully processed {pdf_file} - {chunks_count} chunks")
         except Exception as e:
@@ -37,14 +45,55 @@ async def auto_ingest_pdfs():
     
     print(f"Auto-ingestion complete. Total chunks indexed: {total_chunks}")
 
+def load_and_warm_up():
+    """Load the indexes, finish deferred imports and run a warm-up search (blocking)"""
+    readiness.step("loading")
+    faiss_store.load()
+    if faq_store is not None:
+        faq_store.load()
+    if isinstance(replication, ReplicaFollower):
+        # Start from the primary's latest snapshot rather than whatever is on local disk
+        replication.sync()
+    
+    readiness.step("warming")
+    preload("faiss", "openai", "PyPDF2")
+    faiss_store.warm_up()
+
+async def start_up():
+    """Background startup: the app accepts connections (and /health) while this runs"""
+    try:
+        await asyncio.to_thread(load_and_warm_up)
+        if isinstance(replication, SnapshotPublisher):
+            replication.attach(faiss_store)
+        elif isinstance(replication, ReplicaFollower):
+            replication.start()
+        readiness.step("ready")
+        print(f"Ready to serve queries: {readiness.get_stats()}")
+        if reembedder is not None:
+            # A migration interrupted by a crash or restart continues in the background
+            reembedder.resume()
+    except Exception as e:
+        readiness.fail(e)
+        print(f"Startup failed: {e}")
+        return
+    
+    # Replicas never ingest; they serve whatever the primary has published. Bundles are built offline.
+    if not isinstance(replication, ReplicaFollower) and not faiss_store.read_only:
+        await auto_ingest_pdfs()
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     print("Starting Mi Lifestyle FAQ API...")
-    await auto_ingest_pdfs()
+    startup_task = asyncio.create_task(start_up())
     yield
     # Shutdown
     print("Shutting down Mi Lifestyle FAQ API...")
+    startup_task.cancel()
+    if reembedder is not None:
+        reembedder.stop()
+    if isinstance(replication, ReplicaFollower):
+        replication.stop()
 
 app = FastAPI(
     title="Mi Lifestyle FAQ API",
@@ -60,6 +109,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Large source lists compress well; small answers are not worth the CPU
+settings = get_settings()
+if settings.gzip_min_size > 0:
+    app.add_middleware(GZipMiddleware, minimum_size=settings.gzip_min_size, compresslevel=settings.gzip_level)
+
 # Include API routes
 app.include_router(api_router, prefix="/api")
 
@@ -67,6 +121,13 @@ app.include_router(api_router, prefix="/api")
 async def health_check():
     return {"status": "healthy", "message": "Mi Lifestyle FAQ API is running"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 503 until the index is loaded, warmed up and queryable"""
+    if not readiness.ready:
+        return JSONResponse(status_code=503, content={"status": readiness.state, **readiness.get_stats()})
+    return {"status": "ready", **readiness.get_stats()}
+
 if __name__ == "__main__":
     import uvicorn
     port = int(os.environ.get("PORT", 8000))
@@ -0,0 +1,284 @@
+"""PDF text extraction backends with per-page timeouts.
+
+PyPDF2 is always installed; pdfminer.six and PyMuPDF are used when they are
+importable. "auto" picks the fastest available backend and falls back to the
+next one when a document cannot be opened. Pages are extracted on a worker
+thread; a page that takes longer than page_timeout is left empty and the
+worker is replaced by a fresh one that resumes after it, so one malformed page
+cannot stall ingestion. Python threads cannot be killed, so an abandoned
+worker finishes (or keeps spinning) in the background with its result ignored.
+"""
+import io
+import time
+import queue
+import threading
+import importlib
+import importlib.util
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from importlib import metadata
+from typing import Dict, List, Optional
+
+from .lazy_imports import lazy_import
+
+# The default backend is registered lazily like the app's other heavy imports
+PyPDF2 = lazy_import("PyPDF2")
+
+
+class ExtractionError(Exception):
+    """The PDF could not be opened by any of the requested backends"""
+
+
+class PdfExtractor(ABC):
+    """One extraction backend: open a document, then extract its pages one at a time"""
+    name = ""
+    module = ""
+    distribution = ""
+
+    def available(self) -> bool:
+        try:
+            return importlib.util.find_spec(self.module) is not None
+        except ImportError:
+            return False
+
+    def version(self) -> str:
+        return metadata.version(self.distribution)
+
+    @abstractmethod
+    def open(self, path: str):
+        """Open the document; raises if this backend cannot read it"""
+
+    @abstractmethod
+    def page_count(self, document) -> int:
+        """Number of pages of an opened document"""
+
+    @abstractmethod
+    def page_text(self, document, index: int) -> str:
+        """Raw text of one page (0-based)"""
+
+    def close(self, document):
+        pass
+
+
+class PyPDF2Extractor(PdfExtractor):
+    name = "pypdf2"
+    module = "PyPDF2"
+    distribution = "PyPDF2"
+
+    def open(self, path: str):
+        return PyPDF2.PdfReader(path)
+
+    def page_count(self, document) -> int:
+        return len(document.pages)
+
+    def page_text(self, document, index: int) -> str:
+        return document.pages[index].extract_text() or ""
+
+
+class PdfMinerExtractor(PdfExtractor):
+    name = "pdfminer"
+    module = "pdfminer"
+    distribution = "pdfminer.six"
+
+    def open(self, path: str):
+        from pdfminer.pdfpage import PDFPage
+        from pdfminer.pdfinterp import PDFResourceManager
+        f = open(path, "rb")
+        try:
+            return f, list(PDFPage.get_pages(f)), PDFResourceManager()
+        except Exception:
+            f.close()
+            raise
+
+    def page_count(self, document) -> int:
+        return len(document[1])
+
+    def page_text(self, document, index: int) -> str:
+        from pdfminer.converter import TextConverter
+        from pdfminer.layout import LAParams
+        from pdfminer.pdfinterp import PDFPageInterpreter
+        _, pages, resources = document
+        out = io.StringIO()
+        device = TextConverter(resources, out, laparams=LAParams())
+        try:
+            PDFPageInterpreter(resources, device).process_page(pages[index])
+        finally:
+            device.close()
+        return out.getvalue()
+
+    def close(self, document):
+        document[0].close()
+
+
+class PyMuPDFExtractor(PdfExtractor):
+    name = "pymupdf"
+    module = "pymupdf"
+    distribution = "PyMuPDF"
+
+    def available(self) -> bool:
+        # Releases before 1.24.3 only provide the old "fitz" module name
+        return super().available() or importlib.util.find_spec("fitz") is not None
+
+    def open(self, path: str):
+        module = self.module if importlib.util.find_spec(self.module) else "fitz"
+        return importlib.import_module(module).open(path)
+
+    def page_count(self, document) -> int:
+        return document.page_count
+
+    def page_text(self, document, index: int) -> str:
+        return document[index].get_text() or ""
+
+    def close(self, document):
+        document.close()
+
+
+# Fastest first (see tests/benchmark_pdf_extractors.py); this is the order "auto" tries them in
+EXTRACTORS: Dict[str, PdfExtractor] = {
+    extractor.name: extractor for extractor in (PyMuPDFExtractor(), PyPDF2Extractor(), PdfMinerExtractor())
+}
+
+
+def available_extractors() -> List[str]:
+    return [name for name, extractor in EXTRACTORS.items() if extractor.available()]
+
+
+def candidates(name: str = "auto") -> List[PdfExtractor]:
+    """Backends to try for a document, in order; raises ValueError for unknown or missing ones"""
+    if name == "auto":
+        return [EXTRACTORS[available] for available in available_extractors()]
+    extractor = EXTRACTORS.get(name)
+    if extractor is None:
+        raise ValueError(f"Unknown PDF extractor {name!r}; choose from auto, {', '.join(EXTRACTORS)}")
+    if not extractor.available():
+        raise ValueError(f"PDF extractor {name!r} needs {extractor.distribution}, which is not installed")
+    return [extractor]
+
+
+@dataclass
+class Extraction:
+    """Raw per-page text from one backend; timed out and failed pages are empty strings"""
+    backend: str
+    pages: List[str]
+    timed_out: List[int] = field(default_factory=list)
+    failed: List[int] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def complete(self) -> bool:
+        return not self.timed_out and not self.failed
+
+
+class _Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.backends: Dict[str, dict] = {}
+
+    def record(self, extraction: Extraction):
+        with self._lock:
+            stats = self.backends.setdefault(
+                extraction.backend, {'documents': 0, 'pages': 0, 'timeouts': 0, 'failures': 0, 'seconds': 0.0}
+            )
+            stats['documents'] += 1
+            stats['pages'] += len(extraction.pages)
+            stats['timeouts'] += len(extraction.timed_out)
+            stats['failures'] += len(extraction.failed)
+            stats['seconds'] += extraction.seconds
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                name: dict(stats, seconds=round(stats['seconds'], 3),
+                           pages_per_second=round(stats['pages'] / stats['seconds'], 1) if stats['seconds'] else None)
+                for name, stats in self.backends.items()
+            }
+
+
+extraction_stats = _Stats()
+
+
+def _extract_inline(extractor: PdfExtractor, path: str) -> Extraction:
+    document = extractor.open(path)
+    try:
+        extraction = Extraction(extractor.name, [])
+        for index in range(extractor.page_count(document)):
+            try:
+                extraction.pages.append(extractor.page_text(document, index))
+            except Exception as e:
+                print(f"{extractor.name} failed on page {index + 1} of {path}: {e}")
+                extraction.pages.append("")
+                extraction.failed.append(index)
+        return extraction
+    finally:
+        extractor.close(document)
+
+
+def _page_worker(extractor: PdfExtractor, path: str, start: int, out: queue.Queue):
+    """Open the document and report its page count, then each page from start onwards"""
+    try:
+        document = extractor.open(path)
+    except Exception as e:
+        out.put(("error", e))
+        return
+    try:
+        count = extractor.page_count(document)
+        out.put(("count", count))
+        for index in range(start, count):
+            try:
+                out.put(("page", index, extractor.page_text(document, index)))
+            except Exception as e:
+                out.put(("failed", index, e))
+    finally:
+        extractor.close(document)
+
+
+def _extract_with_timeouts(extractor: PdfExtractor, path: str, page_timeout: float) -> Extraction:
+    extraction = Extraction(extractor.name, [])
+    count = None
+    while count is None or len(extraction.pages) < count:
+        start = len(extraction.pages)
+        out: queue.Queue = queue.Queue()
+        threading.Thread(target=_page_worker, args=(extractor, path, start, out),
+                         name=f"pdf-{extractor.name}", daemon=True).start()
+        while count is None or len(extraction.pages) < count:
+            try:
+                # Opening the document gets the same allowance as a page
+                message = out.get(timeout=page_timeout)
+            except queue.Empty:
+                if count is None:
+                    raise TimeoutError(f"{extractor.name} could not open {path} within {page_timeout}s")
+                index = len(extraction.pages)
+                print(f"{extractor.name} timed out on page {index + 1} of {path}; skipping it")
+                extraction.pages.append("")
+                extraction.timed_out.append(index)
+                break  # Abandon this worker; a new one resumes after the stuck page
+            if message[0] == "error":
+                raise message[1]
+            if message[0] == "count":
+                count = message[1]
+            elif message[0] == "page":
+                extraction.pages.append(message[2])
+            else:
+                print(f"{extractor.name} failed on page {message[1] + 1} of {path}: {message[2]}")
+                extraction.pages.append("")
+                extraction.failed.append(message[1])
+    return extraction
+
+
+def extract(path: str, extractor: str = "auto", page_timeout: Optional[float] = 10.0) -> Extraction:
+    """Extract raw per-page text with the named backend ("auto" for the fastest one that opens the file)"""
+    errors = []
+    for backend in candidates(extractor):
+        started = time.perf_counter()
+        try:
+            if page_timeout:
+                extraction = _extract_with_timeouts(backend, path, page_timeout)
+            else:
+                extraction = _extract_inline(backend, path)
+        except Exception as e:
+            errors.append(f"{backend.name}: {e}")
+            continue
+        extraction.seconds = time.perf_counter() - started
+        extraction_stats.record(extraction)
+        return extraction
+    raise ExtractionError(f"Could not extract text from {path} ({'; '.join(errors) or 'no backend available'})")
@@ -1,15 +1,58 @@
-from typing import List
+from typing import List, Optional, Tuple
 import os
-from PyPDF2 import PdfReader
 import re
+import unicodedata
+from .pdf_extractors import ExtractionError, PdfExtractor, candidates, extract
 
-def extract_text_from_pdf(path: str) -> str:
+# Bump when extraction or page normalization changes so cached text is re-extracted
+NORMALIZATION_VERSION = 1
+
+# Seconds one page may take before it is skipped (None extracts inline without a limit)
+PAGE_TIMEOUT = 10.0
+
+def backend_id(backend: PdfExtractor) -> str:
+    """Identify a backend and its version, so upgrading it invalidates the text it extracted"""
+    return f"{backend.name}-{backend.version()}/norm-{NORMALIZATION_VERSION}"
+
+def _backends(extractor: str) -> List[PdfExtractor]:
+    backends = candidates(extractor)
+    if not backends:
+        raise ExtractionError("No PDF extraction backend is installed")
+    return backends
+
+def extractor_id(extractor: str = "auto") -> str:
+    """Id of the backend tried first; a document it cannot open falls back to the next one"""
+    return backend_id(_backends(extractor)[0])
+
+def normalize_page(text: str) -> str:
+    """Lossless cleanup shared by cached and fresh extraction: NFC, \n line ends, no NULs"""
+    text = text.replace("\r\n", "\n").replace("\r", "\n").replace("\x00", "")
+    return unicodedata.normalize("NFC", text)
+
+def _parse_pages(path: str, extractor: str, page_timeout: Optional[float]) -> Tuple[List[str], bool, str]:
+    """(normalized pages, whether every page was extracted, name of the backend that extracted them)"""
+    extraction = extract(path, extractor, page_timeout)
+    return [normalize_page(page) for page in extraction.pages], extraction.complete, extraction.backend
+
+def extract_pages(path: str, cache=None, extractor: str = "auto", page_timeout: Optional[float] = PAGE_TIMEOUT) -> List[str]:
+    """Extract normalized per-page text, reusing an ExtractionCache entry for the same file bytes"""
+    if cache is None:
+        return _parse_pages(path, extractor, page_timeout)[0]
+    # Entries are stored under the backend that produced them, which is not the first candidate after a
+    # fallback, so every candidate's entry is looked up in the order extraction would try them
+    ids = {backend.name: backend_id(backend) for backend in _backends(extractor)}
+    sha256, pages = cache.lookup(path, list(ids.values()))
+    if pages is None:
+        pages, complete, backend = _parse_pages(path, extractor, page_timeout)
+        # Pages lost to a timeout or error are retried next time instead of being cached empty
+        if complete:
+            cache.put(sha256, ids[backend], pages)
+    return pages
+
+def extract_text_from_pdf(path: str, cache=None, extractor: str = "auto",
+                          page_timeout: Optional[float] = PAGE_TIMEOUT) -> str:
     """Extract text from a PDF file"""
-    reader = PdfReader(path)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text() or ""
-    return text
+    return "".join(extract_pages(path, cache, extractor, page_timeout))
 
 def chunk_text(text: str, chunk_size: int = 1200, overlap: int = 200) -> List[str]:
     """Split text into overlapping chunks"""
@@ -24,10 +67,11 @@ def chunk_text(text: str, chunk_size: int = 1200, overlap: int = 200) -> List[st
             break
     return chunks
 
-def process_pdf(file_path: str, faiss_store, chunk_size: int = 1200, overlap: int = 200):
-    """Process a PDF file, chunk it, and add to FAISS store"""
-    # Extract text from PDF
-    text = extract_text_from_pdf(file_path)
+def prepare_chunks(file_path: str, chunk_size: int = 1200, overlap: int = 200, extraction_cache=None,
+                   extractor: str = "auto", page_timeout: Optional[float] = PAGE_TIMEOUT):
+    """Extract, clean and chunk a PDF; returns the chunks and their metadata"""
+    # Extract text from PDF (from the extraction cache when this file was parsed before)
+    text = extract_text_from_pdf(file_path, extraction_cache, extractor, page_timeout)
     
     # Clean text
     text = re.sub(r'\s+', ' ', text)  # Replace multiple whitespaces with single space
@@ -36,13 +80,29 @@ def process_pdf(file_path: str, faiss_store, chunk_size: int = 1200, overlap: in
     # Chunk text
     chunks = chunk_text(text, chunk_size, overlap)
     
-    # Add chunks to FAISS store
-    for i, chunk in enumerate(chunks):
-        metadata = {
+    metadatas = [
+        {
             "source": os.path.basename(file_path),
             "chunk_id": i,
             "text": chunk
         }
-        faiss_store.add([chunk], [metadata])
+        for i, chunk in enumerate(chunks)
+    ]
+    return chunks, metadatas
+
+def process_pdf(file_path: str, faiss_store, chunk_size: int = 1200, overlap: int = 200, faq_store=None,
+                extraction_cache=None, extractor: str = "auto", page_timeout: Optional[float] = PAGE_TIMEOUT):
+    """Process a PDF file, chunk it, and add to FAISS store"""
+    chunks, metadatas = prepare_chunks(file_path, chunk_size, overlap, extraction_cache, extractor, page_timeout)
+    
+    # Add chunks to FAISS store in one call so embeddings are requested in batches
+    faiss_store.add(chunks, metadatas)
+    
+    # Precompute canonical Q/A pairs per section for the query fast path
+    if faq_store is not None:
+        try:
+            faq_store.sync_source(os.path.basename(file_path), chunks)
+        except Exception as e:
+            print(f"FAQ precompute failed for {file_path}: {e}")
     
     return len(chunks)
\ No newline at end of file
@@ -1,10 +1,108 @@
 import os
 from .embeddings_provider import generate_text
+from .hedging import DeadlineExceeded, RequestCancelled
+from .extractive import extractive_answer
+from .lazy_imports import lazy_import
+
+openai = lazy_import("openai")
+
+def query_rag(question: str, faiss_store, top_k: int = 5, answer_cache=None, semantic_cache=None,
+              faq_store=None, faq_threshold: float = 0.9, session_store=None, session_id: str = None,
+              deadline=None, generator=None, mode: str = "generative", extractive_embeddings: bool = False,
+              on_token=None):
+    """Perform RAG query using FAISS and OpenAI with enhanced prompting.
+
+    on_token, if given, receives generated text as it streams; answers that are
+    not generated (caches, FAQ, extractive) are only returned.
+    """
+    if deadline is not None and deadline.cancelled:
+        raise RequestCancelled("cancelled before it started")
+
+    # Follow-ups are condensed into a standalone question for retrieval and caching; that is an LLM call,
+    # which extractive mode promises to skip, so it retrieves with the question as asked
+    history = ""
+    if session_store is not None and session_id and mode != "extractive":
+        history, question_for_retrieval = session_store.prepare(session_id, question)
+    else:
+        question_for_retrieval = question
+
+    answer, sources, raw_generation = _answer_question(
+        question_for_retrieval,
+        faiss_store,
+        top_k=top_k,
+        answer_cache=answer_cache,
+        semantic_cache=semantic_cache,
+        faq_store=faq_store,
+        faq_threshold=faq_threshold,
+        history=history,
+        deadline=deadline,
+        generator=generator,
+        mode=mode,
+        extractive_embeddings=extractive_embeddings,
+        on_token=on_token
+    )
+
+    if session_store is not None and session_id:
+        session_store.record_turn(session_id, question, answer, summarize=mode != "extractive")
+
+    return answer, sources, raw_generation
+
+def _answer_question(question: str, faiss_store, top_k: int, answer_cache, semantic_cache,
+                     faq_store, faq_threshold: float, history: str = "", deadline=None, generator=None,
+                     mode: str = "generative", extractive_embeddings: bool = False, on_token=None):
+    """Answer a standalone question from the fast paths or with retrieval and generation"""
+    if mode == "extractive":
+        # Both caches hold generated answers, and their keys do not include the mode
+        answer_cache = semantic_cache = None
+
+    # Capture the index version up front so an answer is never cached under a newer index
+    snapshot = faiss_store.snapshot
+    generation, version = snapshot.generation, snapshot.version
+
+    # Serve repeated questions straight from the cache without any API calls
+    if answer_cache is not None:
+        cached = answer_cache.get(question, top_k, version, generation)
+        if cached is not None:
+            answer, sources = cached
+            return answer, sources, answer
+
+    # When BM25 alone is decisive, retrieval needs no embedding and the embedding-based fast paths are skipped
+    results = faiss_store.lexical_fast_path(question, k=top_k)
+
+    # The question embedding is shared by the fast paths below and by retrieval
+    embedding = None
+    if results is None and (semantic_cache is not None or faq_store) and len(faiss_store) > 0:
+        embedding = faiss_store.embed_query(question, model=snapshot.model)
+
+    # Common questions match a precomputed FAQ entry and skip retrieval and generation
+    if embedding is not None and faq_store:
+        match = faq_store.match(embedding, faq_threshold, model=snapshot.model)
+        if match is not None:
+            print(f"FAQ fast path ({match['score']:.3f}) on '{match['question']}'")
+            answer = match["answer"]
+            sources = [{
+                "source": match["source"],
+                "score": round(match["score"], 3),
+                "chunk_id": match["chunk_id"]
+            }]
+            if answer_cache is not None:
+                answer_cache.set(question, top_k, version, answer, sources, generation)
+            return answer, sources, answer
+
+    # Paraphrases of an answered question reuse its answer
+    if embedding is not None and semantic_cache is not None:
+        cached = semantic_cache.get(embedding, top_k, generation)
+        if cached is not None:
+            answer, sources = cached
+            if answer_cache is not None:
+                answer_cache.set(question, top_k, version, answer, sources, generation)
+            return answer, sources, answer
 
-def query_rag(question: str, faiss_store, top_k: int = 5):
-    """Perform RAG query using FAISS and OpenAI with enhanced prompting"""
     # Retrieve relevant chunks from FAISS
-    results = faiss_store.query(question, k=top_k)
+    if results is None:
+        # The fast path above already missed; don't BM25-score the question a second time
+        results = faiss_store.query(question, k=top_k, embedding=embedding, lexical_checked=True,
+                                    embedding_model=snapshot.model)
     
     # Debug: Print search results info
     print(f"Query: '{question}'")
@@ -19,26 +117,24 @@ def query_rag(question: str, faiss_store, top_k: int = 5):
             "Could you please rephrase your question or ask about something else related to Mi Lifestyle? "
             "I'm here to help with anything you need!"
         )
+        if answer_cache is not None:
+            answer_cache.set(question, top_k, version, fallback_message, [], generation)
         return fallback_message, [], fallback_message
     
+    # Extractive mode answers with the best sentences of the retrieved chunks, no LLM call
+    if mode == "extractive":
+        sentence_embedding = None
+        if extractive_embeddings:
+            sentence_embedding = embedding
+            if sentence_embedding is None:
+                sentence_embedding = faiss_store.embed_query(question, model=snapshot.model)
+        answer, sources = extractive_answer(question, results, embedding=sentence_embedding)
+        if not answer:
+            answer, sources = retrieval_only_answer(results), _sources(results)
+        return answer, sources, answer
+
     # Build context from retrieved chunks (limit to prevent token overflow)
-    context_parts = []
-    total_length = 0
-    max_context_length = 3000  # Limit context to prevent token issues
-    
-    for i, result in enumerate(results, 1):
-        source = result['meta']['source']
-        content = result['meta']['text'].strip()
-        chunk_text = f"[Document {i}: {source}]\n{content}"
-        
-        # Check if adding this chunk would exceed limit
-        if total_length + len(chunk_text) > max_context_length:
-            break
-            
-        context_parts.append(chunk_text)
-        total_length += len(chunk_text)
-    
-    context = "\n\n---\n\n".join(context_parts)
+    context = build_context(results)
     
     # Simplified system prompt for better performance
     system_prompt = """You are a helpful Mi Lifestyle representative. Be friendly, direct, and informative.
@@ -77,8 +173,14 @@ FORMATTING:
 • Use bullet points (•) for lists
 • Keep responses well-structured but concise"""
 
+    # Earlier turns are already summarized to fit the session token budget
+    conversation = f"""Conversation so far:
+{history}
+
+""" if history else ""
+
     # Enhanced user prompt with Mi Lifestyle focus
-    user_prompt = f"""Based on this Mi Lifestyle information:
+    user_prompt = f"""{conversation}Based on this Mi Lifestyle information:
 
 {context}
 
@@ -86,16 +188,160 @@ Question: {question}
 
 Provide a helpful, direct answer about Mi Lifestyle. Be friendly and enthusiastic but keep it concise and focused on what they asked."""
 
-    # Generate response using OpenAI with system prompt
-    answer = generate_text(
-        prompt=user_prompt, 
-        system_prompt=system_prompt,
-        max_tokens=600,  # Reduced to prevent long responses
-        temperature=0.3
-    )
+    sources = _sources(results)
+
+    # Generate response using OpenAI with system prompt, within the request's latency budget
+    try:
+        if deadline is not None and deadline.cancelled:
+            raise RequestCancelled("cancelled before generation")
+        if deadline is not None and deadline.expired():
+            raise DeadlineExceeded("latency budget spent before generation")
+        if deadline is not None and generator is not None:
+            answer = generator.generate(
+                user_prompt,
+                deadline,
+                system_prompt=system_prompt,
+                max_tokens=600,
+                temperature=0.3,
+                on_token=on_token
+            )
+        else:
+            answer = generate_text(
+                prompt=user_prompt, 
+                system_prompt=system_prompt,
+                max_tokens=600,  # Reduced to prevent long responses
+                temperature=0.3
+            )
+            if on_token is not None:
+                on_token(answer)
+    except RequestCancelled:
+        # Nobody is waiting for this answer, so there is nothing to fall back to or cache
+        raise
+    except (DeadlineExceeded, openai.OpenAIError) as e:
+        # Out of time or the generation API is down: answer extractively instead; never cached
+        print(f"Generation unavailable ({type(e).__name__}: {e}), falling back to extractive answer")
+        answer, extracted_sources = extractive_answer(question, results)
+        if not answer:
+            answer, extracted_sources = retrieval_only_answer(results), sources
+        return answer, extracted_sources, answer
+
+    # An answer shaped by this caller's conversation must not be served to anyone else asking the same question
+    if not history:
+        if answer_cache is not None:
+            answer_cache.set(question, top_k, version, answer, sources, generation)
+        if embedding is not None and semantic_cache is not None:
+            semantic_cache.add(embedding, question, top_k, generation, answer, sources)
     
-    # Prepare sources information with better metadata
-    sources = [
+    return answer, sources, answer
+
+def _overlap_length(previous: str, following: str) -> int:
+    """Length of the longest suffix of previous that is also a prefix of following"""
+    for length in range(min(len(previous), len(following) // 2), 0, -1):
+        if previous.endswith(following[:length]):
+            return length
+    return 0
+
+def _splice(texts) -> str:
+    """Join consecutive chunks, dropping the overlap each one repeats from the previous"""
+    merged = ""
+    for text in texts:
+        merged += text[_overlap_length(merged, text):]
+    return merged
+
+def merge_adjacent_chunks(results) -> list:
+    """Splice retrieved chunks with consecutive chunk_ids from the same source into passages.
+
+    The overlap that chunk_text repeats between neighbours is removed, passages
+    keep document order within a source, and sources are ordered by their best
+    retrieval score. Each passage keeps its chunks' texts and scores, so it can
+    be split again at chunk boundaries.
+    """
+    by_source = {}
+    for result in results:
+        by_source.setdefault(result['meta']['source'], []).append(result)
+
+    passages = []
+    for source, chunks in by_source.items():
+        chunks.sort(key=lambda r: r['meta'].get('chunk_id', 0))
+        current = None
+        for chunk in chunks:
+            chunk_id = chunk['meta'].get('chunk_id', 0)
+            text = chunk['meta']['text']
+            if current is not None and chunk_id == current['chunk_ids'][-1] + 1:
+                current['text'] += text[_overlap_length(current['text'], text):]
+                current['chunk_ids'].append(chunk_id)
+                current['chunk_texts'].append(text)
+                current['chunk_scores'].append(chunk['score'])
+                current['score'] = max(current['score'], chunk['score'])
+            elif current is not None and chunk_id == current['chunk_ids'][-1]:
+                continue  # Same chunk indexed twice
+            else:
+                current = {'source': source, 'chunk_ids': [chunk_id], 'text': text, 'score': chunk['score'],
+                           'chunk_texts': [text], 'chunk_scores': [chunk['score']]}
+                passages.append(current)
+
+    best_by_source = {}
+    for passage in passages:
+        best_by_source[passage['source']] = max(best_by_source.get(passage['source'], 0.0), passage['score'])
+    passages.sort(key=lambda p: (-best_by_source[p['source']], p['source'], p['chunk_ids'][0]))
+
+    for passage in passages:
+        passage['text'] = passage['text'].strip()
+    return passages
+
+def _split_passage(passage, max_chars: int) -> list:
+    """Cut a passage at chunk boundaries into runs of at most max_chars, best-scoring run first.
+
+    A single chunk longer than max_chars is kept as a run of its own.
+    """
+    runs, start = [], 0
+    count = len(passage['chunk_ids'])
+    while start < count:
+        end = start + 1
+        while end < count and len(_splice(passage['chunk_texts'][start:end + 1]).strip()) <= max_chars:
+            end += 1
+        runs.append({
+            'source': passage['source'],
+            'chunk_ids': passage['chunk_ids'][start:end],
+            'text': _splice(passage['chunk_texts'][start:end]).strip(),
+            'score': max(passage['chunk_scores'][start:end]),
+            'chunk_texts': passage['chunk_texts'][start:end],
+            'chunk_scores': passage['chunk_scores'][start:end]
+        })
+        start = end
+    runs.sort(key=lambda run: -run['score'])
+    return runs
+
+def build_context(results, max_context_length: int = 3000) -> str:
+    """Assemble the prompt context from retrieved chunks within a character budget.
+
+    Neighbouring chunks are spliced into one passage so their overlap is sent
+    once. A passage that does not fit in what is left of the budget is split
+    back at chunk boundaries, so merging never leaves out chunks that would
+    have fit on their own.
+    """
+    context_parts = []
+    total_length = 0
+    pending = merge_adjacent_chunks(results)
+    while pending:
+        passage = pending.pop(0)
+        chunk_text = f"[Document {len(context_parts) + 1}: {passage['source']}]\n{passage['text']}"
+
+        if total_length + len(chunk_text) > max_context_length:
+            if len(passage['chunk_ids']) > 1:
+                header_length = len(chunk_text) - len(passage['text'])
+                pending[:0] = _split_passage(passage, max_context_length - total_length - header_length)
+            # Otherwise skip it; a shorter passage may still fit
+            continue
+
+        context_parts.append(chunk_text)
+        total_length += len(chunk_text)
+
+    return "\n\n---\n\n".join(context_parts)
+
+def _sources(results):
+    """Prepare sources information with better metadata"""
+    return [
         {
             "source": result["meta"]["source"],
             "score": round(result["score"], 3),
@@ -103,5 +349,13 @@ Provide a helpful, direct answer about Mi Lifestyle. Be friendly and enthusiasti
         } 
         for result in results[:3]  # Limit sources returned
     ]
-    
-    return answer, sources, answer
\ No newline at end of file
+
+def retrieval_only_answer(results, max_passages: int = 2, max_chars: int = 400) -> str:
+    """Answer with excerpts of the best passages when there is no time left to generate"""
+    excerpts = []
+    for result in results[:max_passages]:
+        text = result['meta']['text'].strip()
+        if len(text) > max_chars:
+            text = text[:max_chars].rsplit(' ', 1)[0] + "..."
+        excerpts.append(f"• {text}")
+    return "Here's what I found on that:\n\n" + "\n\n".join(excerpts)
@@ -0,0 +1,201 @@
+import random
+import threading
+import time
+from typing import Optional
+
+from .lazy_imports import lazy_import
+
+openai = lazy_import("openai")
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at `per_minute` tokens per minute"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount: float = 1.0):
+        """Block until `amount` tokens are available, then take them"""
+        amount = min(amount, self.capacity)  # Oversized requests wait for a full bucket
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def drain(self):
+        """Empty the bucket after the server reports we are over its limit"""
+        with self._lock:
+            self.tokens = 0.0
+            self.updated = time.monotonic()
+
+
+class AIMDLimiter:
+    """Adaptive concurrency limit: additive increase on success, multiplicative decrease on throttling"""
+
+    def __init__(self, initial: int = 4, minimum: int = 1, maximum: int = 32, backoff: float = 0.5):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff = backoff
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, throttled: bool = False):
+        with self._cond:
+            self.in_flight -= 1
+            if throttled:
+                self.limit = max(self.minimum, self.limit * self.backoff)
+            else:
+                # Grows by roughly one slot per window of successful calls
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Read the server's Retry-After hint from an OpenAI API error, if any"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """Throttling, server errors and transport failures are worth retrying"""
+    if isinstance(error, (openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+class LimitedStream:
+    """A streaming response that holds its concurrency slot until it is exhausted or closed"""
+
+    def __init__(self, stream, concurrency: AIMDLimiter):
+        self.stream = stream
+        self._concurrency = concurrency
+        self._released = False
+        self._lock = threading.Lock()
+
+    def _release(self):
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        self._concurrency.release()
+
+    def __iter__(self):
+        try:
+            yield from self.stream
+        finally:
+            self._release()
+
+    def close(self):
+        try:
+            self.stream.close()
+        finally:
+            self._release()
+
+    def __del__(self):
+        # An abandoned stream must not keep its slot forever
+        self._release()
+
+
+class UpstreamLimiter:
+    """Client-side RPM/TPM limits, adaptive concurrency and jittered retries for one model endpoint"""
+
+    def __init__(self, name: str, rpm: int, tpm: int, max_concurrency: int = 16,
+                 max_retries: int = 6, base_delay: float = 0.5, max_delay: float = 30.0):
+        self.name = name
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.concurrency = AIMDLimiter(initial=min(4, max_concurrency), maximum=max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.calls = 0
+        self.throttled = 0
+        self.retries = 0
+
+    def call(self, fn, tokens: int = 1, hold: bool = False):
+        """Run fn() within the limits, retrying retryable failures with backoff.
+
+        With hold=True a successful call keeps its concurrency slot; the caller
+        releases it (see open_stream).
+        """
+        attempt = 0
+        while True:
+            self.requests.acquire(1)
+            self.tokens.acquire(tokens)
+            self.concurrency.acquire()
+            throttled = held = False
+            try:
+                self.calls += 1
+                result = fn()
+                held = hold
+                return result
+            except Exception as e:
+                throttled = isinstance(e, openai.RateLimitError)
+                if not is_retryable(e) or attempt >= self.max_retries:
+                    raise
+                error = e
+            finally:
+                if not held:
+                    self.concurrency.release(throttled=throttled)
+
+            if throttled:
+                self.throttled += 1
+                self.requests.drain()
+            # Full jitter exponential backoff, but never sooner than the server asked
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+            hinted = retry_after_seconds(error)
+            if hinted is not None:
+                delay = max(delay, hinted)
+            attempt += 1
+            self.retries += 1
+            print(f"{self.name} call failed ({type(error).__name__}), retry {attempt} in {delay:.2f}s")
+            time.sleep(delay)
+
+    def open_stream(self, fn, tokens: int = 1) -> LimitedStream:
+        """Open a streaming response with fn(); it counts against concurrency until read to the end or closed"""
+        return LimitedStream(self.call(fn, tokens, hold=True), self.concurrency)
+
+    def get_stats(self):
+        """Get throughput-control statistics for this endpoint"""
+        return {
+            'calls': self.calls,
+            'throttled': self.throttled,
+            'retries': self.retries,
+            'concurrency_limit': round(self.concurrency.limit, 2),
+            'in_flight': self.concurrency.in_flight
+        }
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) for TPM accounting"""
+    return len(text) // 4 + 1
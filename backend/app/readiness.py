@@ -0,0 +1,43 @@
+import time
+
+
+class Readiness:
+    """Startup progress of this instance, reported by the /ready probe.
+
+    Moves through starting -> loading -> warming -> ready (or failed) and
+    records how long each step took, so slow cold starts show up in /ready
+    and /api/stats.
+    """
+
+    def __init__(self):
+        self.state = "starting"
+        self.error = None
+        self.started_at = time.monotonic()
+        self.ready_at = None
+        self.timings = {}
+        self._step_started = self.started_at
+
+    def step(self, state: str):
+        now = time.monotonic()
+        self.timings[self.state] = round(now - self._step_started, 3)
+        self.state = state
+        self._step_started = now
+        if state == "ready":
+            self.ready_at = now
+
+    def fail(self, error: Exception):
+        self.step("failed")
+        self.error = str(error)
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def get_stats(self):
+        """Get startup state and step timings"""
+        return {
+            'state': self.state,
+            'error': self.error,
+            'seconds_to_ready': round(self.ready_at - self.started_at, 3) if self.ready_at else None,
+            'timings': self.timings
+        }
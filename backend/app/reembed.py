@@ -0,0 +1,241 @@
+"""Background migration of the chunk store to another embedding model.
+
+The live index keeps serving while every chunk is embedded again with the
+new model in throttled batches, which go through the same upstream limiter
+as live traffic. Vectors are appended to a shadow file in REEMBED_DIR, and
+progress is recorded after every batch, so a migration interrupted by a
+crash or restart resumes where it stopped:
+
+    state.json   {"model", "dim", "done", "digest", "status", ...}
+    shadow.f32   done x dim little-endian float32, normalized
+
+Chunks ingested meanwhile are embedded by the live store with the old model
+and picked up by the migration as it catches up. Once fewer than a batch
+remain, the last chunks and the FAQ questions are embedded, and the store
+cuts over atomically: under its write lock it only checks that no chunk was
+added meanwhile (otherwise the migration catches up again) and publishes the
+shadow vectors as the next generation together with the new FAQ index.
+"""
+import os
+import json
+import time
+import threading
+from typing import List, Optional
+
+import numpy as np
+
+from .embeddings_provider import get_embeddings
+from .faiss_store import chain_digest, EMPTY_DIGEST
+from .lazy_imports import lazy_import
+
+faiss = lazy_import("faiss")
+
+
+class Reembedder:
+    """Runs at most one re-embedding migration of a store at a time, resuming unfinished ones"""
+
+    def __init__(self, store, faq_store=None, directory: str = "data/reembed", batch_size: int = 100,
+                 chunks_per_minute: float = 3000.0):
+        self.store = store
+        self.faq_store = faq_store
+        self.directory = directory
+        self.state_file = os.path.join(directory, "state.json")
+        self.shadow_file = os.path.join(directory, "shadow.f32")
+        self.batch_size = batch_size
+        self.chunks_per_minute = chunks_per_minute
+        self.state = self._read_state()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _read_state(self) -> Optional[dict]:
+        if not os.path.exists(self.state_file):
+            return None
+        with open(self.state_file, "r") as f:
+            return json.load(f)
+
+    def _write_state(self):
+        self.state["updated_at"] = time.time()
+        tmp_path = f"{self.state_file}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.state_file)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def pending(self) -> bool:
+        """An unfinished migration is recorded on disk"""
+        return self.state is not None and self.state["status"] != "done"
+
+    def start(self, model: str) -> dict:
+        """Start migrating to model in the background; an unfinished migration to the same model resumes"""
+        with self._lock:
+            if self.running:
+                raise RuntimeError(f"A migration to {self.state['model']} is already running")
+            if self.store.embedding_model == model and not self.pending:
+                raise ValueError(f"The index already uses {model}")
+            if not self.pending or self.state["model"] != model:
+                self._reset(model)
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run_logged, name="reembed", daemon=True)
+            self._thread.start()
+            return self.get_stats()
+
+    def resume(self) -> bool:
+        """Continue an unfinished migration after a restart; returns whether one was started"""
+        if not self.pending or self.running:
+            return False
+        print(f"Resuming migration to {self.state['model']} at {self.state['done']} chunks")
+        self.start(self.state["model"])
+        return True
+
+    def stop(self, timeout: float = 10.0):
+        """Pause after the current batch; start() or resume() continues from there"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _reset(self, model: str):
+        os.makedirs(self.directory, exist_ok=True)
+        open(self.shadow_file, "wb").close()
+        self.state = {"model": model, "dim": None, "done": 0, "digest": EMPTY_DIGEST,
+                      "from_model": self.store.embedding_model, "status": "running",
+                      "started_at": time.time(), "error": None}
+        self._write_state()
+
+    def _run_logged(self):
+        try:
+            self.run()
+        except Exception as e:
+            self.state.update(status="failed", error=str(e))
+            self._write_state()
+            print(f"Migration to {self.state['model']} failed at {self.state['done']} chunks: {e}")
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        arr = np.ascontiguousarray(get_embeddings(texts, model=self.state["model"]), dtype="<f4")
+        faiss.normalize_L2(arr)
+        return arr
+
+    def _texts(self, snapshot) -> List[str]:
+        return [m.get("text", "") for m in snapshot.meta]
+
+    def _check_resumable(self):
+        """Drop shadow vectors that were written without their state, or that no longer match the chunks"""
+        state = self.state
+        texts = self._texts(self.store.snapshot)
+        if state["done"] > len(texts) or not os.path.exists(self.shadow_file) \
+                or chain_digest(EMPTY_DIGEST, texts[:state["done"]]) != state["digest"]:
+            print("Chunk store changed since the migration started; re-embedding from the beginning")
+            self._reset(state["model"])
+            return
+        with open(self.shadow_file, "r+b") as f:
+            f.truncate(state["done"] * (state["dim"] or 0) * 4)
+        state.update(status="running", error=None)
+        self._write_state()
+
+    def run(self):
+        """Re-embed until caught up, then cut over; blocking (start() runs it on a thread)"""
+        state = self.state
+        if self.store.embedding_model == state["model"]:
+            # Crashed after the cutover was saved but before the state was
+            state["status"] = "done"
+            self._write_state()
+            return
+        self._check_resumable()
+        interval = 60.0 * self.batch_size / self.chunks_per_minute if self.chunks_per_minute > 0 else 0.0
+        while not self._stop.is_set():
+            texts = self._texts(self.store.snapshot)
+            if len(texts) - state["done"] <= self.batch_size:
+                if self._cut_over():
+                    return
+                continue  # Chunks were added while the tail was embedded
+            started = time.monotonic()
+            self._append(texts[state["done"]:state["done"] + self.batch_size])
+            # Throttle so the migration leaves most of the upstream budget to live traffic
+            self._stop.wait(max(0.0, started + interval - time.monotonic()))
+        state["status"] = "paused"
+        self._write_state()
+        print(f"Migration to {state['model']} paused at {state['done']} chunks")
+
+    def _append(self, batch: List[str]):
+        """Embed the next chunks into the shadow file and record the progress"""
+        state = self.state
+        arr = self._embed(batch)
+        with open(self.shadow_file, "ab") as f:
+            f.write(arr.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        state.update(dim=int(arr.shape[1]), done=state["done"] + len(batch),
+                     digest=chain_digest(state["digest"], batch))
+        self._write_state()
+
+    def _cut_over(self) -> bool:
+        """Embed the last chunks and publish; False if chunks were added meanwhile"""
+        state = self.state
+        snapshot = self.store.snapshot
+        texts = self._texts(snapshot)
+        if chain_digest(EMPTY_DIGEST, texts[:state["done"]]) != state["digest"]:
+            raise RuntimeError("Chunk store changed during the migration; start it again")
+        if len(texts) > state["done"]:
+            self._append(texts[state["done"]:])
+        # An empty store only needs the new dimension
+        dim = state["dim"] or self._embed(["dimension probe"]).shape[1]
+        shadow = np.fromfile(self.shadow_file, dtype="<f4").reshape(-1, dim)
+        index = faiss.IndexFlatIP(dim)
+        if len(shadow):
+            index.add(np.ascontiguousarray(shadow, dtype="float32"))
+        faq = None
+        if self.faq_store is not None and self.faq_store.model != state["model"]:
+            faq = self.faq_store.prepare_reembed(state["model"], dim)
+
+        def build_index(current):
+            # Runs under the store's write lock, so it only checks and swaps; everything was embedded above
+            if current is not snapshot:
+                return None
+            if faq is not None and not self.faq_store.install_reembedded(faq):
+                return None
+            return index
+
+        if not self.store.cut_over(state["model"], build_index):
+            print(f"Index changed before the switch to {state['model']}; catching up")
+            return False
+        state.update(status="done", done=len(self.store.snapshot.meta), dim=self.store.snapshot.dim,
+                     finished_at=time.time())
+        self._write_state()
+        os.remove(self.shadow_file)
+        print(f"Migration to {state['model']} complete: {state['done']} chunks")
+        return True
+
+    def get_stats(self):
+        """Progress of the current or last migration"""
+        state = self.state
+        if state is None:
+            return {'status': None, 'model': self.store.embedding_model if self.store.loaded else None}
+        total = len(self.store.snapshot.meta) if self.store.loaded else None
+        return {
+            'status': state["status"],
+            'running': self.running,
+            'from_model': state.get("from_model"),
+            'model': state["model"],
+            'dim': state["dim"],
+            'done': state["done"],
+            'total': total,
+            'progress': round(state["done"] / total, 3) if total else None,
+            'error': state.get("error")
+        }
+
+
+def create_reembedder(settings, store, faq_store=None) -> Optional[Reembedder]:
+    """Build the migration runner for a local, writable index; None for bundles, shards and replicated nodes"""
+    if settings.index_bundle or settings.index_shards > 0 or settings.node_role != "standalone":
+        return None
+    return Reembedder(
+        store,
+        faq_store=faq_store,
+        directory=settings.reembed_dir,
+        batch_size=settings.reembed_batch_size,
+        chunks_per_minute=settings.reembed_chunks_per_minute
+    )
@@ -0,0 +1,287 @@
+import io
+import os
+import json
+import time
+import threading
+from typing import List, Optional
+
+import numpy as np
+
+VERSION_DIR = "versions"
+LATEST_KEY = "LATEST"
+
+
+class LocalObjectStore:
+    """Directory stand-in for a shared object store (S3/GCS-style put/get of whole objects).
+
+    Every put writes to a temporary file and renames it into place, so a
+    reader never sees a partially written object.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    def put(self, key: str, data: bytes):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def list(self, prefix: str) -> List[str]:
+        path = self._path(prefix)
+        return sorted(os.listdir(path)) if os.path.isdir(path) else []
+
+    def delete_prefix(self, prefix: str):
+        path = self._path(prefix)
+        if os.path.isdir(path):
+            for name in os.listdir(path):
+                os.remove(os.path.join(path, name))
+            os.rmdir(path)
+
+
+def _version_key(version: int, name: str) -> str:
+    return f"{VERSION_DIR}/{version:010d}/{name}"
+
+
+def _encode_vectors(arr: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    np.save(buffer, np.ascontiguousarray(arr, dtype="float32"))
+    return buffer.getvalue()
+
+
+def _decode_vectors(data: bytes) -> np.ndarray:
+    return np.load(io.BytesIO(data))
+
+
+def latest_version(object_store: LocalObjectStore) -> int:
+    data = object_store.get(LATEST_KEY)
+    return int(data) if data else 0
+
+
+def read_manifest(object_store: LocalObjectStore, version: int) -> Optional[dict]:
+    data = object_store.get(_version_key(version, "manifest.json"))
+    return json.loads(data) if data else None
+
+
+class SnapshotPublisher:
+    """Primary side: ships every published index snapshot to the object store.
+
+    Each add becomes a delta version holding only the new vectors and their
+    metadata. Every `full_every` versions (and on first start) a full
+    version is written so new replicas need not replay the whole history;
+    versions older than the second-newest full one are pruned. A version is
+    visible to replicas only once LATEST points at it, which is written last.
+    """
+
+    def __init__(self, object_store: LocalObjectStore, full_every: int = 20):
+        self.object_store = object_store
+        self.full_every = full_every
+        self.version = latest_version(object_store)
+        manifest = read_manifest(object_store, self.version) if self.version else None
+        self.count = manifest['count'] if manifest else 0
+        self.deltas_since_full = 0
+        self.published = 0
+        self.failures = 0
+        self.needs_full = False
+        self.dim = None
+
+    def attach(self, store):
+        """Publish the store's current contents if the object store is behind, then follow its writes"""
+        self.dim = store.dim
+        snapshot = store.snapshot
+        if self.version == 0 or self.count != snapshot.index.ntotal:
+            self.publish_full(snapshot)
+        store.on_publish(self.on_publish)
+
+    def _write(self, kind: str, arr: np.ndarray, metas: List[dict], count: int, base: int):
+        version = self.version + 1
+        self.object_store.put(_version_key(version, "vectors.npy"), _encode_vectors(arr))
+        self.object_store.put(_version_key(version, "meta.json"), json.dumps(metas, ensure_ascii=False).encode())
+        manifest = {"version": version, "kind": kind, "base": base, "count": count,
+                    "rows": len(arr), "created_at": time.time()}
+        self.object_store.put(_version_key(version, "manifest.json"), json.dumps(manifest).encode())
+        self.object_store.put(LATEST_KEY, str(version).encode())
+        self.version = version
+        self.count = count
+        self.published += 1
+        print(f"Published {kind} snapshot version {version} ({len(arr)} vectors, {count} total)")
+
+    def publish_full(self, snapshot):
+        ntotal = snapshot.index.ntotal
+        arr = snapshot.index.reconstruct_n(0, ntotal) if ntotal else np.zeros((0, self.dim), dtype="float32")
+        self._write("full", arr, snapshot.meta, ntotal, base=0)
+        self.deltas_since_full = 0
+        self._prune()
+
+    def on_publish(self, snapshot, arr: np.ndarray):
+        """FaissStore listener: runs inside the writer lock, so versions follow write order"""
+        try:
+            if self.needs_full or self.deltas_since_full + 1 >= self.full_every:
+                self.publish_full(snapshot)
+                self.needs_full = False
+                return
+            start = snapshot.index.ntotal - len(arr)
+            self._write("delta", arr, snapshot.meta[start:], snapshot.index.ntotal, base=self.version)
+            self.deltas_since_full += 1
+        except Exception as e:
+            # The local write already succeeded; a later full snapshot brings replicas back in line
+            self.failures += 1
+            self.needs_full = True
+            print(f"Error publishing snapshot: {e}")
+
+    def _prune(self):
+        """Drop versions older than the previous full one; replicas that far behind reload the newest full"""
+        fulls = [int(name) for name in self.object_store.list(VERSION_DIR)
+                 if (read_manifest(self.object_store, int(name)) or {}).get("kind") == "full"]
+        if len(fulls) < 2:
+            return
+        keep_from = sorted(fulls)[-2]
+        for name in self.object_store.list(VERSION_DIR):
+            if int(name) < keep_from:
+                self.object_store.delete_prefix(f"{VERSION_DIR}/{name}")
+
+    def get_stats(self):
+        """Get publishing statistics"""
+        return {
+            'role': 'primary',
+            'version': self.version,
+            'vectors': self.count,
+            'published': self.published,
+            'failures': self.failures
+        }
+
+
+class ReplicaFollower:
+    """Replica side: polls the object store and hot-swaps newer snapshots into the store.
+
+    Deltas are applied in order on top of the current version; a replica
+    that is new or too far behind loads the newest full version first.
+    Vectors are shipped already embedded, so nothing is re-embedded here.
+    """
+
+    def __init__(self, store, object_store: LocalObjectStore, poll_interval: float = 2.0):
+        self.store = store
+        self.object_store = object_store
+        self.poll_interval = poll_interval
+        self.version = 0
+        self.latest_seen = 0
+        self.behind_since = None
+        self.applied = 0
+        self.errors = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _load(self, version: int):
+        manifest = read_manifest(self.object_store, version)
+        vectors = self.object_store.get(_version_key(version, "vectors.npy"))
+        meta = self.object_store.get(_version_key(version, "meta.json"))
+        if manifest is None or vectors is None or meta is None:
+            return None, None, None
+        return manifest, _decode_vectors(vectors), json.loads(meta)
+
+    def _newest_full(self, latest: int) -> int:
+        for version in range(latest, 0, -1):
+            manifest = read_manifest(self.object_store, version)
+            if manifest is not None and manifest['kind'] == 'full':
+                return version
+        return 0
+
+    def sync(self) -> bool:
+        """Apply every version newer than the current one; returns True if anything changed"""
+        latest = latest_version(self.object_store)
+        self.latest_seen = max(self.latest_seen, latest)
+        if latest <= self.version:
+            self.behind_since = None
+            return False
+        if self.behind_since is None:
+            pending = read_manifest(self.object_store, self.version + 1)
+            self.behind_since = pending['created_at'] if pending else time.time()
+
+        version = self.version + 1
+        first, _, _ = self._load(version) if self.version else (None, None, None)
+        if first is None or (first['kind'] == 'delta' and first['base'] != self.version):
+            version = self._newest_full(latest)
+            if version == 0:
+                return False
+
+        while version <= latest:
+            manifest, vectors, meta = self._load(version)
+            if manifest is None:
+                raise RuntimeError(f"Snapshot version {version} is incomplete")
+            if manifest['kind'] == 'full':
+                self.store.replace(vectors, meta, persist=False)
+            else:
+                self.store.add_vectors(vectors, meta, persist=False)
+            self.version = version
+            self.applied += 1
+            version += 1
+
+        print(f"Replica caught up to snapshot version {self.version} ({len(self.store)} vectors)")
+        self.behind_since = None
+        return True
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sync()
+            except Exception as e:
+                self.errors += 1
+                print(f"Replica sync failed: {e}")
+            self._stop.wait(self.poll_interval)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="replica-follower", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def lag_seconds(self) -> float:
+        """How long the oldest snapshot this replica has not applied yet has been waiting"""
+        return round(time.time() - self.behind_since, 3) if self.behind_since else 0.0
+
+    def get_stats(self):
+        """Get replication lag statistics"""
+        return {
+            'role': 'replica',
+            'version': self.version,
+            'latest_seen': self.latest_seen,
+            'lag_versions': max(0, self.latest_seen - self.version),
+            'lag_seconds': self.lag_seconds(),
+            'applied': self.applied,
+            'errors': self.errors
+        }
+
+
+def create_replication(settings, store):
+    """Build the publisher or follower for this node's role; None for a standalone node.
+
+    Nothing is read or started here: once the store has loaded, startup
+    attaches a publisher to it or starts a follower.
+    """
+    if settings.node_role == "standalone":
+        return None
+    object_store = LocalObjectStore(settings.replication_dir)
+    if settings.node_role == "primary":
+        return SnapshotPublisher(object_store, full_every=settings.replication_full_every)
+    if settings.node_role == "replica":
+        # Replicas install full snapshots with FaissStore.replace, which needs a local, writable index
+        if settings.index_shards > 0:
+            raise ValueError("NODE_ROLE=replica cannot be combined with INDEX_SHARDS > 0")
+        if settings.index_bundle:
+            raise ValueError("NODE_ROLE=replica cannot serve an INDEX_BUNDLE; replicas load the primary's snapshots")
+        return ReplicaFollower(store, object_store, poll_interval=settings.replica_poll_interval)
+    raise ValueError(f"Unknown NODE_ROLE {settings.node_role!r}, expected standalone, primary or replica")
@@ -0,0 +1,112 @@
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .lazy_imports import lazy_import
+
+faiss = lazy_import("faiss")
+
+
+class SemanticCache:
+    """Answer cache matched by question-embedding similarity.
+
+    Keeps a small FAISS index over the embeddings of previously answered
+    questions, so paraphrases of a cached question reuse its answer without
+    retrieval or generation. Embeddings are expected to be L2-normalized, so
+    inner product is cosine similarity.
+    """
+
+    def __init__(self, dim: int = 1536, max_entries: int = 500, threshold: float = 0.92):
+        self.dim = dim
+        self.max_entries = max_entries
+        self.threshold = threshold
+        # Created on first use so building the cache does not import faiss at startup
+        self.index = None
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._next_id = 0
+        self._generation = None
+        self._lock = threading.Lock()
+
+    def _check_generation(self, generation, dim: int):
+        """Drop every entry once the document index has changed, taking the dimension of its embedding model"""
+        if self.index is None or generation != self._generation:
+            if self.entries:
+                print(f"Document index changed, clearing {len(self.entries)} semantic cache entries")
+            self.dim = dim
+            self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+            self.entries.clear()
+            self._generation = generation
+
+    def get(self, embedding: np.ndarray, top_k: int, generation) -> Optional[Tuple[str, List[dict]]]:
+        """Return the cached answer of the closest past question above the threshold"""
+        with self._lock:
+            self._check_generation(generation, embedding.shape[1])
+            if self.index.ntotal == 0 or embedding.shape[1] != self.dim:
+                self.misses += 1
+                return None
+
+            scores, ids = self.index.search(embedding, min(5, self.index.ntotal))
+            for idx, score in zip(ids[0], scores[0]):
+                if idx == -1 or score < self.threshold:
+                    break
+                entry = self.entries[int(idx)]
+                if entry["top_k"] != top_k:
+                    continue
+                entry["last_used"] = time.monotonic()
+                self.hits += 1
+                print(f"Semantic cache hit ({score:.3f}) on '{entry['question']}'")
+                return entry["answer"], entry["sources"]
+
+            self.misses += 1
+            return None
+
+    def add(self, embedding: np.ndarray, question: str, top_k: int, generation, answer: str, sources: List[dict]):
+        """Remember an answered question, evicting the least recently used entry when full"""
+        with self._lock:
+            self._check_generation(generation, embedding.shape[1])
+            if embedding.shape[1] != self.dim:
+                return
+            if len(self.entries) >= self.max_entries:
+                lru_id = min(self.entries, key=lambda i: self.entries[i]["last_used"])
+                self.index.remove_ids(np.array([lru_id], dtype="int64"))
+                del self.entries[lru_id]
+                self.evictions += 1
+
+            entry_id = self._next_id
+            self._next_id += 1
+            self.index.add_with_ids(embedding, np.array([entry_id], dtype="int64"))
+            self.entries[entry_id] = {
+                "question": question,
+                "top_k": top_k,
+                "answer": answer,
+                "sources": sources,
+                "last_used": time.monotonic()
+            }
+
+    def get_stats(self):
+        """Get statistics about the cache"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': len(self.entries),
+            'threshold': self.threshold
+        }
+
+
+def create_semantic_cache(settings, dim: int) -> Optional[SemanticCache]:
+    """Build the semantic cache described by the application settings"""
+    if settings.semantic_cache_size <= 0:
+        return None
+    return SemanticCache(
+        dim=dim,
+        max_entries=settings.semantic_cache_size,
+        threshold=settings.semantic_cache_threshold
+    )
@@ -0,0 +1,204 @@
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from .embeddings_provider import generate_text
+from .rate_limit import estimate_tokens
+
+# Longest question or answer kept verbatim in a session; the rest only survives in the summary
+MAX_STORED_TURN_CHARS = 1200
+
+
+class Session:
+    """Recent turns of one conversation plus a rolling summary of older ones.
+
+    pending holds turns that left the window but are not folded into the
+    summary yet; they stay in the history until they are.
+    """
+
+    def __init__(self, max_turns: int):
+        self.turns = deque(maxlen=max_turns)
+        self.pending = []
+        self.summary = ""
+        self.last_active = time.monotonic()
+
+    def history_tokens(self) -> int:
+        return estimate_tokens(self.summary) + sum(estimate_tokens(q + a) for q, a in self.turns)
+
+    def size_bytes(self) -> int:
+        """Approximate memory held by this session"""
+        turns = list(self.pending) + list(self.turns)
+        return sys.getsizeof(self.summary) + sum(sys.getsizeof(q) + sys.getsizeof(a) for q, a in turns)
+
+    def render(self) -> str:
+        """Format the conversation for inclusion in a prompt"""
+        parts = []
+        if self.summary:
+            parts.append(f"Earlier in the conversation: {self.summary}")
+        for question, answer in list(self.pending) + list(self.turns):
+            parts.append(f"Customer: {question}\nYou: {answer}")
+        return "\n\n".join(parts)
+
+
+def summarize_turns(summary: str, turns) -> str:
+    """Fold older turns into a short running summary"""
+    transcript = "\n".join(f"Customer: {q}\nRepresentative: {a}" for q, a in turns)
+    prompt = f"""Current summary: {summary or "(none)"}
+
+New conversation turns:
+{transcript}
+
+Update the summary in at most 3 sentences. Keep names, numbers and what the customer is trying to do."""
+    return generate_text(prompt=prompt, max_tokens=150, temperature=0.0).strip()
+
+
+def condense_question(history: str, question: str) -> str:
+    """Rewrite a follow-up question into a standalone question for retrieval"""
+    prompt = f"""Conversation:
+{history}
+
+Follow-up question: {question}
+
+Rewrite the follow-up as a single standalone question that can be understood without the conversation.
+Reply with the question only."""
+    return generate_text(prompt=prompt, max_tokens=80, temperature=0.0).strip() or question
+
+
+class SessionStore:
+    """Server-side conversation memory with per-session caps and LRU eviction of idle sessions"""
+
+    def __init__(self, max_sessions: int = 1000, idle_ttl: float = 1800.0, max_turns: int = 6,
+                 history_token_budget: int = 600):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_turns = max_turns
+        self.history_token_budget = history_token_budget
+        self.evictions = 0
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        # Summaries are LLM calls, so they are made after the answer is returned, one at a time
+        self._summarizer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="session-summary")
+
+    def _evict(self, keep: str):
+        """Drop idle sessions, then the least recently used ones above the cap"""
+        now = time.monotonic()
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session_id == keep:
+                break
+            if now - session.last_active <= self.idle_ttl and len(self._sessions) <= self.max_sessions:
+                break
+            del self._sessions[session_id]
+            self.evictions += 1
+
+    def get(self, session_id: str) -> Session:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = Session(self.max_turns)
+                self._sessions[session_id] = session
+            session.last_active = time.monotonic()
+            self._sessions.move_to_end(session_id)
+            self._evict(keep=session_id)
+            return session
+
+    def prepare(self, session_id: str, question: str) -> Tuple[str, str]:
+        """Return (history for the prompt, standalone question for retrieval)"""
+        session = self.get(session_id)
+        with self._lock:
+            history = session.render()
+        if not history:
+            return "", question
+        try:
+            standalone = condense_question(history, question)
+        except Exception as e:
+            print(f"Could not condense follow-up question: {e}")
+            standalone = question
+        print(f"Condensed '{question}' -> '{standalone}'")
+        return history, standalone
+
+    def record_turn(self, session_id: str, question: str, answer: str, summarize: bool = True):
+        """Append a turn and roll older turns into the summary to stay within the token budget.
+
+        The summary is updated in the background, so the caller never waits for
+        it. With summarize=False (extractive mode, no LLM calls) older questions
+        are appended to the summary as is, right away.
+        """
+        session = self.get(session_id)
+        if len(question) > MAX_STORED_TURN_CHARS:
+            question = question[:MAX_STORED_TURN_CHARS] + "..."
+        if len(answer) > MAX_STORED_TURN_CHARS:
+            answer = answer[:MAX_STORED_TURN_CHARS] + "..."
+
+        # Concurrent turns of one session (a resend, or WebSocket and HTTP) must not interleave on the deque
+        with self._lock:
+            overflow = []
+            if len(session.turns) == session.turns.maxlen:
+                overflow.append(session.turns.popleft())
+            session.turns.append((question, answer))
+            while len(session.turns) > 1 and session.history_tokens() > self.history_token_budget:
+                overflow.append(session.turns.popleft())
+            session.pending.extend(overflow)
+
+        if not overflow:
+            return
+        if summarize:
+            self._summarizer.submit(self._fold_pending, session, True)
+        else:
+            self._fold_pending(session, False)
+
+    def _fold_pending(self, session: Session, summarize: bool):
+        """Fold the session's pending turns into its summary, publishing it under the lock"""
+        while True:
+            with self._lock:
+                previous, folded = session.summary, list(session.pending)
+            if not folded:
+                return
+            summary = None
+            if summarize:
+                try:
+                    summary = summarize_turns(previous, folded)
+                except Exception as e:
+                    print(f"Could not summarize session history: {e}")
+            if summary is None:
+                summary = (previous + " " + " ".join(q for q, _ in folded)).strip()
+            # The summary itself never exceeds half of the budget
+            max_chars = self.history_token_budget * 2
+            if len(summary) > max_chars:
+                summary = summary[-max_chars:]
+            with self._lock:
+                # Otherwise another turn folded its own overflow in meanwhile; fold ours into that summary
+                if session.summary == previous:
+                    session.summary = summary
+                    del session.pending[:len(folded)]
+
+    def wait_for_summaries(self):
+        """Block until the summaries of turns recorded so far are published"""
+        self._summarizer.submit(lambda: None).result()
+
+    def get_stats(self):
+        """Get session counts and memory usage"""
+        with self._lock:
+            sizes = [session.size_bytes() for session in self._sessions.values()]
+        return {
+            'sessions': len(sizes),
+            'total_bytes': sum(sizes),
+            'max_session_bytes': max(sizes) if sizes else 0,
+            'evictions': self.evictions,
+            'max_sessions': self.max_sessions
+        }
+
+
+def create_session_store(settings) -> Optional[SessionStore]:
+    """Build the session store described by the application settings"""
+    if settings.session_max_sessions <= 0:
+        return None
+    return SessionStore(
+        max_sessions=settings.session_max_sessions,
+        idle_ttl=settings.session_idle_ttl,
+        max_turns=settings.session_max_turns,
+        history_token_budget=settings.session_history_tokens
+    )
@@ -0,0 +1,327 @@
+import os
+import threading
+import time
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import List, Optional
+
+import numpy as np
+
+from .lazy_imports import lazy_import
+
+faiss = lazy_import("faiss")
+
+
+def shard_for(doc_id: int, num_shards: int) -> int:
+    """Shard that owns a document id; round-robin keeps shards evenly filled as the corpus grows"""
+    return doc_id % num_shards
+
+
+def shard_paths(index_file: str, num_shards: int) -> List[str]:
+    """Per-shard index files persisted next to the main index"""
+    base = os.path.splitext(index_file)[0]
+    return [f"{base}.shard{i}-of-{num_shards}.index" for i in range(num_shards)]
+
+
+class LocalShard:
+    """One partition of the vectors, searched in this process.
+
+    Vectors are stored under their global document ids, so hits from every
+    shard can be merged without translating ids. It also stands in for a
+    remote node in tests and single-process deployments.
+    """
+
+    def __init__(self, dim: int, name: str = "shard", index_file: Optional[str] = None):
+        self.name = name
+        if index_file and os.path.exists(index_file):
+            self.index = faiss.read_index(index_file)
+        else:
+            self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+
+    def add(self, ids: np.ndarray, vectors: np.ndarray):
+        self.index.add_with_ids(vectors, ids.astype("int64"))
+
+    def remove(self, ids: np.ndarray):
+        self.index.remove_ids(ids.astype("int64"))
+
+    def search(self, arr: np.ndarray, k: int, timeout: Optional[float] = None):
+        return self.index.search(arr, min(k, max(self.index.ntotal, 1)))
+
+    def reconstruct(self, doc_id: int) -> np.ndarray:
+        return self.index.reconstruct(int(doc_id))
+
+    def save(self, path: str):
+        faiss.write_index(self.index, path)
+
+    def size(self) -> int:
+        return self.index.ntotal
+
+    def close(self):
+        pass
+
+
+def _serve_shard(conn, dim: int, name: str, index_file: Optional[str]):
+    """Worker process loop: apply (request_id, method, args) calls to a LocalShard"""
+    # One thread per worker; the parallelism comes from running shards side by side
+    faiss.omp_set_num_threads(1)
+    shard = LocalShard(dim, name=name, index_file=index_file)
+    while True:
+        try:
+            request_id, method, args = conn.recv()
+        except (EOFError, OSError):
+            break
+        if method == "close":
+            break
+        try:
+            conn.send((request_id, True, getattr(shard, method)(*args)))
+        except Exception as e:
+            conn.send((request_id, False, f"{type(e).__name__}: {e}"))
+
+
+class ProcessShard:
+    """A shard served by its own worker process over a pipe.
+
+    Calls are tagged with a request id so a reply that arrives after its
+    caller timed out is discarded instead of being read as the answer to
+    the next call.
+    """
+
+    def __init__(self, dim: int, name: str = "shard", index_file: Optional[str] = None):
+        self.name = name
+        context = multiprocessing.get_context("spawn")
+        self._conn, child = context.Pipe()
+        self._process = context.Process(target=_serve_shard, args=(child, dim, name, index_file),
+                                        name=f"faiss-{name}", daemon=True)
+        self._process.start()
+        child.close()
+        self._lock = threading.Lock()
+        self._request_id = 0
+
+    def _call(self, method: str, *args, timeout: Optional[float] = None):
+        if not self._lock.acquire(timeout=-1 if timeout is None else timeout):
+            raise TimeoutError(f"{self.name} busy")
+        try:
+            self._request_id += 1
+            request_id = self._request_id
+            self._conn.send((request_id, method, args))
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while True:
+                if deadline is not None and not self._conn.poll(max(0.0, deadline - time.monotonic())):
+                    raise TimeoutError(f"{self.name} did not answer within {timeout:.3f}s")
+                reply_id, ok, value = self._conn.recv()
+                if reply_id != request_id:
+                    continue  # Late reply to a call that already timed out
+                if not ok:
+                    raise RuntimeError(f"{self.name}: {value}")
+                return value
+        finally:
+            self._lock.release()
+
+    def add(self, ids: np.ndarray, vectors: np.ndarray):
+        self._call("add", ids, vectors)
+
+    def remove(self, ids: np.ndarray):
+        self._call("remove", ids)
+
+    def search(self, arr: np.ndarray, k: int, timeout: Optional[float] = None):
+        return self._call("search", arr, k, timeout=timeout)
+
+    def reconstruct(self, doc_id: int) -> np.ndarray:
+        return self._call("reconstruct", doc_id)
+
+    def save(self, path: str):
+        self._call("save", path)
+
+    def size(self) -> int:
+        return self._call("size")
+
+    def close(self):
+        try:
+            with self._lock:
+                self._conn.send((0, "close", ()))
+        except (OSError, BrokenPipeError):
+            pass
+        self._process.join(timeout=2)
+
+
+class ShardRouter:
+    """Scatter-gather search over N shards with per-shard timeouts.
+
+    Documents are assigned with `shard_for`. A query is sent to every shard
+    in parallel and the per-shard top-k lists are merged. Shards that fail
+    or miss the timeout are left out and the best available results are
+    returned; only a query on which every shard fails raises.
+    """
+
+    def __init__(self, shards: List, timeout: float = 0.5):
+        self.shards = shards
+        self.timeout = timeout
+        self.counts = [shard.size() for shard in shards]
+        self._pool = ThreadPoolExecutor(max_workers=len(shards), thread_name_prefix="shard-search")
+        self._stats = [
+            {'name': shard.name, 'searches': 0, 'timeouts': 0, 'failures': 0, 'total_ms': 0.0}
+            for shard in shards
+        ]
+        self.partial_results = 0
+
+    @classmethod
+    def open(cls, dim: int, num_shards: int, index_file: str, processes: bool = True,
+             timeout: float = 0.5) -> "ShardRouter":
+        """Start the shards, loading their persisted files or partitioning an existing flat index"""
+        paths = shard_paths(index_file, num_shards)
+        have_shards = all(os.path.exists(path) for path in paths)
+        shard_class = ProcessShard if processes else LocalShard
+        shards = [
+            shard_class(dim, name=f"shard-{i}", index_file=paths[i] if have_shards else None)
+            for i in range(num_shards)
+        ]
+        router = cls(shards, timeout=timeout)
+
+        if not have_shards and os.path.exists(index_file):
+            flat = faiss.read_index(index_file)
+            if flat.ntotal:
+                print(f"Partitioning {flat.ntotal} vectors from {index_file} into {num_shards} shards")
+                router.add(np.arange(flat.ntotal), flat.reconstruct_n(0, flat.ntotal))
+        print(f"Started {num_shards} {'process' if processes else 'local'} shards with {router.ntotal} vectors")
+        return router
+
+    @property
+    def ntotal(self) -> int:
+        return sum(self.counts)
+
+    def add(self, ids: np.ndarray, vectors: np.ndarray):
+        """Route vectors to their shards; on failure, roll back the shards that already took them"""
+        owners = ids % len(self.shards)
+        done = []
+        try:
+            for i, shard in enumerate(self.shards):
+                mask = owners == i
+                if mask.any():
+                    shard.add(ids[mask], np.ascontiguousarray(vectors[mask]))
+                    done.append((i, ids[mask]))
+        except Exception:
+            for i, shard_ids in done:
+                try:
+                    self.shards[i].remove(shard_ids)
+                except Exception as e:
+                    print(f"Could not roll back {self.shards[i].name}: {e}")
+            raise
+        for i, shard_ids in done:
+            self.counts[i] += len(shard_ids)
+
+    def _search_shard(self, i: int, arr: np.ndarray, k: int):
+        start = time.perf_counter()
+        result = self.shards[i].search(arr, k, timeout=self.timeout)
+        self._stats[i]['total_ms'] += (time.perf_counter() - start) * 1000
+        return result
+
+    def search(self, arr: np.ndarray, k: int):
+        """Fan the query out to every shard and merge the per-shard top-k into (scores, ids)"""
+        futures = {
+            self._pool.submit(self._search_shard, i, arr, k): i
+            for i in range(len(self.shards)) if self.counts[i]
+        }
+        finished, pending = wait(futures, timeout=self.timeout)
+
+        all_scores, all_ids, failed = [], [], []
+        for future, i in futures.items():
+            self._stats[i]['searches'] += 1
+            if future in pending:
+                self._stats[i]['timeouts'] += 1
+                failed.append(self.shards[i].name)
+                continue
+            try:
+                scores, ids = future.result()
+            except TimeoutError:
+                self._stats[i]['timeouts'] += 1
+                failed.append(self.shards[i].name)
+                continue
+            except Exception as e:
+                self._stats[i]['failures'] += 1
+                failed.append(self.shards[i].name)
+                print(f"Shard {self.shards[i].name} failed: {e}")
+                continue
+            all_scores.append(scores)
+            all_ids.append(ids)
+
+        if failed:
+            if not all_scores:
+                raise RuntimeError(f"All shards failed: {', '.join(failed)}")
+            self.partial_results += 1
+            print(f"Returning partial results without {', '.join(failed)}")
+        if not all_scores:
+            return np.full((len(arr), k), -np.inf, dtype="float32"), np.full((len(arr), k), -1, dtype="int64")
+
+        scores = np.hstack(all_scores)
+        ids = np.hstack(all_ids)
+        order = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+        return np.take_along_axis(scores, order, axis=1), np.take_along_axis(ids, order, axis=1)
+
+    def reconstruct(self, doc_id: int) -> np.ndarray:
+        return self.shards[shard_for(doc_id, len(self.shards))].reconstruct(doc_id)
+
+    def save(self, index_file: str):
+        for shard, path in zip(self.shards, shard_paths(index_file, len(self.shards))):
+            shard.save(path)
+
+    def view(self) -> "ShardedView":
+        return ShardedView(self, self.ntotal)
+
+    def close(self):
+        for shard in self.shards:
+            shard.close()
+        self._pool.shutdown(wait=False)
+
+    def get_stats(self):
+        """Get per-shard statistics"""
+        return {
+            'shards': [
+                {
+                    'name': stats['name'],
+                    'vectors': count,
+                    'searches': stats['searches'],
+                    'timeouts': stats['timeouts'],
+                    'failures': stats['failures'],
+                    'avg_ms': round(stats['total_ms'] / stats['searches'], 3) if stats['searches'] else 0.0
+                }
+                for stats, count in zip(self._stats, self.counts)
+            ],
+            'timeout_ms': self.timeout * 1000,
+            'partial_results': self.partial_results
+        }
+
+
+class ShardedView:
+    """Index-like view of the shards as of one snapshot.
+
+    Shards are append-only, so a view hides ids added after it was taken by
+    filtering them out of the merged results. This gives sharded stores
+    the same snapshot semantics as a cloned flat index.
+    """
+
+    def __init__(self, router: ShardRouter, ntotal: int):
+        self.router = router
+        self.ntotal = ntotal
+
+    def search(self, arr: np.ndarray, k: int):
+        # Ask for enough extra hits to make up for any that are newer than this view
+        newer = self.router.ntotal - self.ntotal
+        scores, ids = self.router.search(arr, k + newer)
+        if newer:
+            hidden = ids >= self.ntotal
+            scores = np.where(hidden, -np.inf, scores)
+            ids = np.where(hidden, -1, ids)
+            order = np.argsort(-scores, axis=1, kind="stable")
+            scores, ids = np.take_along_axis(scores, order, axis=1), np.take_along_axis(ids, order, axis=1)
+        return scores[:, :k], ids[:, :k]
+
+    def reconstruct(self, doc_id: int) -> np.ndarray:
+        if doc_id >= self.ntotal:
+            raise RuntimeError(f"id {doc_id} is not in this snapshot")
+        try:
+            return self.router.reconstruct(doc_id)
+        except Exception as e:
+            raise RuntimeError(str(e))
+
+    def reconstruct_n(self, start: int, n: int) -> np.ndarray:
+        return np.vstack([self.reconstruct(doc_id) for doc_id in range(start, start + n)])
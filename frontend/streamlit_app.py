@@ -1,10 +1,20 @@
 import streamlit as st
 import requests
 import os
+import json
 import time
+import uuid
+import threading
+
+try:
+    import websocket  # websocket-client; without it every turn goes over HTTP
+except ImportError:
+    websocket = None
 
 # Configuration
 API_URL = os.environ.get("API_URL", "http://localhost:8000/api")
+# http:// becomes ws:// and https:// becomes wss://
+CHAT_WS_URL = os.environ.get("CHAT_WS_URL", API_URL.replace("http", "ws", 1) + "/chat/ws")
 
 # Page configuration
 st.set_page_config(
@@ -16,6 +26,90 @@ st.set_page_config(
 # Initialize session state
 if "messages" not in st.session_state:
     st.session_state.messages = []
+if "session_id" not in st.session_state:
+    # Lets the backend keep conversation memory for follow-up questions
+    st.session_state.session_id = str(uuid.uuid4())
+
+if "chat_lock" not in st.session_state:
+    # A rerun can start while the previous run is still reading the chat socket
+    st.session_state.chat_lock = threading.Lock()
+
+def busy_message(retry_after) -> str:
+    # Backend is shedding load; tell the user when to try again
+    return f"We're getting a lot of questions right now. Please try again in {retry_after} seconds."
+
+def chat_socket():
+    """The session's persistent chat WebSocket, or None if it cannot be opened"""
+    if websocket is None:
+        return None
+    ws = st.session_state.get("chat_socket")
+    if ws is None or not ws.connected:
+        try:
+            ws = websocket.create_connection(CHAT_WS_URL, timeout=30)
+        except (websocket.WebSocketException, OSError):
+            return None
+        st.session_state.chat_socket = ws
+    return ws
+
+def ask_over_socket(ws, prompt: str, placeholder) -> str:
+    """Stream one answer over the chat socket; asking again cancels an unfinished answer.
+
+    If the socket drops mid-turn, the question is asked once more over HTTP.
+    """
+    turn_id = str(uuid.uuid4())
+    try:
+        # Sent before taking the read lock: the backend cancels the interrupted answer,
+        # whose "cancelled" frame releases the run still reading it
+        ws.send(json.dumps({
+            "type": "question", "id": turn_id, "question": prompt, "session_id": st.session_state.session_id
+        }))
+        text = ""
+        with st.session_state.chat_lock:
+            while True:
+                frame = json.loads(ws.recv())
+                if frame.get("id") != turn_id:
+                    continue  # Left over from an answer that was interrupted
+                if frame["type"] == "token":
+                    text += frame["text"]
+                    placeholder.markdown(text + "▌")
+                elif frame["type"] == "done":
+                    return frame["answer"]
+                elif frame["type"] == "cancelled":
+                    return text
+                elif frame["type"] == "error":
+                    if frame["status"] == 503:
+                        return busy_message(frame.get("retry_after", "a few"))
+                    return f"Error: {frame['status']} - {frame['detail']}"
+    except (websocket.WebSocketException, OSError, ValueError):
+        st.session_state.chat_socket = None
+        ws.close()
+    # The next question reconnects; this one falls back to POST /api/query
+    placeholder.markdown("▌")
+    return ask_over_http(prompt, placeholder)
+
+def ask_over_http(prompt: str, placeholder) -> str:
+    # Only the answer is shown, so skip sources and the duplicate raw_generation
+    response = requests.post(
+        f"{API_URL}/query",
+        params={"fields": "answer"},
+        json={"question": prompt, "session_id": st.session_state.session_id},
+        timeout=30
+    )
+    
+    if response.status_code == 200:
+        full_response = response.json()["answer"]
+        
+        # Simulate typing effect
+        words = full_response.split()
+        for i, word in enumerate(words):
+            current_text = " ".join(words[:i+1])
+            placeholder.markdown(current_text + "▌")
+            time.sleep(0.05)
+        return full_response
+    elif response.status_code == 503:
+        return busy_message(response.headers.get("Retry-After", "a few"))
+    else:
+        return f"Error: {response.status_code} - {response.text}"
 
 # Header
 st.title("🏢 Mi Lifestyle FAQ Assistant")
@@ -27,6 +121,7 @@ if len(st.session_state.messages) > 0:
     with col2:
         if st.button("Clear Chat", type="secondary"):
             st.session_state.messages = []
+            st.session_state.session_id = str(uuid.uuid4())
             st.rerun()
 
 st.markdown("---")
@@ -61,29 +156,15 @@ if prompt := st.chat_input("Ask about Mi Lifestyle products, services, or polici
         full_response = ""
         
         try:
-            # Send request to backend
-            response = requests.post(
-                f"{API_URL}/query",
-                json={"question": prompt},
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                full_response = data["answer"]
-                
-                # Simulate typing effect
-                words = full_response.split()
-                for i, word in enumerate(words):
-                    current_text = " ".join(words[:i+1])
-                    message_placeholder.markdown(current_text + "▌")
-                    time.sleep(0.05)
-                
-                # Display final response
-                message_placeholder.markdown(full_response)
+            # Stream over the persistent WebSocket when the backend offers it, else one HTTP request per turn
+            ws = chat_socket()
+            if ws is not None:
+                full_response = ask_over_socket(ws, prompt, message_placeholder)
             else:
-                full_response = f"Error: {response.status_code} - {response.text}"
-                message_placeholder.markdown(full_response)
+                full_response = ask_over_http(prompt, message_placeholder)
+            
+            # Display final response
+            message_placeholder.markdown(full_response)
                 
         except Exception as e:
             full_response = f"Error: {str(e)}"
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark CPU time per 1,000 embeddings for the float JSON and base64 response formats
+"""
+import sys
+import json
+import time
+import base64
+sys.path.append('.')
+sys.path.append('backend')
+
+import numpy as np
+from openai._models import construct_type
+from openai.types import CreateEmbeddingResponse
+
+from backend.app.embeddings_provider import _decode_embeddings
+
+COUNT = 1000
+DIM = 1536
+REPEATS = 3
+
+def make_payloads(vectors: np.ndarray):
+    """Build the response bodies the embeddings API returns for both encodings"""
+    def body(embeddings):
+        return json.dumps({
+            "object": "list",
+            "model": "text-embedding-3-small",
+            "data": [{"object": "embedding", "index": i, "embedding": e} for i, e in enumerate(embeddings)],
+            "usage": {"prompt_tokens": 0, "total_tokens": 0}
+        })
+    as_float = body([[float(x) for x in row] for row in vectors])
+    as_base64 = body([base64.b64encode(row.astype("<f4").tobytes()).decode() for row in vectors])
+    return as_float, as_base64
+
+def parse(payload: str) -> CreateEmbeddingResponse:
+    """Build the response model the way the SDK does (no per-field validation)"""
+    return construct_type(type_=CreateEmbeddingResponse, value=json.loads(payload))
+
+def float_path(payload: str) -> np.ndarray:
+    """Previous path: parse floats, list of lists, then np.array(...).astype("float32")"""
+    response = parse(payload)
+    embeddings = [item.embedding for item in response.data]
+    return np.array(embeddings).astype("float32")
+
+def base64_path(payload: str) -> np.ndarray:
+    """Current path: decode base64 with np.frombuffer into a preallocated float32 matrix"""
+    response = parse(payload)
+    out = np.empty((len(response.data), DIM), dtype=np.float32)
+    _decode_embeddings(response, out, 0)
+    return out
+
+def cpu_time(fn, payload: str) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.process_time()
+        fn(payload)
+        best = min(best, time.process_time() - start)
+    return best
+
+def run_benchmark():
+    print(f"=== Embedding Decode Benchmark ({COUNT} x {DIM}) ===\n")
+
+    vectors = np.random.default_rng(0).standard_normal((COUNT, DIM)).astype("float32")
+    as_float, as_base64 = make_payloads(vectors)
+    assert np.array_equal(float_path(as_float), base64_path(as_base64))
+
+    float_cpu = cpu_time(float_path, as_float)
+    base64_cpu = cpu_time(base64_path, as_base64)
+
+    print(f"📦 Response size: float {len(as_float) / 1e6:.1f} MB, base64 {len(as_base64) / 1e6:.1f} MB")
+    print(f"⏱️  float JSON:   {float_cpu * 1000:.1f} ms CPU per {COUNT} embeddings")
+    print(f"⏱️  base64:       {base64_cpu * 1000:.1f} ms CPU per {COUNT} embeddings")
+    print(f"🚀 Speedup: {float_cpu / base64_cpu:.1f}x")
+
+if __name__ == "__main__":
+    run_benchmark()
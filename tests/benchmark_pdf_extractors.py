@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Benchmark PDF extraction backends: pages per second and text yield on the sample PDFs
+
+Each installed backend extracts every PDF (inline, without the extraction
+cache or page timeouts); the best of REPEATS runs is reported.
+"""
+import sys
+import glob
+import time
+import argparse
+sys.path.append('.')
+sys.path.append('backend')
+
+from backend.app.pdf_extractors import EXTRACTORS, available_extractors, extract
+
+REPEATS = 3
+
+def measure(path: str, backend: str, repeats: int):
+    best, extraction = float("inf"), None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        extraction = extract(path, backend, page_timeout=None)
+        best = min(best, time.perf_counter() - start)
+    return best, extraction
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pdfs", nargs="*", help="PDFs to extract (default: backend/data/*.pdf and data/*.pdf)")
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    args = parser.parse_args()
+    pdfs = args.pdfs or sorted(glob.glob("backend/data/*.pdf") + glob.glob("data/*.pdf"))
+    backends = available_extractors()
+    missing = [name for name in EXTRACTORS if name not in backends]
+
+    print(f"=== PDF Extraction Benchmark ({len(pdfs)} PDFs, best of {args.repeats}) ===\n")
+    if missing:
+        print(f"Not installed, skipped: {', '.join(missing)}\n")
+    print(f"{'pdf':<28}{'backend':<10}{'pages':>6}{'pages/s':>10}{'chars':>9}{'empty':>7}")
+    totals = {name: [0, 0.0, 0, 0] for name in backends}
+    for path in pdfs:
+        for backend in backends:
+            seconds, extraction = measure(path, backend, args.repeats)
+            chars = sum(len(page.strip()) for page in extraction.pages)
+            empty = sum(1 for page in extraction.pages if not page.strip())
+            total = totals[backend]
+            total[0] += len(extraction.pages)
+            total[1] += seconds
+            total[2] += chars
+            total[3] += empty
+            print(f"{path.split('/')[-1][:27]:<28}{backend:<10}{len(extraction.pages):>6}"
+                  f"{len(extraction.pages) / seconds:>10.1f}{chars:>9}{empty:>7}")
+
+    print(f"\n{'total':<28}{'backend':<10}{'pages':>6}{'pages/s':>10}{'chars':>9}{'empty':>7}")
+    for backend, (pages, seconds, chars, empty) in totals.items():
+        print(f"{'':<28}{backend:<10}{pages:>6}{pages / seconds:>10.1f}{chars:>9}{empty:>7}")
+
+if __name__ == "__main__":
+    main()
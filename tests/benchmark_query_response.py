@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark CPU time and bytes per /api/query response: full QueryResponse vs lean (fast JSON, optional gzip)
+
+The real route is called in-process through ASGI with retrieval and generation
+stubbed out, so only routing, validation and serialization are measured.
+"""
+import sys
+import json
+import time
+import asyncio
+sys.path.append('.')
+sys.path.append('backend')
+
+from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
+
+from backend.app import api as api_module
+from backend.app import fast_json
+
+REQUESTS = 2000
+REPEATS = 3
+
+ANSWER = ("**Becoming a Mi Lifestyle distributor** comes with great benefits! • **Retail margin** on every "
+          "product you sell • **Performance bonus** based on your monthly business volume • **Leadership "
+          "rewards** as your team grows • Flexible hours and full training support. ") * 4
+SOURCES = [{"source": f"milifestyle_{i}.pdf", "score": 0.8 - i / 10, "chunk_id": 10 + i} for i in range(3)]
+
+async def fake_run_query(request, deadline, on_token=None):
+    return ANSWER, SOURCES, ANSWER
+
+def make_app(gzip: bool) -> FastAPI:
+    app = FastAPI()
+    if gzip:
+        app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+    app.include_router(api_module.router, prefix="/api")
+    return app
+
+async def call(app, query_string: bytes, body: bytes):
+    """One POST /api/query through the ASGI app; returns (body bytes, headers)"""
+    sent = []
+    received = False
+
+    async def receive():
+        nonlocal received
+        if received:
+            return {"type": "http.disconnect"}
+        received = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST", "scheme": "http",
+        "path": "/api/query", "raw_path": b"/api/query", "root_path": "", "query_string": query_string,
+        "headers": [(b"content-type", b"application/json"), (b"accept-encoding", b"gzip"),
+                    (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 1234), "server": ("127.0.0.1", 8000)
+    }
+    await app(scope, receive, send)
+    return b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body"), \
+        dict(sent[0]["headers"])
+
+def measure(app, query_string: bytes):
+    body = json.dumps({"question": "What are the benefits of becoming a distributor?"}).encode()
+
+    async def run():
+        payload, headers = await call(app, query_string, body)
+        best = float("inf")
+        for _ in range(REPEATS):
+            start = time.process_time()
+            for _ in range(REQUESTS):
+                await call(app, query_string, body)
+            best = min(best, time.process_time() - start)
+        return best / REQUESTS * 1e6, len(payload), headers
+
+    return asyncio.run(run())
+
+def main():
+    api_module.run_query = fake_run_query
+    api_module.readiness.step("ready")
+    plain, gzipped = make_app(gzip=False), make_app(gzip=True)
+
+    print(f"Encoder: {'orjson' if fast_json.orjson is not None else 'json (orjson not installed)'}, "
+          f"best of {REPEATS} x {REQUESTS} requests per case\n")
+    print(f"{'response':<32}{'CPU us/resp':>12}{'bytes':>8}")
+    cases = [
+        ("full QueryResponse", plain, b""),
+        ("lean=true", plain, b"lean=true"),
+        ("fields=answer", plain, b"fields=answer"),
+        ("full QueryResponse + gzip", gzipped, b""),
+        ("lean=true + gzip", gzipped, b"lean=true"),
+    ]
+    for name, app, query_string in cases:
+        cpu, size, headers = measure(app, query_string)
+        encoding = headers.get(b"content-encoding", b"").decode()
+        print(f"{name:<32}{cpu:>12.1f}{size:>8}  {encoding}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Shared test fixtures: fake embeddings in place of the OpenAI API
+"""
+import sys
+import time
+import hashlib
+sys.path.append('backend')
+
+import numpy as np
+import pytest
+
+from backend.app import faiss_store as faiss_store_module
+from backend.app import faq_precompute
+from backend.app import index_bundle as index_bundle_module
+
+class FakeEmbeddings:
+    """Deterministic embeddings with a call counter.
+
+    kind "hash": a pseudo-random vector per (lower-cased) text, identical texts match.
+    kind "one_hot": text "doc N" points along axis N.
+    kind "constant": every text gets the same vector.
+    delay makes each call slow, so writes overlap with reads.
+    """
+
+    def __init__(self, dim: int = 16, kind: str = "hash", delay: float = 0.0):
+        self.dim = dim
+        self.kind = kind
+        self.delay = delay
+        self.calls = 0
+
+    def vector(self, text: str) -> np.ndarray:
+        if self.kind == "one_hot":
+            vector = np.full(self.dim, 0.01, dtype="float32")
+            vector[int(text.split()[-1]) % self.dim] = 1.0
+            return vector
+        if self.kind == "constant":
+            return np.ones(self.dim, dtype="float32")
+        seed = int(hashlib.md5(text.lower().encode()).hexdigest()[:8], 16)
+        return np.random.default_rng(seed).standard_normal(self.dim).astype("float32")
+
+    def __call__(self, texts, model=None):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        return np.stack([self.vector(text) for text in texts]) if texts else np.empty((0, self.dim), "float32")
+
+def patch_embeddings(monkeypatch, **options) -> FakeEmbeddings:
+    """Route every module that embeds through one FakeEmbeddings; undone when monkeypatch is"""
+    fake = FakeEmbeddings(**options)
+    for module in (faiss_store_module, faq_precompute, index_bundle_module):
+        monkeypatch.setattr(module, "get_embeddings", fake)
+    return fake
+
+@pytest.fixture
+def fake_embeddings(monkeypatch):
+    """FakeEmbeddings patched in for one test; set .dim, .kind or .delay before the first call"""
+    return patch_embeddings(monkeypatch)
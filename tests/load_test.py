@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Open-loop asyncio load generator for /api/query and /api/ingest.
+
+Requests arrive as Poisson processes at the given rates whether or not earlier
+ones have finished, so queueing delay shows up in the latencies instead of
+being hidden by a closed loop. Pair it with tests/mock_openai_server.py:
+
+    python tests/mock_openai_server.py --port 9100 --latency-ms 300 --error-rate 0.02 &
+    (cd backend && OPENAI_BASE_URL=http://localhost:9100/v1 OPENAI_API_KEY=mock uvicorn app.main:app --port 8000) &
+    python tests/load_test.py --url http://localhost:8000 --query-rate 20 --ingest-rate 0.2 --duration 60
+
+A questions file has one "weight|question" per line (weight optional).
+"""
+import sys
+import json
+import math
+import time
+import uuid
+import random
+import asyncio
+import argparse
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+QUESTIONS = [
+    (5, "How do I contact Mi Lifestyle customer care?"),
+    (3, "What are the benefits of becoming a distributor?"),
+    (3, "How is the performance bonus calculated?"),
+    (2, "What is the return policy for products?"),
+    (1, "Where is the registered office located?"),
+    (1, "Tell me about the wellness product range and how to order it online"),
+]
+
+LOREM = ("distributor bonus retail margin product wellness order delivery customer care office "
+         "registration kit volume monthly payout team leader training nutrition personal care").split()
+
+class HttpClient:
+    """Tiny keep-alive HTTP/1.1 client on asyncio streams (no third-party dependencies)"""
+
+    def __init__(self, url: str, timeout: float = 30.0):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self._idle: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+
+    async def request(self, method: str, path: str, body: bytes = b"",
+                      content_type: str = "application/json") -> Tuple[int, bytes]:
+        return await asyncio.wait_for(self._request(method, path, body, content_type), self.timeout)
+
+    async def _request(self, method, path, body, content_type):
+        if self._idle:
+            reader, writer = self._idle.pop()
+        else:
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            head = (f"{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+                    f"Content-Type: {content_type}\r\nContent-Length: {len(body)}\r\n\r\n")
+            writer.write(head.encode("latin-1") + body)
+            await writer.drain()
+
+            status_line = await reader.readline()
+            if not status_line:
+                raise ConnectionError("connection closed by server")
+            status = int(status_line.split()[1])
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            if headers.get("transfer-encoding", "").lower() == "chunked":
+                chunks = []
+                while True:
+                    size = int((await reader.readline()).split(b";")[0], 16)
+                    if size == 0:
+                        await reader.readline()
+                        break
+                    chunks.append(await reader.readexactly(size))
+                    await reader.readline()
+                payload = b"".join(chunks)
+            else:
+                payload = await reader.readexactly(int(headers.get("content-length", 0)))
+        except BaseException:
+            writer.close()
+            raise
+
+        if headers.get("connection", "").lower() == "close":
+            writer.close()
+        else:
+            self._idle.append((reader, writer))
+        return status, payload
+
+    def close(self):
+        for _, writer in self._idle:
+            writer.close()
+        self._idle.clear()
+
+def make_pdf(pages: int, words_per_page: int = 300, seed: int = 0) -> bytes:
+    """Minimal valid PDF with extractable text, for upload-size sweeps"""
+    rng = random.Random(seed)
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for _ in range(pages):
+        lines = []
+        words = [rng.choice(LOREM) for _ in range(words_per_page)]
+        for i in range(0, len(words), 12):
+            lines.append("(" + " ".join(words[i:i + 12]) + ") Tj T*")
+        stream = "BT /F1 10 Tf 12 TL 40 800 Td " + " ".join(lines) + " ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+def multipart(field: str, filename: str, data: bytes, content_type: str = "application/pdf") -> Tuple[bytes, str]:
+    boundary = uuid.uuid4().hex
+    body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"{field}\"; filename=\"{filename}\"\r\n"
+            f"Content-Type: {content_type}\r\n\r\n").encode() + data + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+def load_questions(path: Optional[str]) -> List[Tuple[float, str]]:
+    if not path:
+        return QUESTIONS
+    questions = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            weight, sep, question = line.partition("|")
+            questions.append((float(weight), question.strip()) if sep else (1.0, line))
+    return questions
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # Nearest rank: the smallest value with at least p% of the samples at or below it
+    rank = min(len(sorted_values) - 1, max(0, math.ceil(p / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+def summarize(results: Dict[str, List[Tuple[float, str]]], elapsed: float) -> dict:
+    """Per-endpoint throughput, latency percentiles (ms, successful requests) and error breakdown"""
+    report = {}
+    for endpoint, samples in sorted(results.items()):
+        latencies = sorted(latency for latency, outcome in samples if outcome == "ok")
+        errors = Counter(outcome for _, outcome in samples if outcome != "ok")
+        report[endpoint] = {
+            "requests": len(samples),
+            "ok": len(latencies),
+            "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+            "latency_ms": {name: round(percentile(latencies, p) * 1000, 1)
+                           for name, p in (("p50", 50), ("p90", 90), ("p95", 95), ("p99", 99), ("max", 100))},
+            "errors": dict(errors.most_common())
+        }
+    return report
+
+async def run_load(url: str, duration: float, query_rate: float, ingest_rate: float = 0.0,
+                   questions: List[Tuple[float, str]] = QUESTIONS, upload_pages: List[int] = (2,),
+                   top_k: int = 5, mode: str = "generative", max_in_flight: int = 256,
+                   timeout: float = 30.0, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    client = HttpClient(url, timeout=timeout)
+    results: Dict[str, List[Tuple[float, str]]] = defaultdict(list)
+    in_flight = asyncio.Semaphore(max_in_flight)
+    tasks = set()
+    weights = [weight for weight, _ in questions]
+    pdfs = {pages: make_pdf(pages, seed=pages) for pages in upload_pages}
+
+    async def timed(endpoint: str, method: str, path: str, body: bytes, content_type: str = "application/json"):
+        started = time.perf_counter()
+        try:
+            status, _ = await client.request(method, path, body, content_type)
+            outcome = "ok" if status < 400 else f"HTTP {status}"
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+        except Exception as e:
+            outcome = type(e).__name__
+        finally:
+            in_flight.release()
+        results[endpoint].append((time.perf_counter() - started, outcome))
+
+    def query():
+        question = rng.choices(questions, weights=weights)[0][1]
+        body = json.dumps({"question": question, "top_k": top_k, "mode": mode}).encode()
+        return timed("query", "POST", "/api/query", body)
+
+    def ingest():
+        pages = rng.choice(list(pdfs))
+        body, content_type = multipart("files", f"load-{pages}p-{uuid.uuid4().hex[:8]}.pdf", pdfs[pages])
+        return timed(f"ingest_{pages}p", "POST", "/api/ingest", body, content_type)
+
+    async def arrivals(rate: float, make_request):
+        if rate <= 0:
+            return
+        deadline = time.perf_counter() + duration
+        while True:
+            await asyncio.sleep(rng.expovariate(rate))
+            if time.perf_counter() >= deadline:
+                return
+            if in_flight.locked():
+                # The client is saturated; count the drop rather than silently slowing the arrival rate
+                results["client"].append((0.0, "dropped"))
+                continue
+            await in_flight.acquire()
+            task = asyncio.ensure_future(make_request())
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+    started = time.perf_counter()
+    await asyncio.gather(arrivals(query_rate, query), arrivals(ingest_rate, ingest))
+    if tasks:
+        await asyncio.wait(set(tasks))
+    elapsed = time.perf_counter() - started
+    client.close()
+    return summarize(results, elapsed)
+
+def print_report(report: dict):
+    print(f"{'endpoint':<14}{'reqs':>7}{'ok':>7}{'rps':>8}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}  errors")
+    for endpoint, row in report.items():
+        latency = row["latency_ms"]
+        errors = ", ".join(f"{name}: {count}" for name, count in row["errors"].items()) or "-"
+        print(f"{endpoint:<14}{row['requests']:>7}{row['ok']:>7}{row['throughput_rps']:>8}"
+              f"{latency['p50']:>9}{latency['p90']:>9}{latency['p99']:>9}{latency['max']:>9}  {errors}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive /api/query and /api/ingest with open-loop load")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to generate arrivals for")
+    parser.add_argument("--query-rate", type=float, default=10.0, help="Queries per second")
+    parser.add_argument("--ingest-rate", type=float, default=0.0, help="Uploads per second")
+    parser.add_argument("--questions", help="File of weight|question lines")
+    parser.add_argument("--upload-pages", type=int, nargs="+", default=[2], help="Page counts of uploaded PDFs")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--mode", choices=["generative", "extractive"], default="generative")
+    parser.add_argument("--max-in-flight", type=int, default=256)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    print(f"🚀 {args.query_rate} queries/s and {args.ingest_rate} uploads/s against {args.url} for {args.duration}s")
+    report = asyncio.run(run_load(
+        args.url, args.duration, args.query_rate, args.ingest_rate,
+        questions=load_questions(args.questions), upload_pages=args.upload_pages, top_k=args.top_k,
+        mode=args.mode, max_in_flight=args.max_in_flight, timeout=args.timeout, seed=args.seed
+    ))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+if __name__ == "__main__":
+    sys.exit(main())
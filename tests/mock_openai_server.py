@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenAI embeddings and chat-completions endpoints, for load testing.
+
+Latency, jitter, streaming speed and error rates are tunable, so one backend
+instance can be driven to saturation without spending API credits:
+
+    python tests/mock_openai_server.py --port 9100 --latency-ms 250 --jitter-ms 100 --error-rate 0.01
+    OPENAI_BASE_URL=http://localhost:9100/v1 OPENAI_API_KEY=mock uvicorn app.main:app   # from backend/
+"""
+import sys
+import json
+import time
+import uuid
+import base64
+import random
+import asyncio
+import hashlib
+import argparse
+from dataclasses import dataclass
+
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+ANSWER = ("Mi Lifestyle distributors earn a retail margin on every product they sell, plus performance "
+          "bonuses based on their monthly business volume. Customer care can help with any order questions.")
+
+@dataclass
+class MockConfig:
+    latency_ms: float = 200.0      # Mean time before the response (or first token) starts
+    jitter_ms: float = 50.0        # Standard deviation of that latency
+    token_ms: float = 15.0         # Delay between streamed tokens
+    error_rate: float = 0.0        # Fraction of requests answered with a 500
+    rate_limit_rate: float = 0.0   # Fraction of requests answered with a 429 + Retry-After
+    dim: int = 1536
+
+def create_app(config: MockConfig) -> FastAPI:
+    app = FastAPI(title="Mock OpenAI API")
+    app.state.config = config
+    app.state.counts = {"embeddings": 0, "chat": 0, "errors": 0, "rate_limited": 0}
+
+    async def delay():
+        await asyncio.sleep(max(0.0, random.gauss(config.latency_ms, config.jitter_ms)) / 1000.0)
+
+    def injected_error():
+        """Maybe return a 429 or 500 like the real API does under load"""
+        roll = random.random()
+        if roll < config.rate_limit_rate:
+            app.state.counts["rate_limited"] += 1
+            return JSONResponse(status_code=429, headers={"Retry-After": "1"},
+                                content={"error": {"message": "Rate limit reached (mock)", "type": "rate_limit"}})
+        if roll < config.rate_limit_rate + config.error_rate:
+            app.state.counts["errors"] += 1
+            return JSONResponse(status_code=500,
+                                content={"error": {"message": "Internal error (mock)", "type": "server_error"}})
+        return None
+
+    def embed(text: str) -> np.ndarray:
+        """Deterministic unit vector per text, so repeated questions embed identically"""
+        seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(config.dim).astype("<f4")
+        return vector / np.linalg.norm(vector)
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        app.state.counts["embeddings"] += 1
+        await delay()
+        error = injected_error()
+        if error is not None:
+            return error
+
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        as_base64 = body.get("encoding_format") == "base64"
+        data = []
+        for i, text in enumerate(inputs):
+            vector = embed(text)
+            data.append({
+                "object": "embedding",
+                "index": i,
+                "embedding": base64.b64encode(vector.tobytes()).decode() if as_base64 else vector.tolist()
+            })
+        tokens = sum(len(text) // 4 + 1 for text in inputs)
+        return {"object": "list", "model": body.get("model"), "data": data,
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens}}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.counts["chat"] += 1
+        await delay()
+        error = injected_error()
+        if error is not None:
+            return error
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        if not body.get("stream"):
+            return {
+                "id": completion_id, "object": "chat.completion", "created": created, "model": body.get("model"),
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": ANSWER}}],
+                "usage": {"prompt_tokens": 100, "completion_tokens": len(ANSWER.split()), "total_tokens": 100}
+            }
+
+        async def events():
+            for n, word in enumerate(ANSWER.split(" ")):
+                if n:
+                    await asyncio.sleep(config.token_ms / 1000.0)
+                chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                         "model": body.get("model"),
+                         "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}]}
+                yield f"data: {json.dumps(chunk)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/stats")
+    async def stats():
+        return app.state.counts
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenAI server with tunable latency and errors")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument("--token-ms", type=float, default=15.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--dim", type=int, default=1536)
+    args = parser.parse_args()
+
+    import uvicorn
+    config = MockConfig(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, token_ms=args.token_ms,
+                        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate, dim=args.dim)
+    print(f"🧪 Mock OpenAI API on http://{args.host}:{args.port}/v1 with {config}")
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,6 +8,7 @@ sys.path.append('backend')
 
 from backend.app.pdf_ingest import extract_text_from_pdf, chunk_text
 from backend.app.faiss_store import FaissStore
+from backend.app.extraction_cache import ExtractionCache
 import json
 
 def rebuild_comprehensive_index():
@@ -36,6 +37,8 @@ def rebuild_comprehensive_index():
     # Collect all chunks and metadata
     all_texts = []
     all_metadata = []
+    # Unchanged PDFs are not parsed again when re-chunking with different settings
+    extraction_cache = ExtractionCache("data/extraction_cache")
     
     for pdf_file in pdf_files:
         pdf_path = os.path.join(pdf_directory, pdf_file)
@@ -47,7 +50,7 @@ def rebuild_comprehensive_index():
         print(f"📄 Processing: {pdf_file}")
         
         # Extract text
-        text = extract_text_from_pdf(pdf_path)
+        text = extract_text_from_pdf(pdf_path, extraction_cache)
         print(f"   • Extracted: {len(text)} characters")
         
         # Clean text more thoroughly
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test admission control and load shedding of the query lane
+"""
+import sys
+import time
+import asyncio
+sys.path.append('backend')
+
+from backend.app.admission import AdmissionLane, Overloaded
+from backend.app.hedging import Deadline
+
+def test_queue_full_and_timeout():
+    """Requests beyond in-flight plus queue capacity are shed, and queue waits are bounded"""
+    print("=== Testing Admission Control ===\n")
+
+    async def scenario():
+        lane = AdmissionLane("query", max_in_flight=2, max_queue=2, queue_timeout=0.2)
+        outcomes = await asyncio.gather(
+            *[lane.run(time.sleep, 0.5) for _ in range(6)],
+            return_exceptions=True
+        )
+        return lane, outcomes
+
+    lane, outcomes = asyncio.run(scenario())
+    rejected = [o for o in outcomes if isinstance(o, Overloaded)]
+    stats = lane.get_stats()
+    print(f"📊 Lane stats: {stats}")
+
+    # 2 run, 2 queue and then time out, 2 are rejected straight away
+    assert stats['admitted'] == 2
+    assert stats['rejected_queue_full'] == 2
+    assert stats['rejected_timeout'] == 2
+    assert len(rejected) == 4 and all(o.retry_after >= 1 for o in rejected)
+    assert stats['in_flight'] == 0 and stats['queue_depth'] == 0
+
+def test_queued_requests_complete():
+    """Queued requests run once a slot frees up within the deadline"""
+    print("\n=== Testing Queued Requests ===\n")
+
+    async def scenario():
+        lane = AdmissionLane("ingest", max_in_flight=1, max_queue=3, queue_timeout=2.0)
+        return await asyncio.gather(*[lane.run(lambda i=i: (time.sleep(0.05), i)[1]) for i in range(4)])
+
+    assert sorted(asyncio.run(scenario())) == [0, 1, 2, 3]
+
+def test_queue_wait_bounded_by_deadline():
+    """A request does not spend more of its latency budget queued than it has left"""
+    async def scenario():
+        lane = AdmissionLane("query", max_in_flight=1, max_queue=2, queue_timeout=5.0)
+        busy = asyncio.ensure_future(lane.run(time.sleep, 0.5))
+        await asyncio.sleep(0.05)
+        started = time.monotonic()
+        try:
+            await lane.run(time.sleep, 0, queue_deadline=Deadline(0.1))
+            assert False, "expected Overloaded"
+        except Overloaded:
+            waited = time.monotonic() - started
+        await busy
+        return lane, waited
+
+    lane, waited = asyncio.run(scenario())
+    assert waited < 0.4 and lane.get_stats()['rejected_timeout'] == 1
+
+def test_ingest_yields_to_queued_queries():
+    """The ingest lane starts no new work while queries are waiting for a slot"""
+    async def scenario():
+        order = []
+        query_lane = AdmissionLane("query", max_in_flight=1, max_queue=2, queue_timeout=2.0)
+        ingest_lane = AdmissionLane("ingest", max_in_flight=1, max_queue=2, queue_timeout=2.0,
+                                    yields_to=query_lane)
+        running = asyncio.ensure_future(query_lane.run(lambda: (time.sleep(0.2), order.append("query 1"))))
+        await asyncio.sleep(0.05)
+        queued = asyncio.ensure_future(query_lane.run(lambda: order.append("query 2")))
+        await asyncio.sleep(0.05)
+        await ingest_lane.run(lambda: order.append("ingest"))
+        await asyncio.gather(running, queued)
+        return order
+
+    order = asyncio.run(scenario())
+    print(f"📋 Start order: {order}")
+    # Without yielding, the idle ingest lane would have run first
+    assert order[0] == "query 1" and sorted(order) == ["ingest", "query 1", "query 2"]
+
+if __name__ == "__main__":
+    print("Starting Admission Control Test...\n")
+    test_queue_full_and_timeout()
+    test_queued_requests_complete()
+    test_queue_wait_bounded_by_deadline()
+    test_ingest_yields_to_queued_queries()
+    print("\n=== Test Complete ===")
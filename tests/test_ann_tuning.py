@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Test ANN tuning: recall/latency sweep, persisted parameters and the store loading them (no OpenAI API needed)
+"""
+import sys
+import os
+import json
+import tempfile
+sys.path.append('backend')
+
+import numpy as np
+import faiss
+
+from backend.app.ann_tuning import tune, save_ann_params, load_ann_params, main
+from backend.app.faiss_store import FaissStore, read_index_info
+
+DIM = 32
+
+def clustered_vectors(count, seed=0):
+    """Normalized vectors around a few topics, like chunk embeddings"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((20, DIM)).astype("float32")
+    vectors = (centers[rng.integers(0, 20, count)] + 0.3 * rng.standard_normal((count, DIM))).astype("float32")
+    faiss.normalize_L2(vectors)
+    return vectors
+
+def make_store(tmp, vectors, ann_params_file=None):
+    store = FaissStore(dim=DIM, index_file=os.path.join(tmp, "faiss.index"), meta_file=os.path.join(tmp, "meta.json"),
+                       hybrid=False, model="test-model", ann_params_file=ann_params_file)
+    if vectors is not None:
+        store.add_vectors(vectors, [{"source": "a.pdf", "chunk_id": i, "text": f"chunk {i}"}
+                                    for i in range(len(vectors))])
+    return store
+
+def test_tune_picks_cheapest_setting_meeting_target():
+    """Every result is measured against exact search; the cheapest qualifying one wins"""
+    print("=== Testing ANN Tuning ===\n")
+
+    best, results = tune(clustered_vectors(3000), k=10, recall_floor=0.9, p99_ms=50.0, num_queries=100)
+    for r in results:
+        print(f"📈 {r['factory']:<12} {str(r['params']):<18} recall={r['recall']:.3f} mean={r['mean_ms']:.3f} ms")
+    factories = {r['factory'] for r in results}
+    assert {"Flat", "HNSW32"} <= factories and any(f.startswith("IVF") for f in factories)
+    assert next(r for r in results if r['factory'] == "Flat")['recall'] == 1.0
+    assert best['meets_target'] and best['recall'] >= 0.9
+    assert best['mean_ms'] == min(r['mean_ms'] for r in results if r['meets_target'])
+
+    # Recall grows with nprobe
+    ivf = [r['recall'] for r in results if r['factory'].startswith("IVF")]
+    assert ivf[-1] >= ivf[0]
+
+    # An unreachable budget chooses nothing
+    best, _ = tune(clustered_vectors(500), k=10, recall_floor=0.9, p99_ms=0.0, num_queries=20,
+                   grid=[("Flat", [{}])])
+    assert best is None
+
+def test_store_loads_tuned_index():
+    """The store rebuilds into the tuned structure once, then reads it back; a stale tuning falls back to flat"""
+    vectors = clustered_vectors(3000, seed=1)
+    with tempfile.TemporaryDirectory() as tmp:
+        make_store(tmp, vectors)
+        params_file = os.path.join(tmp, "ann_params.json")
+        save_ann_params(params_file, {"factory": "IVF32,Flat", "params": {"nprobe": 8}, "recall": 0.97},
+                        k=10, vectors=len(vectors), dim=DIM, model="test-model")
+
+        store = make_store(tmp, None, params_file)
+        assert store.factory == "IVF32,Flat" and faiss.extract_index_ivf(store.index).nprobe == 8
+        assert read_index_info(store.info_file)["factory"] == "IVF32,Flat"
+        results = store.query("", k=5, embedding=vectors[42:43])
+        assert results[0]["id"] == 42
+        assert np.allclose(store.index.reconstruct(42), vectors[42], atol=1e-6)
+        stats = store.get_stats()['ann']
+        print(f"📊 {stats}")
+        assert stats['params'] == {"nprobe": 8} and not stats['retune_suggested']
+
+        # Already converted: read back as is, search parameters re-applied
+        reloaded = make_store(tmp, None, params_file)
+        assert reloaded.factory == "IVF32,Flat" and faiss.extract_index_ivf(reloaded.index).nprobe == 8
+        reloaded.add_vectors(vectors[:10], [{"text": f"again {i}"} for i in range(10)])
+        assert reloaded.index.ntotal == 3010 and faiss.extract_index_ivf(reloaded.index).nprobe == 8
+
+        # Replicas loading a full snapshot keep the tuned structure
+        reloaded.replace(vectors, [{"text": f"chunk {i}"} for i in range(len(vectors))], persist=False)
+        assert reloaded.factory == "IVF32,Flat" and reloaded.query("", k=1, embedding=vectors[7:8])[0]["id"] == 7
+
+        # Tuned for another model: served exactly again
+        params = load_ann_params(params_file)
+        params["model"] = "other-model"
+        with open(params_file, "w") as f:
+            json.dump(params, f)
+        stale = make_store(tmp, None, params_file)
+        assert stale.factory == "Flat" and isinstance(stale.index, faiss.IndexFlatIP) and stale.ann_params is None
+        assert stale.get_stats()['ann'] is None
+
+def test_cli_writes_params():
+    """python -m app.ann_tuning samples the saved index and writes what the store loads"""
+    vectors = clustered_vectors(1500, seed=2)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = make_store(tmp, vectors)
+        out = os.path.join(tmp, "ann_params.json")
+        main(["--index", store.index_file, "--out", out, "--recall", "0.9", "--p99-ms", "50",
+              "--k", "10", "--queries", "50"])
+        params = load_ann_params(out)
+        assert params["model"] == "test-model" and params["dim"] == DIM and params["vectors"] == 1500
+        assert params["recall"] >= 0.9 and params["p99_ms"] <= 50
+        assert make_store(tmp, None, out).factory == params["factory"]
+
+        try:
+            main(["--index", store.index_file, "--out", out, "--recall", "1.01", "--k", "10",
+                  "--queries", "50"])
+            assert False, "expected exit status 1"
+        except SystemExit as e:
+            assert e.code == 1
+
+if __name__ == "__main__":
+    print("Starting ANN Tuning Test...\n")
+    test_tune_picks_cheapest_setting_meeting_target()
+    test_store_loads_tuned_index()
+    test_cli_writes_params()
+    print("\n=== Test Complete ===")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test the exact-match answer cache without needing OpenAI API
+"""
+import sys
+import time
+sys.path.append('backend')
+
+from backend.app.answer_cache import AnswerCache, LocalCacheBackend, normalize_question
+
+def test_normalized_hits():
+    """Trivially different spellings of a question share one entry"""
+    print("=== Testing Answer Cache Hits ===\n")
+
+    cache = AnswerCache(backend=LocalCacheBackend(max_entries=10), ttl=60)
+    sources = [{"source": "milifestyle.pdf", "score": 0.5, "chunk_id": 0}]
+    cache.set("What is Mi Lifestyle?", 5, 0, "A direct selling company", sources)
+
+    assert normalize_question("  what is   MI lifestyle ?? ") == "what is mi lifestyle"
+    assert cache.get("what is mi lifestyle", 5, 0) == ("A direct selling company", sources)
+    assert cache.get("what is mi lifestyle", 3, 0) is None  # top_k is part of the key
+
+    stats = cache.get_stats()
+    print(f"📊 Cache stats: {stats}")
+    assert stats['hits'] == 1 and stats['misses'] == 1
+
+def test_generation_invalidation():
+    """Entries stop matching once the index version changes; only a newer generation drops them"""
+    print("\n=== Testing Version Invalidation ===\n")
+
+    cache = AnswerCache(ttl=60)
+    cache.set("fee", 5, "v1", "old answer", [], generation=1)
+    assert cache.get("fee", 5, "v1", generation=1) == ("old answer", [])
+    assert cache.get("fee", 5, "v2", generation=2) is None
+    assert len(cache.backend) == 0
+
+    # A request that captured the older snapshot during an ingest neither clears nor sees the newer entries
+    cache.set("fee", 5, "v2", "new answer", [], generation=2)
+    cache.set("fee", 5, "v1", "old answer", [], generation=1)
+    assert cache.get("fee", 5, "v2", generation=2) == ("new answer", [])
+    assert len(cache.backend) == 2
+
+    # Instances sharing a backend may lag behind, so nothing is cleared eagerly there
+    class SharedBackend(LocalCacheBackend):
+        shared = True
+
+    shared = AnswerCache(backend=SharedBackend(), ttl=60)
+    shared.set("fee", 5, "v1", "old answer", [], generation=1)
+    assert shared.get("fee", 5, "v2", generation=2) is None
+    assert len(shared.backend) == 1
+
+def test_version_is_shared_across_processes():
+    """Stores with the same contents share a version, so shared-backend entries only match the same index"""
+    import os
+    import tempfile
+    import numpy as np
+    from backend.app.faiss_store import FaissStore
+
+    with tempfile.TemporaryDirectory() as tmp:
+        def store(name):
+            return FaissStore(dim=4, index_file=os.path.join(tmp, name, "faiss.index"),
+                              meta_file=os.path.join(tmp, name, "meta.json"), hybrid=False)
+
+        a, b = store("a"), store("b")
+        assert a.generation == b.generation == 0 and a.version == b.version
+        vectors = np.eye(4, dtype="float32")[:2]
+        a.add_vectors(vectors, [{"source": "a.pdf", "chunk_id": 0, "text": "fees"},
+                                {"source": "a.pdf", "chunk_id": 1, "text": "refunds"}])
+        b.add_vectors(vectors[:1], [{"source": "b.pdf", "chunk_id": 0, "text": "fees"}])
+        assert a.version != b.version and a.version != store("empty").version
+
+        # A restarted process reads the saved version back, and rebuilding it from the chunks agrees
+        restarted = store("a")
+        assert restarted.generation == 0 and restarted.version == a.version
+        os.remove(restarted.info_file)
+        assert store("a").version == a.version
+
+        cache = AnswerCache(ttl=60)
+        cache.set("fee", 5, a.version, "from a", [])
+        assert cache.get("fee", 5, restarted.version) == ("from a", [])
+        assert cache.get("fee", 5, b.version) is None
+
+def test_ttl_and_lru():
+    """Expired and least recently used entries are evicted"""
+    print("\n=== Testing TTL and LRU Eviction ===\n")
+
+    backend = LocalCacheBackend(max_entries=2)
+    backend.set("a", {"v": 1}, ttl=60)
+    backend.set("b", {"v": 2}, ttl=60)
+    backend.get("a")
+    backend.set("c", {"v": 3}, ttl=60)
+    assert backend.get("b") is None
+    assert backend.get("a") == {"v": 1}
+
+    backend.set("short", {"v": 4}, ttl=0.01)
+    time.sleep(0.02)
+    assert backend.get("short") is None
+
+if __name__ == "__main__":
+    print("Starting Answer Cache Test...\n")
+    test_normalized_hits()
+    test_generation_invalidation()
+    test_version_is_shared_across_processes()
+    test_ttl_and_lru()
+    print("\n=== Test Complete ===")
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test micro-batching of concurrent query embeddings and searches (no OpenAI API needed)
+"""
+import sys
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append('backend')
+
+import pytest
+
+from backend.app.batching import MicroBatcher
+from backend.app.faiss_store import FaissStore
+from conftest import patch_embeddings
+
+DIM = 16
+
+def test_batcher_coalesces():
+    """Concurrent submissions arriving within the window share one call"""
+    print("=== Testing MicroBatcher ===\n")
+
+    calls = []
+    def double_all(items):
+        calls.append(len(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(double_all, max_batch=8, max_wait=0.05)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(batcher.submit, range(8)))
+
+    print(f"📊 Batch sizes: {calls}, stats: {batcher.get_stats()}")
+    assert results == [i * 2 for i in range(8)]
+    assert len(calls) < 8
+
+def test_batched_store_queries(fake_embeddings):
+    """Batched embeddings and multi-row search give each caller its own results"""
+    print("\n=== Testing Batched FaissStore Queries ===\n")
+
+    fake_embeddings.dim, fake_embeddings.kind = DIM, "one_hot"
+    with tempfile.TemporaryDirectory() as tmp:
+        store = FaissStore(dim=DIM, index_file=os.path.join(tmp, "faiss.index"),
+                           meta_file=os.path.join(tmp, "meta.json"))
+        texts = [f"doc {i}" for i in range(DIM)]
+        store.add(texts, [{"source": "t.pdf", "chunk_id": i, "text": t} for i, t in enumerate(texts)])
+        store.enable_batching(max_batch=16, max_wait=0.05)
+
+        fake_embeddings.calls = 0
+        barrier = threading.Barrier(8)
+        def ask(i):
+            barrier.wait()
+            return store.query(f"question about doc {i}", k=1 + i % 3)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            answers = list(pool.map(ask, range(8)))
+
+        for i, results in enumerate(answers):
+            assert len(results) == 1 + i % 3
+            assert results[0]["meta"]["chunk_id"] == i
+        print(f"📊 Embedding calls for 8 queries: {fake_embeddings.calls}")
+        assert fake_embeddings.calls < 8
+
+if __name__ == "__main__":
+    print("Starting Micro-batching Test...\n")
+    test_batcher_coalesces()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_batched_store_queries(patch_embeddings(monkeypatch))
+    print("\n=== Test Complete ===")
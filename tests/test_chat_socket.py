@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Test the WebSocket chat endpoint: streaming, cancellation and backpressure (no OpenAI API needed)
+"""
+import sys
+import json
+import time
+import asyncio
+import threading
+from types import SimpleNamespace
+sys.path.append('backend')
+
+from fastapi import FastAPI, WebSocket
+from starlette.testclient import TestClient
+
+from backend.app.chat_socket import ChatConnection
+from backend.app.hedging import Deadline, HedgedGenerator, LatencyTracker, RequestCancelled
+
+class TokenStream:
+    """Chat-completion chunks with a delay before each token; close() aborts it"""
+
+    def __init__(self, words, token_delay):
+        self.words = words
+        self.token_delay = token_delay
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        for word in self.words:
+            if self.closed.wait(self.token_delay):
+                raise ConnectionError("stream closed")
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=word))])
+
+    def close(self):
+        self.closed.set()
+
+def test_generator_forwards_tokens_and_cancels():
+    """The winning attempt's tokens reach on_token in order; cancelling the deadline closes the stream"""
+    print("=== Testing Streaming Generation ===\n")
+
+    streams = []
+    def open_stream(prompt, max_tokens, temperature, system_prompt, timeout):
+        streams.append(TokenStream([f"w{i} " for i in range(5)], 0.01))
+        return streams[-1]
+    generator = HedgedGenerator(min_hedge_delay=1.0, tracker=LatencyTracker(default=1.0), open_stream=open_stream)
+
+    tokens = []
+    answer = generator.generate("question", Deadline(3.0), on_token=tokens.append)
+    print(f"📋 Streamed {tokens} -> {answer!r}")
+    assert "".join(tokens) == answer == "w0 w1 w2 w3 w4 "
+
+    def slow_open(prompt, max_tokens, temperature, system_prompt, timeout):
+        streams.append(TokenStream([f"w{i} " for i in range(100)], 0.05))
+        return streams[-1]
+    generator.open_stream = slow_open
+    deadline, tokens = Deadline(10.0), []
+    threading.Timer(0.2, deadline.cancel).start()
+    start = time.monotonic()
+    try:
+        generator.generate("question", deadline, on_token=tokens.append)
+        assert False, "expected RequestCancelled"
+    except RequestCancelled:
+        pass
+    print(f"🛑 Cancelled after {time.monotonic() - start:.2f}s and {len(tokens)} tokens")
+    assert time.monotonic() - start < 1.0
+    assert 0 < len(tokens) < 100 and streams[-1].closed.is_set()
+    assert generator.get_stats()['cancelled'] == 1
+
+def make_app(token_delay=0.02, tokens=20):
+    """Chat app whose answers are streamed by a worker thread, like query_rag on the query lane"""
+    app = FastAPI()
+
+    def generate(question, deadline, on_token):
+        for i in range(tokens):
+            if deadline.cancelled:
+                raise RequestCancelled("cancelled")
+            on_token(f"{question}-{i} ")
+            time.sleep(token_delay)
+        return "".join(f"{question}-{i} " for i in range(tokens))
+
+    async def answer(message, turn):
+        if "question" not in message:
+            raise ValueError("question is required")
+        deadline = turn.start_deadline(5.0)
+        text = await asyncio.get_running_loop().run_in_executor(
+            None, generate, message["question"], deadline, turn.on_token)
+        return text, [{"source": "doc.pdf", "score": 0.9, "chunk_id": 0}]
+
+    @app.websocket("/ws")
+    async def chat(websocket: WebSocket):
+        await ChatConnection(websocket, answer).serve()
+    return app
+
+def read_turn(client, turn_id):
+    """Collect frames until the turn finishes, skipping frames of other turns"""
+    frames = []
+    while True:
+        frame = client.receive_json()
+        if frame.get("id") != turn_id:
+            continue
+        frames.append(frame)
+        if frame["type"] in ("done", "error", "cancelled"):
+            return frames
+
+def test_turns_stream_and_new_question_cancels():
+    """Many turns share one connection; a new question cancels the unfinished one"""
+    print("=== Testing WebSocket Chat ===\n")
+
+    with TestClient(make_app()).websocket_connect("/ws") as client:
+        client.send_json({"type": "question", "id": 1, "question": "a"})
+        frames = read_turn(client, 1)
+        assert [f["type"] for f in frames[-2:]] == ["sources", "done"]
+        assert "".join(f["text"] for f in frames if f["type"] == "token") == frames[-1]["answer"]
+
+        client.send_json({"type": "question", "id": 2, "question": "b"})
+        assert client.receive_json()["type"] == "token"
+        client.send_json({"type": "question", "id": 3, "question": "c"})
+        cancelled = client.receive_json()
+        while cancelled.get("id") == 2 and cancelled["type"] == "token":
+            cancelled = client.receive_json()
+        print(f"🛑 {cancelled}")
+        assert cancelled == {"type": "cancelled", "id": 2}
+        frames = read_turn(client, 3)
+        assert frames[-1]["type"] == "done" and frames[-1]["answer"].startswith("c-0")
+        assert all(f["id"] == 3 for f in frames)
+
+        client.send_json({"type": "question", "id": 4})
+        assert read_turn(client, 4)[-1] == {"type": "error", "id": 4, "status": 500,
+                                            "detail": "question is required"}
+        client.send_text("not json")
+        assert client.receive_json()["status"] == 400
+
+class StalledSocket:
+    """WebSocket stand-in whose sends wait until the test opens the gate, like a client that stops reading"""
+
+    def __init__(self, messages):
+        self.incoming = asyncio.Queue()
+        for message in messages:
+            self.incoming.put_nowait(message)
+        self.gate = asyncio.Event()
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def receive_text(self):
+        return await self.incoming.get()
+
+    async def send_text(self, text):
+        await self.gate.wait()
+        self.sent.append(json.loads(text))
+
+def test_slow_reader_applies_backpressure():
+    """With a small outbox the generating thread waits for the client instead of racing ahead"""
+    produced = []
+
+    def generate(deadline, on_token):
+        for i in range(200):
+            on_token(f"t{i} ")
+            produced.append(i)
+        return "done"
+
+    async def answer(message, turn):
+        deadline = turn.start_deadline(5.0)
+        return await asyncio.get_running_loop().run_in_executor(None, generate, deadline, turn.on_token), []
+
+    async def scenario():
+        socket = StalledSocket([json.dumps({"type": "question", "id": 1, "question": "x"})])
+        connection = ChatConnection(socket, answer, send_queue=4)
+        serving = asyncio.create_task(connection.serve())
+        await asyncio.sleep(0.3)
+        ahead = len(produced)
+        socket.gate.set()
+        while not socket.sent or socket.sent[-1]["type"] != "done":
+            await asyncio.sleep(0.01)
+        serving.cancel()
+        return ahead, socket.sent
+
+    ahead, sent = asyncio.run(scenario())
+    print(f"🐢 Producer got {ahead} tokens ahead of a stalled reader")
+    assert ahead <= 4 + 2  # The outbox, plus the frame being sent and the one being queued
+    assert [f["text"] for f in sent if f["type"] == "token"] == [f"t{i} " for i in range(200)]
+
+def test_api_route_reports_not_ready():
+    """The real /api/chat/ws route validates questions and answers 503 until the index is ready"""
+    from backend.app.api import router
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    with TestClient(app).websocket_connect("/api/chat/ws") as client:
+        client.send_json({"type": "question", "id": "q1", "question": "hello"})
+        frame = client.receive_json()
+        print(f"⏳ {frame}")
+        assert frame["type"] == "error" and frame["status"] == 503 and frame["retry_after"] == 5
+        client.send_json({"type": "question", "id": "q2", "top_k": "many"})
+        frame = client.receive_json()
+        assert frame["status"] == 422
+
+if __name__ == "__main__":
+    print("Starting Chat Socket Test...\n")
+    test_generator_forwards_tokens_and_cancels()
+    test_turns_stream_and_new_question_cancels()
+    test_slow_reader_applies_backpressure()
+    test_api_route_reports_not_ready()
+    print("\n=== Test Complete ===")
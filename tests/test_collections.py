@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test named collections: lazy loading, LRU eviction under a memory budget and isolation (no OpenAI API needed)
+"""
+import sys
+import os
+import json
+import tempfile
+from types import SimpleNamespace
+sys.path.append('backend')
+
+import pytest
+
+from backend.app.kb_collections import CollectionRegistry, CollectionSpec, create_collections
+from conftest import patch_embeddings
+
+DIM = 16
+
+def fill(registry, name, count):
+    """Ingest count chunks into a collection and release it"""
+    collection = registry.acquire(name)
+    texts = [f"{name} chunk {i} about product {i % 7}" for i in range(count)]
+    collection.store.add(texts, [{"source": f"{name}.pdf", "chunk_id": i, "text": t} for i, t in enumerate(texts)])
+    registry.release(collection)
+    return collection
+
+def test_lazy_load_and_lru_eviction(fake_embeddings):
+    """Collections load on first use, the least recently used one is evicted, and reloads from disk"""
+    print("=== Testing Collection Residency ===\n")
+
+    fake_embeddings.dim = DIM
+    with tempfile.TemporaryDirectory() as tmp:
+        specs = [CollectionSpec(name=name, dim=DIM) for name in ("brand-a", "brand-b", "brand-c")]
+        registry = CollectionRegistry(specs, root=tmp, memory_budget_mb=1.0)
+        assert registry.resident() == [] and "brand-a" in registry and "nope" not in registry
+
+        sizes = {name: fill(registry, name, 3000).memory_bytes for name in ("brand-a", "brand-b")}
+        print(f"📏 Sizes: {sizes}, resident {registry.resident()}")
+        assert all(size > 300_000 for size in sizes.values())
+        assert registry.resident() == ["brand-a", "brand-b"]
+
+        # Touching brand-a makes brand-b the least recently used
+        registry.release(registry.acquire("brand-a"))
+        fill(registry, "brand-c", 3000)
+        print(f"♻️  After loading brand-c: {registry.get_stats()}")
+        assert registry.resident() == ["brand-a", "brand-c"]
+        assert registry.get_stats()['evictions'] == 1
+
+        # brand-b reloads from its own files with its data intact
+        reloaded = registry.acquire("brand-b")
+        assert len(reloaded.store) == 3000
+        assert os.path.exists(os.path.join(tmp, "brand-b", "faiss.index"))
+        results = reloaded.store.query("brand-b chunk 5 about product 5", k=1)
+        assert results[0]['meta']['source'] == "brand-b.pdf"
+
+        # A pinned collection is never evicted, even over budget
+        pinned = registry.acquire("brand-c")
+        registry.release(registry.acquire("brand-a"))
+        assert "brand-c" in registry.resident()
+        registry.release(pinned)
+        registry.release(reloaded)
+        stats = registry.get_stats()
+        assert stats['memory_mb'] <= stats['memory_budget_mb'] or len(stats['resident']) == 1
+
+        try:
+            registry.acquire("nope")
+            assert False, "expected KeyError"
+        except KeyError:
+            pass
+
+def test_collections_are_isolated():
+    """Each collection has its own caches, settings and chunk store"""
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = CollectionRegistry(
+            [CollectionSpec(name="en", dim=DIM), CollectionSpec(name="fr", dim=DIM, hybrid=False, answer_cache_size=0)],
+            root=tmp
+        )
+        en, fr = registry.acquire("en"), registry.acquire("fr")
+        assert en.store is not fr.store and en.store.index_file != fr.store.index_file
+        assert en.answer_cache is not None and fr.answer_cache is None
+        assert en.store.hybrid and not fr.store.hybrid
+        en.answer_cache.set("hello", 5, en.store.generation, "bonjour?", [])
+        assert en.answer_cache.get("hello", 5, 0) == ("bonjour?", [])
+
+def test_create_from_settings():
+    """The registry is built from the collections file, and absent when there is none"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "collections.json")
+        settings = SimpleNamespace(collections_file=path, collections_dir=tmp, collections_memory_mb=64.0)
+        assert create_collections(settings) is None
+        with open(path, "w") as f:
+            json.dump({"acme": {"dim": DIM}, "acme-fr": {"dim": DIM, "lexical_min_score": 8.0}}, f)
+        registry = create_collections(settings)
+        assert registry.names() == ["acme", "acme-fr"] and registry.memory_budget == 64_000_000
+        assert registry.specs["acme-fr"].lexical_min_score == 8.0
+        try:
+            CollectionRegistry([CollectionSpec(name="../escape")])
+            assert False, "expected an invalid name error"
+        except ValueError:
+            pass
+
+def test_api_selects_collection():
+    """Queries name a collection; unknown names are a 404, not a server error"""
+    from fastapi import FastAPI
+    from starlette.testclient import TestClient
+    from backend.app import api as api_module
+
+    original_registry, original_state = api_module.collection_registry, api_module.readiness.state
+    api_module.readiness.state = "ready"
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            api_module.collection_registry = CollectionRegistry([CollectionSpec(name="acme", dim=DIM)], root=tmp)
+            app = FastAPI()
+            app.include_router(api_module.router, prefix="/api")
+            client = TestClient(app)
+            missing = client.post("/api/query", json={"question": "hi", "collection": "other"})
+            assert missing.status_code == 404 and "other" in missing.json()["detail"]
+
+            # An empty collection answers with the fallback message without any API call
+            answer = client.post("/api/query?lean=true", json={"question": "hi", "collection": "acme"})
+            assert answer.status_code == 200 and answer.json()["sources"] == []
+            assert api_module.collection_registry.resident() == ["acme"]
+            assert api_module.collection_registry.get_stats()["resident"]["acme"]["in_use"] == 0
+    finally:
+        api_module.collection_registry = original_registry
+        api_module.readiness.state = original_state
+
+if __name__ == "__main__":
+    print("Starting Collections Test...\n")
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_lazy_load_and_lru_eviction(patch_embeddings(monkeypatch))
+    test_collections_are_isolated()
+    test_create_from_settings()
+    test_api_selects_collection()
+    print("\n=== Test Complete ===")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test overlap-aware merging of adjacent chunks during context assembly
+"""
+import sys
+sys.path.append('backend')
+
+from backend.app.pdf_ingest import chunk_text
+from backend.app.rag import merge_adjacent_chunks, build_context
+
+def test_adjacent_chunks_spliced():
+    """Neighbouring chunks become one passage without the repeated overlap"""
+    print("=== Testing Adjacent Chunk Merging ===\n")
+
+    text = " ".join(f"Sentence {i} about Mi Lifestyle policies." for i in range(60))
+    chunks = chunk_text(text, chunk_size=300, overlap=50)
+    results = [
+        {"meta": {"source": "mipolicies.pdf", "chunk_id": 5, "text": chunks[5]}, "score": 0.30},
+        {"meta": {"source": "other.pdf", "chunk_id": 0, "text": "Unrelated passage."}, "score": 0.35},
+        {"meta": {"source": "mipolicies.pdf", "chunk_id": 4, "text": chunks[4]}, "score": 0.40},
+        {"meta": {"source": "mipolicies.pdf", "chunk_id": 6, "text": chunks[6]}, "score": 0.20},
+        {"meta": {"source": "mipolicies.pdf", "chunk_id": 9, "text": chunks[9]}, "score": 0.10},
+    ]
+
+    passages = merge_adjacent_chunks(results)
+    for passage in passages:
+        print(f"📋 {passage['source']} {passage['chunk_ids']} ({len(passage['text'])} chars)")
+
+    assert [p['chunk_ids'] for p in passages] == [[4, 5, 6], [9], [0]]
+    expected = text[4 * 250:4 * 250 + 300 + 2 * 250].strip()
+    assert passages[0]['text'] == expected
+    assert passages[0]['score'] == 0.40
+
+    original_chars = sum(len(chunks[i]) for i in (4, 5, 6))
+    print(f"✂️  Saved {original_chars - len(passages[0]['text'])} repeated characters")
+    assert len(passages[0]['text']) == original_chars - 2 * 50
+
+def test_oversized_passage_split_at_chunk_boundaries():
+    """Adjacent chunks that merge into more than the budget still reach the prompt, chunk by chunk"""
+    text = " ".join(f"Sentence {i} about Mi Lifestyle policies." for i in range(300))
+    chunks = chunk_text(text)  # 1200 characters with 200 of overlap, as ingested
+    scores = {3: 0.20, 4: 0.25, 5: 0.40, 6: 0.35, 7: 0.30}
+    results = sorted(
+        ({"meta": {"source": "mipolicies.pdf", "chunk_id": i, "text": chunks[i]}, "score": score}
+         for i, score in scores.items()),
+        key=lambda r: -r["score"]
+    )
+    assert len(merge_adjacent_chunks(results)[0]['text']) > 3000
+
+    # What the context held before merging: whole chunks in retrieval order, as long as they fit
+    baseline, used = [], 0
+    for result in results:
+        part = f"[Document {len(baseline) + 1}: mipolicies.pdf]\n{result['meta']['text']}"
+        if used + len(part) <= 3000:
+            baseline.append(result['meta']['chunk_id'])
+            used += len(part)
+
+    context = build_context(results)
+    included = [i for i in scores if chunks[i] in context]
+    print(f"📋 Baseline sent chunks {baseline}, merged context sends {included} in {len(context)} chars")
+    assert context and len(context) <= 3000 + len("\n\n---\n\n") * 2
+    assert len(included) >= len(baseline) and 5 in included
+
+if __name__ == "__main__":
+    print("Starting Context Merge Test...\n")
+    test_adjacent_chunks_spliced()
+    test_oversized_passage_split_at_chunk_boundaries()
+    print("\n=== Test Complete ===")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test cached PDF text extraction keyed by file hash (no OpenAI API needed)
+"""
+import sys
+import os
+import time
+import shutil
+import tempfile
+sys.path.append('backend')
+
+from backend.app import pdf_ingest
+from backend.app.extraction_cache import ExtractionCache, file_sha256
+from backend.app.pdf_ingest import extract_pages, extract_text_from_pdf, normalize_page, prepare_chunks
+
+PDF = "backend/data/milifestyle.pdf"
+
+def test_cached_extraction_matches_and_skips_parsing():
+    """A second extraction of the same bytes is served from the cache without parsing"""
+    print("=== Testing Extraction Cache ===\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ExtractionCache(os.path.join(tmp, "cache"))
+        started = time.perf_counter()
+        fresh = extract_pages(PDF, cache)
+        parse_time = time.perf_counter() - started
+        assert fresh == extract_pages(PDF) and cache.misses == 1
+        expected_chunks = prepare_chunks(PDF)[0]
+
+        original = pdf_ingest._parse_pages
+        pdf_ingest._parse_pages = lambda *args: (_ for _ in ()).throw(AssertionError("parsed again"))
+        try:
+            started = time.perf_counter()
+            cached = extract_pages(PDF, cache)
+            hit_time = time.perf_counter() - started
+            # A renamed copy has the same bytes, so it hits too
+            copy = os.path.join(tmp, "renamed.pdf")
+            shutil.copy(PDF, copy)
+            assert extract_text_from_pdf(copy, cache) == "".join(fresh)
+            assert prepare_chunks(copy, extraction_cache=cache)[0] == expected_chunks
+        finally:
+            pdf_ingest._parse_pages = original
+        print(f"⏱️  parse {parse_time * 1000:.1f} ms, cache hit {hit_time * 1000:.1f} ms: {cache.get_stats()}")
+        assert cached == fresh
+        assert cache.hits == 3 and cache.get_stats()['entries'] == 1
+
+def test_cache_key_changes():
+    """Changed bytes or a different extractor miss; corrupt entries are re-extracted"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ExtractionCache(tmp)
+        sha = file_sha256(PDF)
+        cache.put(sha, "extractor-a", ["page one", "page two"])
+        assert cache.get(sha, "extractor-a") == ["page one", "page two"]
+        assert cache.get(sha, "extractor-b") is None
+        assert cache.get("0" * 64, "extractor-a") is None
+
+        with open(cache._path(sha, "extractor-a"), "wb") as f:
+            f.write(b"not zlib")
+        assert cache.get(sha, "extractor-a") is None
+
+        # Through the ingest path: a corrupt entry is a miss, and the fresh extraction replaces it
+        fresh = extract_pages(PDF, cache)
+        ingest_entry = [os.path.join(tmp, name) for name in os.listdir(tmp)
+                        if name.endswith(".pages.z") and os.path.join(tmp, name) != cache._path(sha, "extractor-a")]
+        assert len(ingest_entry) == 1
+        with open(ingest_entry[0], "wb") as f:
+            f.write(b"not zlib")
+        misses = cache.misses
+        assert extract_pages(PDF, cache) == fresh and cache.misses == misses + 1
+        assert extract_pages(PDF, cache) == fresh and cache.misses == misses + 1
+        assert not [name for name in os.listdir(tmp) if name.endswith(".tmp")]
+
+def test_normalize_page():
+    """Line endings and NULs are normalized, composed characters stay composed"""
+    assert normalize_page("a\r\nb\rc\x00d") == "a\nb\ncd"
+    assert normalize_page("Café") == "Café"
+    assert pdf_ingest.extractor_id("pypdf2").startswith("pypdf2-")
+
+if __name__ == "__main__":
+    print("Starting Extraction Cache Test...\n")
+    test_cached_extraction_matches_and_skips_parsing()
+    test_cache_key_changes()
+    test_normalize_page()
+    print("\n=== Test Complete ===")
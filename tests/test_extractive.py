@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test extractive answers built from retrieved chunks (no OpenAI API needed)
+"""
+import sys
+import time
+sys.path.append('backend')
+
+import pytest
+
+from backend.app.extractive import extractive_answer, split_sentences
+from conftest import patch_embeddings
+
+RESULTS = [
+    {
+        "meta": {
+            "source": "micontactus.pdf",
+            "chunk_id": 0,
+            "text": "Mi Lifestyle is headquartered in Chennai. You can reach customer service at 044-40602222 "
+                    "between 9 AM and 6 PM. Our office is closed on national holidays."
+        },
+        "score": 0.42
+    },
+    {
+        "meta": {
+            "source": "DSguidelines.pdf",
+            "chunk_id": 3,
+            "text": "Distributors must complete KYC before their first order. The joining fee is refundable "
+                    "within 30 days of registration. Distributors earn a commission on every sale."
+        },
+        "score": 0.38
+    }
+]
+
+def test_best_sentences():
+    """The sentences that answer the question are returned with their source"""
+    print("=== Testing Extractive Answers ===\n")
+
+    assert len(split_sentences(RESULTS[1]["meta"]["text"])) == 3
+
+    start = time.perf_counter()
+    answer, sources = extractive_answer("Is the joining fee refundable?", RESULTS, max_sentences=1)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    print(f"📋 Answer: {answer!r} ({elapsed_ms:.2f} ms)")
+    assert answer == "The joining fee is refundable within 30 days of registration."
+    assert sources == [{"source": "DSguidelines.pdf", "score": 0.38, "chunk_id": 3}]
+
+    answer, sources = extractive_answer("customer service phone number hours", RESULTS)
+    assert "044-40602222" in answer
+    assert sources[0]["source"] == "micontactus.pdf"
+
+def test_no_overlap():
+    """Questions that share no terms with the chunks produce no extractive answer"""
+    print("\n=== Testing No Overlap ===\n")
+
+    assert extractive_answer("xylophone zebra", RESULTS) == ("", [])
+
+def test_extractive_mode_makes_no_llm_calls(fake_embeddings, monkeypatch):
+    """Extractive mode neither condenses follow-ups nor serves cached generated answers"""
+    import os
+    import tempfile
+    import numpy as np
+    from backend.app import rag, sessions
+    from backend.app.answer_cache import AnswerCache
+    from backend.app.faiss_store import FaissStore
+    from backend.app.sessions import SessionStore
+
+    def no_llm(prompt, **kwargs):
+        raise AssertionError("extractive mode called the LLM")
+
+    fake_embeddings.dim, fake_embeddings.kind = 4, "constant"
+    monkeypatch.setattr(rag, "generate_text", no_llm)
+    monkeypatch.setattr(sessions, "generate_text", no_llm)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = FaissStore(dim=4, index_file=os.path.join(tmp, "faiss.index"),
+                           meta_file=os.path.join(tmp, "meta.json"), hybrid=False)
+        store.add_vectors(np.full((1, 4), 0.5, dtype="float32"), [RESULTS[1]["meta"]])
+        cache = AnswerCache(ttl=60)
+        cache.set("Is the joining fee refundable?", 5, store.version, "A generated answer", [])
+        session_store = SessionStore(max_turns=1)
+        session_store.record_turn("s1", "How do I join?", "Register online.")
+
+        answer, sources, _ = rag.query_rag("Is the joining fee refundable?", store, answer_cache=cache,
+                                           session_store=session_store, session_id="s1", mode="extractive")
+        print(f"📝 Extractive with a session: {answer!r}")
+        assert "refundable within 30 days" in answer and sources[0]["source"] == "DSguidelines.pdf"
+        # The older turn was folded into the summary without a summarization call
+        assert session_store.get("s1").summary == "How do I join?"
+
+def test_only_upstream_failures_fall_back(fake_embeddings, monkeypatch):
+    """Timeouts and API errors degrade to an extractive answer; programming errors surface"""
+    import os
+    import tempfile
+    import numpy as np
+    import openai
+    from backend.app import rag
+    from backend.app.faiss_store import FaissStore
+
+    def upstream_down(prompt, **kwargs):
+        raise openai.OpenAIError("upstream unavailable")  # Base of the API, connection and timeout errors
+
+    def bug(prompt, **kwargs):
+        raise KeyError("choices")
+
+    fake_embeddings.dim, fake_embeddings.kind = 4, "constant"
+    with tempfile.TemporaryDirectory() as tmp:
+        store = FaissStore(dim=4, index_file=os.path.join(tmp, "faiss.index"),
+                           meta_file=os.path.join(tmp, "meta.json"), hybrid=False)
+        store.add_vectors(np.full((1, 4), 0.5, dtype="float32"), [RESULTS[1]["meta"]])
+        monkeypatch.setattr(rag, "generate_text", upstream_down)
+        answer, _, _ = rag.query_rag("Is the joining fee refundable?", store)
+        assert "refundable within 30 days" in answer
+        monkeypatch.setattr(rag, "generate_text", bug)
+        try:
+            rag.query_rag("Is the joining fee refundable?", store)
+            assert False, "expected KeyError"
+        except KeyError:
+            pass
+
+if __name__ == "__main__":
+    print("Starting Extractive Answer Test...\n")
+    test_best_sentences()
+    test_no_overlap()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_extractive_mode_makes_no_llm_calls(patch_embeddings(monkeypatch), monkeypatch)
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_only_upstream_failures_fall_back(patch_embeddings(monkeypatch), monkeypatch)
+    print("\n=== Test Complete ===")
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test the precomputed FAQ store with fake generation and embeddings (no OpenAI API needed)
+"""
+import sys
+import os
+import json
+import tempfile
+sys.path.append('backend')
+
+import pytest
+
+from backend.app import faq_precompute
+from backend.app.faq_precompute import FaqStore
+from conftest import patch_embeddings
+
+DIM = 32
+
+def fake_generate(prompt, system_prompt=None, max_tokens=1000, temperature=0.7):
+    """Return one FAQ pair naming the first word of the passage"""
+    passage = prompt.split("Passage:\n", 1)[1]
+    topic = passage.split()[0]
+    return f'```json\n[{{"question": "What about {topic}?", "answer": "All about {topic}."}}]\n```'
+
+def test_sync_and_match(fake_embeddings, monkeypatch):
+    """Sections produce FAQ entries that match their own question and are kept in sync"""
+    print("=== Testing FAQ Precompute ===\n")
+
+    fake_embeddings.dim = DIM
+    monkeypatch.setattr(faq_precompute, "generate_text", fake_generate)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = FaqStore(dim=DIM, index_file=os.path.join(tmp, "faq.index"),
+                         meta_file=os.path.join(tmp, "faq.json"))
+
+        assert store.sync_source("policies.pdf", ["Refunds are ...", "Shipping takes ..."]) == 2
+        # Unchanged sections are not regenerated, removed ones are dropped
+        assert store.sync_source("policies.pdf", ["Refunds are ...", "Returns need ..."]) == 1
+        questions = sorted(item["question"] for item in store.items)
+        print(f"📋 FAQ questions: {questions}")
+        assert questions == ["What about Refunds?", "What about Returns?"]
+
+        query = fake_embeddings(["What about Returns?"])
+        faq_precompute.faiss.normalize_L2(query)
+        match = store.match(query, threshold=0.9)
+        assert match["answer"] == "All about Returns." and match["chunk_id"] == 1
+
+        unrelated = fake_embeddings(["something else"])
+        faq_precompute.faiss.normalize_L2(unrelated)
+        assert store.match(unrelated, threshold=0.9) is None
+
+        # Entries survive a reload
+        with open(os.path.join(tmp, "faq.json")) as f:
+            assert len(json.load(f)) == 2
+        assert len(FaqStore(dim=DIM, index_file=store.index_file, meta_file=store.meta_file)) == 2
+
+if __name__ == "__main__":
+    print("Starting FAQ Precompute Test...\n")
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_sync_and_match(patch_embeddings(monkeypatch), monkeypatch)
+    print("\n=== Test Complete ===")
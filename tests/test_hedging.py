@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test hedged generation, cancellation and deadlines with fake streams (no OpenAI API needed)
+"""
+import sys
+import time
+import threading
+from types import SimpleNamespace
+sys.path.append('backend')
+
+from backend.app.hedging import Deadline, DeadlineExceeded, HedgedGenerator, LatencyTracker
+from backend.app.rag import retrieval_only_answer
+
+class FakeStream:
+    """Yields chat-completion chunks after an initial delay; close() aborts it"""
+
+    def __init__(self, words, first_token_delay):
+        self.words = words
+        self.first_token_delay = first_token_delay
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        if self.closed.wait(self.first_token_delay):
+            raise ConnectionError("stream closed")
+        for word in self.words:
+            if self.closed.is_set():
+                raise ConnectionError("stream closed")
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=word))])
+
+    def close(self):
+        self.closed.set()
+
+def make_opener(delays):
+    """open_stream stand-in whose n-th call waits delays[n] before its first token"""
+    streams = []
+    def open_stream(prompt, max_tokens, temperature, system_prompt, timeout):
+        stream = FakeStream([f"answer-{len(streams) + 1} ", "done"], delays[len(streams)])
+        streams.append(stream)
+        return stream
+    return open_stream, streams
+
+def test_hedge_wins_and_loser_cancelled():
+    """A slow first attempt is hedged; the faster duplicate wins and the slow one is closed"""
+    print("=== Testing Hedged Generation ===\n")
+
+    open_stream, streams = make_opener([5.0, 0.01])
+    generator = HedgedGenerator(min_hedge_delay=0.05, tracker=LatencyTracker(default=0.05), open_stream=open_stream)
+
+    start = time.monotonic()
+    answer = generator.generate("question", Deadline(3.0))
+    elapsed = time.monotonic() - start
+
+    print(f"📋 Answer {answer!r} in {elapsed:.3f}s, stats: {generator.get_stats()}")
+    assert answer == "answer-2 done"
+    assert elapsed < 1.0
+    assert streams[0].closed.is_set()
+    assert generator.get_stats()['hedge_wins'] == 1
+
+def test_fast_first_attempt_not_hedged():
+    """When the first token arrives before the hedge delay no duplicate is sent"""
+    print("\n=== Testing Unhedged Fast Path ===\n")
+
+    open_stream, streams = make_opener([0.0, 0.0])
+    generator = HedgedGenerator(min_hedge_delay=0.5, tracker=LatencyTracker(default=0.5), open_stream=open_stream)
+    assert generator.generate("question", Deadline(3.0)) == "answer-1 done"
+    assert len(streams) == 1 and generator.hedges == 0
+
+def test_deadline_degrades():
+    """When every attempt is too slow the deadline cancels them all"""
+    print("\n=== Testing Deadline Exceeded ===\n")
+
+    open_stream, streams = make_opener([5.0, 5.0])
+    generator = HedgedGenerator(min_hedge_delay=0.05, tracker=LatencyTracker(default=0.05), open_stream=open_stream)
+    try:
+        generator.generate("question", Deadline(0.2))
+        assert False, "expected DeadlineExceeded"
+    except DeadlineExceeded:
+        pass
+    assert all(stream.closed.is_set() for stream in streams)
+
+    results = [{"meta": {"text": "Distributors earn a commission on every sale.", "source": "a.pdf"}, "score": 0.5}]
+    fallback = retrieval_only_answer(results)
+    print(f"📋 Retrieval-only answer: {fallback!r}")
+    assert "commission" in fallback
+
+if __name__ == "__main__":
+    print("Starting Hedging Test...\n")
+    test_hedge_wins_and_loser_cancelled()
+    test_fast_first_attempt_not_hedged()
+    test_deadline_degrades()
+    print("\n=== Test Complete ===")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test building, verifying and serving a prebuilt index bundle (no OpenAI API needed)
+"""
+import sys
+import os
+import shutil
+import tempfile
+sys.path.append('backend')
+
+import numpy as np
+import pytest
+
+from backend.app.ann_tuning import save_ann_params
+from backend.app.faiss_store import FaissStore
+from backend.app.index_bundle import HEADER, BundleError, IndexBundle, _align, build_bundle, file_sha256
+from conftest import patch_embeddings
+
+DIM = 8
+PDFS = ["backend/data/micontactus.pdf", "backend/data/milifestyle.pdf"]
+
+def test_build_and_serve_bundle(fake_embeddings):
+    """A bundle built with worker processes opens read-only and serves queries without re-embedding"""
+    print("=== Testing Index Bundle ===\n")
+
+    fake_embeddings.dim = DIM
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index.bundle")
+        manifest = build_bundle(PDFS, path, chunk_size=600, overlap=100, workers=2)
+        print(f"📦 Bundle {manifest['version']}: {manifest['count']} chunks, sources {manifest['sources']}")
+        assert manifest['count'] > 0 and manifest['dim'] == DIM
+        assert manifest['chunking'] == {"chunk_size": 600, "overlap": 100}
+        assert {s['name']: s['sha256'] for s in manifest['sources']}["milifestyle.pdf"] == \
+            file_sha256("backend/data/milifestyle.pdf")
+
+        bundle = IndexBundle.open(path)
+        assert isinstance(bundle.vectors, np.memmap) and bundle.vectors.shape == (manifest['count'], DIM)
+        assert np.allclose(np.linalg.norm(bundle.vectors, axis=1), 1.0, atol=1e-5)
+
+        calls = fake_embeddings.calls
+        store = FaissStore(dim=DIM, index_file=os.path.join(tmp, "faiss.index"),
+                           meta_file=os.path.join(tmp, "meta.json"), bundle_file=path)
+        assert fake_embeddings.calls == calls
+        assert len(store) == store.index.ntotal == manifest['count']
+        assert store.lexical.num_docs == manifest['count']
+        assert store.get_stats()['bundle']['version'] == manifest['version']
+        assert len(store.query("contact customer care", k=3)) == 3
+        assert not os.path.exists(store.index_file)
+
+        # Tuned parameters are not applied to a bundle: it is served flat, straight from the mapped vectors
+        params_file = os.path.join(tmp, "ann_params.json")
+        save_ann_params(params_file, {"factory": "IVF4,Flat", "params": {"nprobe": 2}, "recall": 0.97}, k=5,
+                        vectors=manifest['count'], dim=DIM, model=manifest['embedding_model'])
+        tuned = FaissStore(dim=DIM, index_file=os.path.join(tmp, "faiss.index"),
+                           meta_file=os.path.join(tmp, "meta.json"), bundle_file=path, ann_params_file=params_file)
+        assert tuned.factory == "Flat" and tuned.index.ntotal == manifest['count'] and tuned.ann_params is None
+
+        try:
+            store.add(["new text"], [{"source": "x.pdf", "text": "new text"}])
+            assert False, "expected a read-only error"
+        except RuntimeError:
+            pass
+
+        # Flip one byte in the vectors section: the checksum catches it
+        corrupt = os.path.join(tmp, "corrupt.bundle")
+        shutil.copy(path, corrupt)
+        with open(corrupt, "r+b") as f:
+            manifest_length = HEADER.unpack(f.read(HEADER.size))[3]
+            f.seek(_align(HEADER.size + manifest_length) + manifest['sections']['vectors']['offset'] + 5)
+            byte = f.read(1)
+            f.seek(-1, os.SEEK_CUR)
+            f.write(bytes([byte[0] ^ 0xFF]))
+        try:
+            IndexBundle.open(corrupt)
+            assert False, "expected a checksum failure"
+        except BundleError as e:
+            print(f"🛡️  Corrupt bundle rejected: {e}")
+        IndexBundle.open(corrupt, verify=False)
+
+if __name__ == "__main__":
+    print("Starting Index Bundle Test...\n")
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_build_and_serve_bundle(patch_embeddings(monkeypatch))
+    print("\n=== Test Complete ===")
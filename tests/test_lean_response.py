@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test lean /api/query responses, field selection, the fast JSON encoder and gzip (no OpenAI API needed)
+"""
+import sys
+import json
+sys.path.append('backend')
+
+import numpy as np
+from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.testclient import TestClient
+
+from backend.app import api as api_module
+from backend.app import fast_json
+
+ANSWER = "Our distributors earn a **retail margin** and a monthly performance bonus. " * 20
+SOURCES = [{"source": "milifestyle.pdf", "score": 0.812, "chunk_id": 4}]
+
+async def fake_run_query(request, deadline, on_token=None):
+    return ANSWER, SOURCES, ANSWER
+
+def make_client():
+    app = FastAPI()
+    app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+    app.include_router(api_module.router, prefix="/api")
+    return TestClient(app)
+
+def test_fast_json_matches_standard_encoder():
+    """orjson and the json fallback produce the same document; numpy scalars are accepted"""
+    content = {"answer": "Café • ✓", "sources": SOURCES, "n": 3}
+    assert json.loads(fast_json.dumps(content)) == content
+    orjson, fast_json.orjson = fast_json.orjson, None
+    try:
+        fallback = fast_json.dumps(content)
+    finally:
+        fast_json.orjson = orjson
+    assert json.loads(fallback) == content
+    assert b'", "' not in fallback and "Café".encode() in fallback  # Compact and not ASCII-escaped
+    if orjson is not None:
+        assert json.loads(fast_json.dumps({"score": np.float32(0.5)})) == {"score": 0.5}
+
+def test_lean_and_selected_fields():
+    """lean=true drops raw_generation, fields= picks fields, unknown fields are rejected up front"""
+    print("=== Testing Lean Query Responses ===\n")
+
+    original_run_query, original_state = api_module.run_query, api_module.readiness.state
+    api_module.run_query = fake_run_query
+    api_module.readiness.state = "ready"
+    try:
+        client = make_client()
+        question = {"question": "What are the distributor benefits?"}
+
+        full = client.post("/api/query", json=question, headers={"Accept-Encoding": "identity"})
+        lean = client.post("/api/query?lean=true", json=question, headers={"Accept-Encoding": "identity"})
+        only_answer = client.post("/api/query?fields=answer", json=question, headers={"Accept-Encoding": "identity"})
+        print(f"📦 full {len(full.content)} bytes, lean {len(lean.content)}, answer only {len(only_answer.content)}")
+        assert full.json() == {"answer": ANSWER, "sources": SOURCES, "raw_generation": ANSWER}
+        assert lean.json() == {"answer": ANSWER, "sources": SOURCES}
+        assert only_answer.json() == {"answer": ANSWER}
+        assert lean.headers["content-type"] == "application/json"
+        assert len(lean.content) < 0.6 * len(full.content)
+
+        selected = client.post("/api/query?fields=sources,answer", json=question)
+        assert list(selected.json()) == ["sources", "answer"]
+
+        bad = client.post("/api/query?fields=answer,secret", json=question)
+        assert bad.status_code == 400 and "secret" in bad.json()["detail"]
+
+        compressed = client.post("/api/query?lean=true", json=question, headers={"Accept-Encoding": "gzip"})
+        assert compressed.headers.get("content-encoding") == "gzip"
+        assert compressed.json() == lean.json()
+    finally:
+        api_module.run_query = original_run_query
+        api_module.readiness.state = original_state
+
+if __name__ == "__main__":
+    print("Starting Lean Response Test...\n")
+    test_fast_json_matches_standard_encoder()
+    test_lean_and_selected_fields()
+    print("\n=== Test Complete ===")
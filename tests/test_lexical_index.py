@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test the BM25 lexical index, hybrid fusion and the lexical-only fast path (no OpenAI API needed)
+"""
+import sys
+import os
+import tempfile
+sys.path.append('backend')
+
+import numpy as np
+import pytest
+
+from backend.app.faiss_store import FaissStore
+from backend.app.lexical_index import BM25Index, reciprocal_rank_fusion
+from conftest import patch_embeddings
+
+DOCS = [
+    "Mi Lifestyle distributors earn commission on every product they sell.",
+    "Call customer care on 044-40602222 for order support.",
+    "Product code MLS-7781 is the herbal toothpaste in the personal care range.",
+    "Distributors must complete KYC before placing their first order.",
+] + [f"General company information paragraph number {i} about our business." for i in range(40)]
+
+def test_bm25_ranking_and_persistence():
+    """Exact terms rank their chunk first and the postings survive a save/load"""
+    print("=== Testing BM25 Index ===\n")
+
+    index = BM25Index().with_documents(DOCS[:2]).with_documents(DOCS[2:])
+    assert index.num_docs == len(DOCS)
+    assert index.search("MLS-7781", 3)[0][0] == 2
+    assert index.search("KYC first order", 3)[0][0] == 3
+    assert index.search("nonexistentterm", 3) == []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "lexical.npz")
+        index.save(path)
+        loaded = BM25Index.load(path)
+        print(f"📦 {len(loaded.vocab)} terms, {len(loaded.doc_ids)} postings, {os.path.getsize(path)} bytes")
+        assert np.allclose(loaded.scores("customer care"), index.scores("customer care"))
+
+    assert reciprocal_rank_fusion([[1, 2, 3], [3, 1]])[:2] == [1, 3]
+
+def test_fast_path_skips_embedding(fake_embeddings):
+    """A decisive lexical match is answered without an embedding call"""
+    print("\n=== Testing Lexical Fast Path ===\n")
+
+    fake_embeddings.dim = 8
+    with tempfile.TemporaryDirectory() as tmp:
+        store = FaissStore(dim=8, index_file=os.path.join(tmp, "faiss.index"),
+                           meta_file=os.path.join(tmp, "meta.json"))
+        store.add(DOCS, [{"source": "a.pdf", "chunk_id": i, "text": t} for i, t in enumerate(DOCS)])
+
+        fake_embeddings.calls = 0
+        results = store.query("MLS-7781", k=3)
+        assert fake_embeddings.calls == 0
+        assert results[0]["meta"]["chunk_id"] == 2
+
+        # A vague question is not decisive and goes through hybrid retrieval
+        results = store.query("tell me about the business", k=3)
+        assert fake_embeddings.calls == 1 and len(results) == 3
+
+        # A caller that already tried the fast path (rag) is not BM25-scored for it twice
+        checks = []
+        fast_path = store.lexical_fast_path
+        store.lexical_fast_path = lambda *args, **kwargs: checks.append(args) or fast_path(*args, **kwargs)
+        assert len(store.query("MLS-7781", k=3, lexical_checked=True)) == 3
+        assert checks == [] and fake_embeddings.calls == 2  # Straight to hybrid retrieval
+        del store.lexical_fast_path
+
+        # The lexical index is persisted with the vector index and reloaded
+        reloaded = FaissStore(dim=8, index_file=store.index_file, meta_file=store.meta_file)
+        assert reloaded.lexical.num_docs == len(DOCS)
+
+if __name__ == "__main__":
+    print("Starting Lexical Index Test...\n")
+    test_bm25_ranking_and_persistence()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_fast_path_skips_embedding(patch_embeddings(monkeypatch))
+    print("\n=== Test Complete ===")
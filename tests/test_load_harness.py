@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Test the mock OpenAI server and the asyncio load generator (no OpenAI API needed)
+"""
+import sys
+import io
+import os
+import time
+import socket
+import asyncio
+import threading
+from contextlib import contextmanager
+sys.path.append('backend')
+sys.path.append('tests')
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, UploadFile, File, HTTPException
+
+from backend.app import embeddings_provider
+from mock_openai_server import MockConfig, create_app
+from load_test import HttpClient, make_pdf, percentile, run_load, summarize
+
+@contextmanager
+def serve(app):
+    """Run an ASGI app with uvicorn on a free local port for the duration of the block"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join(timeout=5)
+
+def test_mock_server_with_openai_sdk():
+    """get_embeddings and streaming chat work unchanged against the mock via OPENAI_BASE_URL"""
+    print("=== Testing Mock OpenAI Server ===\n")
+
+    app = create_app(MockConfig(latency_ms=5, jitter_ms=1, token_ms=0, dim=64))
+    saved = {name: os.environ.get(name) for name in ("OPENAI_BASE_URL", "OPENAI_API_KEY")}
+    with serve(app) as url:
+        os.environ["OPENAI_BASE_URL"] = f"{url}/v1"
+        os.environ["OPENAI_API_KEY"] = "mock"
+        try:
+            texts = [f"chunk number {i}" for i in range(embeddings_provider.EMBEDDING_BATCH_SIZE + 20)]
+            vectors = embeddings_provider.get_embeddings(texts)
+            print(f"🧮 Embedded {len(texts)} texts: {vectors.shape}")
+            assert vectors.shape == (len(texts), 64)
+            assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0, atol=1e-5)
+            assert np.array_equal(embeddings_provider.get_embeddings(texts[:1])[0], vectors[0])
+
+            answer = "".join(embeddings_provider.iter_stream_text(embeddings_provider.open_chat_stream("hi")))
+            print(f"💬 Streamed answer: {answer[:60]}...")
+            assert answer.startswith("Mi Lifestyle distributors")
+            assert embeddings_provider.generate_text("hi").startswith("Mi Lifestyle distributors")
+            assert app.state.counts["embeddings"] == 3 and app.state.counts["chat"] == 2
+        finally:
+            for name, value in saved.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+
+def test_synthetic_pdf_is_extractable():
+    """Generated upload PDFs have the requested pages and real text"""
+    import PyPDF2
+    reader = PyPDF2.PdfReader(io.BytesIO(make_pdf(3, words_per_page=60)))
+    assert len(reader.pages) == 3
+    assert len(reader.pages[1].extract_text().split()) >= 50
+
+def test_summarize():
+    """Percentiles use nearest rank and errors are grouped by outcome"""
+    assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 99) == 4.0
+    samples = [(0.01 * i, "ok") for i in range(1, 101)] + [(1.0, "HTTP 503")] * 3 + [(30.0, "timeout")]
+    report = summarize({"query": samples}, elapsed=10.0)["query"]
+    assert report["requests"] == 104 and report["ok"] == 100 and report["throughput_rps"] == 10.0
+    assert report["latency_ms"]["p50"] == 500.0 and report["latency_ms"]["p99"] == 990.0
+    assert report["errors"] == {"HTTP 503": 3, "timeout": 1}
+
+def test_load_generator_against_stub_backend():
+    """Open-loop arrivals hit both endpoints and failures land in the error breakdown"""
+    print("=== Testing Load Generator ===\n")
+
+    stub = FastAPI()
+    seen = {"query": 0, "ingest": 0}
+
+    @stub.post("/api/query")
+    async def query(body: dict):
+        seen["query"] += 1
+        await asyncio.sleep(0.005)
+        if seen["query"] % 5 == 0:
+            raise HTTPException(status_code=503, detail="overloaded")
+        return {"answer": body["question"], "sources": [], "raw_generation": ""}
+
+    @stub.post("/api/ingest")
+    async def ingest(files: list[UploadFile] = File(...)):
+        seen["ingest"] += 1
+        data = await files[0].read()
+        assert data.startswith(b"%PDF")
+        return {"status": "success", "files": [f.filename for f in files]}
+
+    with serve(stub) as url:
+        async def check_client():
+            client = HttpClient(url)
+            status, payload = await client.request("POST", "/api/query", b'{"question": "hi"}')
+            assert status == 200 and b'"answer":"hi"' in payload
+            client.close()
+        asyncio.run(check_client())
+
+        report = asyncio.run(run_load(url, duration=1.0, query_rate=100, ingest_rate=5, upload_pages=[1, 3]))
+    print(report)
+    query = report["query"]
+    assert query["requests"] >= 50
+    assert query["ok"] + query["errors"].get("HTTP 503", 0) == query["requests"]
+    assert query["errors"].get("HTTP 503", 0) > 0
+    assert query["latency_ms"]["p50"] >= 5.0
+    ingests = [row for name, row in report.items() if name.startswith("ingest_")]
+    assert sum(row["ok"] for row in ingests) == seen["ingest"] > 0
+
+if __name__ == "__main__":
+    print("Starting Load Harness Test...\n")
+    test_mock_server_with_openai_sdk()
+    test_synthetic_pdf_is_extractable()
+    test_summarize()
+    test_load_generator_against_stub_backend()
+    print("\n=== Test Complete ===")
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Test PDF extraction backends, auto-detection and per-page timeouts (no OpenAI API needed)
+"""
+import sys
+import time
+import tempfile
+sys.path.append('backend')
+
+from backend.app import pdf_extractors
+from backend.app.pdf_extractors import ExtractionError, PdfExtractor, available_extractors, candidates, extract
+from backend.app.extraction_cache import ExtractionCache, file_sha256
+from backend.app.pdf_ingest import backend_id, extract_pages, extractor_id
+
+PDF = "backend/data/milifestyle.pdf"
+
+class FakeExtractor(PdfExtractor):
+    """Three pages; page 2 hangs for `stall` seconds and page 3 raises when `broken`"""
+    name = "fake"
+    module = "json"
+    distribution = "pip"
+
+    def __init__(self, stall: float = 0.0, broken: bool = False):
+        self.stall = stall
+        self.broken = broken
+        self.opened = 0
+
+    def open(self, path: str):
+        self.opened += 1
+        return path
+
+    def page_count(self, document) -> int:
+        return 3
+
+    def page_text(self, document, index: int) -> str:
+        if index == 1 and self.stall:
+            time.sleep(self.stall)
+        if index == 2 and self.broken:
+            raise ValueError("bad content stream")
+        return f"page {index + 1}"
+
+class UnopenableExtractor(FakeExtractor):
+    name = "unopenable"
+
+    def open(self, path: str):
+        raise OSError("not a PDF")
+
+def with_extractors(*extra):
+    """Put fake backends first in the auto order; returns the original registry to restore"""
+    original = pdf_extractors.EXTRACTORS
+    pdf_extractors.EXTRACTORS = dict({e.name: e for e in extra}, **original)
+    return original
+
+def test_installed_backends_extract_sample():
+    """Every installed backend reads the sample PDF; auto uses the first installed one"""
+    print("=== Testing PDF Extraction Backends ===\n")
+
+    installed = available_extractors()
+    assert "pypdf2" in installed
+    for name in installed:
+        extraction = extract(PDF, name)
+        print(f"📄 {name}: {len(extraction.pages)} pages, {sum(map(len, extraction.pages))} chars "
+              f"in {extraction.seconds * 1000:.1f} ms")
+        assert len(extraction.pages) == 2 and extraction.complete and extraction.backend == name
+        assert "Mi Lifestyle" in "".join(extraction.pages).replace("\n", " ")
+    assert extract(PDF).backend == installed[0]
+    assert pdf_extractors.extraction_stats.get_stats()[installed[0]]['documents'] >= 1
+
+    for name in ("tesseract", "auto-ish"):
+        try:
+            candidates(name)
+            assert False, "expected an unknown extractor error"
+        except ValueError as e:
+            assert name in str(e)
+
+def test_page_timeout_skips_stalled_page():
+    """A stalled page is left empty and extraction resumes after it on a fresh worker"""
+    fake = FakeExtractor(stall=2.0)
+    original = with_extractors(fake)
+    try:
+        started = time.perf_counter()
+        extraction = extract("unused.pdf", "fake", page_timeout=0.3)
+        elapsed = time.perf_counter() - started
+        print(f"⏱️  stalled page skipped after {elapsed:.2f}s: {extraction}")
+        assert extraction.pages == ["page 1", "", "page 3"]
+        assert extraction.timed_out == [1] and not extraction.complete
+        assert fake.opened == 2 and elapsed < 1.5
+
+        # Without a timeout the page is waited for, as before
+        assert extract("unused.pdf", "fake", page_timeout=None).pages == ["page 1", "page 2", "page 3"]
+    finally:
+        pdf_extractors.EXTRACTORS = original
+
+def test_failed_pages_and_fallback():
+    """Page errors leave a gap; documents a backend cannot open fall through to the next one"""
+    original = with_extractors(UnopenableExtractor(), FakeExtractor(broken=True))
+    try:
+        assert candidates("auto")[0].name == "unopenable"
+        extraction = extract("unused.pdf")
+        assert extraction.backend == "fake" and extraction.pages == ["page 1", "page 2", ""]
+        assert extraction.failed == [2]
+        try:
+            extract("unused.pdf", "unopenable")
+            assert False, "expected ExtractionError"
+        except ExtractionError as e:
+            assert "not a PDF" in str(e)
+    finally:
+        pdf_extractors.EXTRACTORS = original
+
+def test_incomplete_extractions_are_not_cached():
+    """Only complete extractions are cached, so skipped pages are retried on the next ingest"""
+    original = with_extractors(FakeExtractor(stall=1.0))
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ExtractionCache(tmp)
+            assert extract_pages(PDF, cache, extractor="fake", page_timeout=0.2) == ["page 1", "", "page 3"]
+            assert cache.get_stats()['entries'] == 0
+            assert extract_pages(PDF, cache, extractor="fake", page_timeout=None)[1] == "page 2"
+            assert cache.get_stats()['entries'] == 1
+    finally:
+        pdf_extractors.EXTRACTORS = original
+
+def test_fallback_text_is_cached_under_its_backend():
+    """Text from a fallback backend is keyed by that backend's id, and auto lookups find it there"""
+    fake = FakeExtractor()
+    original = with_extractors(UnopenableExtractor(), fake)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ExtractionCache(tmp)
+            assert extract_pages(PDF, cache) == ["page 1", "page 2", "page 3"]
+            sha = file_sha256(PDF)
+            assert cache.get(sha, backend_id(fake)) == ["page 1", "page 2", "page 3"]
+            assert cache.get(sha, extractor_id("auto")) is None  # Not under the backend tried first
+
+            assert extract_pages(PDF, cache) == ["page 1", "page 2", "page 3"]
+            assert fake.opened == 1 and cache.hits == 1
+    finally:
+        pdf_extractors.EXTRACTORS = original
+
+    try:
+        PdfExtractor()
+        assert False, "expected TypeError"
+    except TypeError:
+        pass
+
+def test_ingest_rejects_unknown_extractor():
+    """The per-upload extractor is validated before anything is read"""
+    from fastapi import FastAPI
+    from starlette.testclient import TestClient
+    from backend.app import api as api_module
+
+    app = FastAPI()
+    app.include_router(api_module.router, prefix="/api")
+    with open(PDF, "rb") as f:
+        response = TestClient(app).post("/api/ingest", files={"files": ("a.pdf", f, "application/pdf")},
+                                        data={"extractor": "ocr"})
+    assert response.status_code == 400 and "ocr" in response.json()["detail"]
+
+if __name__ == "__main__":
+    print("Starting PDF Extractors Test...\n")
+    test_installed_backends_extract_sample()
+    test_page_timeout_skips_stalled_page()
+    test_failed_pages_and_fallback()
+    test_incomplete_extractions_are_not_cached()
+    test_fallback_text_is_cached_under_its_backend()
+    test_ingest_rejects_unknown_extractor()
+    print("\n=== Test Complete ===")
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Test upstream retry, Retry-After handling and AIMD concurrency against a local fake server that emits 429s
+"""
+import sys
+import os
+import json
+import time
+import base64
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.append('backend')
+
+import numpy as np
+
+from backend.app import embeddings_provider
+from backend.app.rate_limit import AIMDLimiter, TokenBucket, UpstreamLimiter
+
+class FakeEmbeddingsHandler(BaseHTTPRequestHandler):
+    """Answers /v1/embeddings, throttling every request while server.throttle_remaining > 0"""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            throttle = server.throttle_remaining > 0
+            if throttle:
+                server.throttle_remaining -= 1
+
+        if throttle:
+            payload = json.dumps({"error": {"message": "Rate limit reached", "type": "requests"}}).encode()
+            self.send_response(429)
+            self.send_header("retry-after-ms", "20")
+        else:
+            inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+            payload = json.dumps({
+                "object": "list",
+                "model": body["model"],
+                "data": [
+                    {
+                        "object": "embedding",
+                        "index": i,
+                        "embedding": base64.b64encode(
+                            np.array([len(text), 1.0, 0.0], dtype="<f4").tobytes()
+                        ).decode()
+                    }
+                    for i, text in enumerate(inputs)
+                ],
+                "usage": {"prompt_tokens": 1, "total_tokens": 1}
+            }).encode()
+            self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_fake_server(throttle: int):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeEmbeddingsHandler)
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.throttle_remaining = throttle
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def test_retries_through_429s():
+    """Bulk embedding survives a burst of 429s and the concurrency window backs off"""
+    print("=== Testing Retry Against Fake 429 Server ===\n")
+
+    server = start_fake_server(throttle=3)
+    saved_env = {key: os.environ.get(key) for key in ("OPENAI_API_KEY", "OPENAI_BASE_URL")}
+    saved_limiters = dict(embeddings_provider._limiters)
+    os.environ["OPENAI_API_KEY"] = "test-key"
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    limiter = UpstreamLimiter("embeddings", rpm=6000, tpm=10_000_000, max_concurrency=8, base_delay=0.01)
+    embeddings_provider._limiters["embeddings"] = limiter
+    try:
+        texts = [f"chunk {i}" * (i % 5 + 1) for i in range(250)]
+        embeddings = embeddings_provider.get_embeddings(texts)
+    finally:
+        server.shutdown()
+        embeddings_provider._limiters.clear()
+        embeddings_provider._limiters.update(saved_limiters)
+        for key, value in saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    stats = limiter.get_stats()
+    print(f"📊 Limiter stats: {stats}")
+    assert embeddings.shape == (250, 3) and embeddings.dtype == np.float32
+    assert embeddings[7][0] == float(len(texts[7]))  # Order preserved across parallel batches
+    assert stats['throttled'] == 3 and stats['retries'] == 3
+    assert server.requests == 3 + 3  # 3 batches of 100 plus 3 throttled attempts
+    assert stats['concurrency_limit'] < 4
+
+def test_aimd_and_bucket():
+    """AIMD halves on throttling and grows back on success; buckets pace callers"""
+    print("\n=== Testing AIMD and Token Bucket ===\n")
+
+    aimd = AIMDLimiter(initial=8, maximum=16)
+    aimd.acquire()
+    aimd.release(throttled=True)
+    assert aimd.limit == 4
+    for _ in range(8):
+        aimd.acquire()
+        aimd.release()
+    assert 5 <= aimd.limit <= 6
+
+    bucket = TokenBucket(per_minute=6000)  # 100 tokens per second
+    bucket.drain()
+    start = time.monotonic()
+    bucket.acquire(5)
+    elapsed = time.monotonic() - start
+    print(f"⏱️  Waited {elapsed:.3f}s for 5 tokens at 100/s")
+    assert 0.03 <= elapsed < 0.5
+
+def test_stream_holds_slot_until_done():
+    """A streamed completion counts against concurrency until it is read to the end or closed"""
+    class FakeStream:
+        closed = False
+
+        def __iter__(self):
+            return iter(["Hello", " world"])
+
+        def close(self):
+            self.closed = True
+
+    limiter = UpstreamLimiter("chat", rpm=6000, tpm=1000000, max_concurrency=4)
+    stream = limiter.open_stream(FakeStream)
+    assert limiter.concurrency.in_flight == 1
+    assert "".join(stream) == "Hello world"
+    assert limiter.concurrency.in_flight == 0
+
+    abandoned = limiter.open_stream(FakeStream)
+    assert limiter.concurrency.in_flight == 1
+    abandoned.close()
+    abandoned.close()
+    assert abandoned.stream.closed and limiter.concurrency.in_flight == 0
+
+if __name__ == "__main__":
+    print("Starting Rate Limit Test...\n")
+    test_retries_through_429s()
+    test_aimd_and_bucket()
+    test_stream_holds_slot_until_done()
+    print("\n=== Test Complete ===")
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Test background re-embedding migrations: shadow index, atomic cutover and resume after a crash (no OpenAI API needed)
+"""
+import sys
+import os
+import time
+import hashlib
+import tempfile
+sys.path.append('backend')
+
+import numpy as np
+
+from backend.app import faiss_store as faiss_store_module
+from backend.app import faq_precompute
+from backend.app import reembed as reembed_module
+from backend.app.faiss_store import FaissStore, ModelChanged
+from backend.app.faq_precompute import FaqStore
+from backend.app.reembed import Reembedder
+from backend.app.semantic_cache import SemanticCache
+
+DIMS = {"old-model": 16, "new-model": 8}
+
+class FakeEmbeddings:
+    """Deterministic per-model vectors; `hook(model, texts, call)` runs before each call"""
+
+    def __init__(self, hook=None):
+        self.hook = hook
+        self.calls = {model: 0 for model in DIMS}
+        self.texts = {model: 0 for model in DIMS}
+
+    def __call__(self, texts, model=None):
+        self.calls[model] += 1
+        self.texts[model] += len(texts)
+        if self.hook is not None:
+            self.hook(model, texts, self.calls[model])
+        return np.stack([vector(text, model) for text in texts])
+
+def vector(text, model):
+    seed = int(hashlib.sha256(f"{model}:{text}".encode()).hexdigest()[:8], 16)
+    v = np.random.default_rng(seed).standard_normal(DIMS[model]).astype("float32")
+    return v / np.linalg.norm(v)
+
+def patched(fake):
+    originals = (faiss_store_module.get_embeddings, reembed_module.get_embeddings, faq_precompute.get_embeddings)
+    faiss_store_module.get_embeddings = reembed_module.get_embeddings = faq_precompute.get_embeddings = fake
+    return originals
+
+def restore(originals):
+    faiss_store_module.get_embeddings, reembed_module.get_embeddings, faq_precompute.get_embeddings = originals
+
+def make_store(tmp, count):
+    store = FaissStore(dim=16, index_file=os.path.join(tmp, "faiss.index"), meta_file=os.path.join(tmp, "meta.json"),
+                       hybrid=False, model="old-model")
+    texts = [f"chunk {i} about product {i % 7}" for i in range(count)]
+    store.add(texts, [{"source": "a.pdf", "chunk_id": i, "text": t} for i, t in enumerate(texts)])
+    return store
+
+def test_migration_serves_old_index_then_cuts_over():
+    """Queries use the old model until the cutover; chunks ingested meanwhile are migrated too"""
+    print("=== Testing Re-embedding Migration ===\n")
+
+    seen = []
+
+    def hook(model, texts, call):
+        if model == "new-model" and call == 2:
+            # Live traffic during the migration still uses the old index
+            seen.append((store.embedding_model, store.generation, store.query("chunk 3 about product 3", k=1)))
+            store.add([f"late chunk {i}" for i in range(30)],
+                      [{"source": "b.pdf", "chunk_id": i, "text": f"late chunk {i}"} for i in range(30)])
+
+    fake = FakeEmbeddings(hook)
+    originals = patched(fake)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = make_store(tmp, 250)
+            faq = FaqStore(dim=16, index_file=os.path.join(tmp, "faq.index"), meta_file=os.path.join(tmp, "faq.json"))
+            faq.model = "old-model"
+            faq._add([{"question": "What is product 3?", "answer": "A product.", "source": "a.pdf",
+                       "chunk_id": 3, "section_hash": "x"}])
+            generation = store.generation
+
+            reembedder = Reembedder(store, faq_store=faq, directory=os.path.join(tmp, "reembed"), batch_size=50,
+                                    chunks_per_minute=0)
+            reembedder.start("new-model")
+            reembedder._thread.join(10)
+            stats = reembedder.get_stats()
+            print(f"📊 {stats}")
+
+            model, seen_generation, results = seen[0]
+            assert model == "old-model" and seen_generation == generation and results[0]["id"] == 3
+            assert stats["status"] == "done" and stats["done"] == stats["total"] == 280 and stats["progress"] == 1.0
+            assert store.embedding_model == "new-model" and store.snapshot.dim == 8 and store.index.ntotal == 280
+            assert store.generation == generation + 2  # The late chunks, then the cutover
+            assert fake.texts["new-model"] <= 280 + 1  # Every chunk once, plus the FAQ question
+            assert store.query("late chunk 7", k=1)[0]["meta"]["text"] == "late chunk 7"
+            assert not os.path.exists(reembedder.shadow_file)
+
+            assert faq.model == "new-model" and faq.index.d == 8
+            assert faq.match(vector("What is product 3?", "new-model")[None, :], 0.99)["chunk_id"] == 3
+
+            # The model and dimension are persisted with the index
+            reloaded = FaissStore(dim=16, index_file=store.index_file, meta_file=store.meta_file, hybrid=False)
+            assert reloaded.embedding_model == "new-model" and reloaded.snapshot.dim == 8
+            assert FaqStore(index_file=faq.index_file, meta_file=faq.meta_file).model == "new-model"
+
+            try:
+                reembedder.start("new-model")
+                assert False, "expected ValueError"
+            except ValueError:
+                pass
+    finally:
+        restore(originals)
+
+def test_cutover_embeds_outside_write_lock():
+    """The store's write lock is never held during an API call; chunks added during the cutover are caught up"""
+    locked, store = [], None
+
+    def hook(model, texts, call):
+        if store is not None:
+            locked.append(store._write_lock.locked())
+        if model == "new-model" and call == 3:
+            # Ingested while the last chunks are embedded: the first cutover attempt must not publish
+            store.add([f"later chunk {i}" for i in range(5)],
+                      [{"source": "b.pdf", "chunk_id": i, "text": f"later chunk {i}"} for i in range(5)])
+
+    fake = FakeEmbeddings(hook)
+    originals = patched(fake)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = make_store(tmp, 120)
+            faq = FaqStore(dim=16, index_file=os.path.join(tmp, "faq.index"), meta_file=os.path.join(tmp, "faq.json"))
+            faq.model = "old-model"
+            faq._add([{"question": "What is product 3?", "answer": "A product.", "source": "a.pdf",
+                       "chunk_id": 3, "section_hash": "x"}])
+            generation = store.generation
+
+            reembedder = Reembedder(store, faq_store=faq, directory=os.path.join(tmp, "reembed"), batch_size=50,
+                                    chunks_per_minute=0)
+            reembedder.start("new-model")
+            reembedder._thread.join(10)
+
+            assert reembedder.state["status"] == "done" and store.index.ntotal == 125
+            assert store.generation == generation + 2  # The later chunks, then a single cutover
+            assert store.query("later chunk 4", k=1)[0]["meta"]["text"] == "later chunk 4"
+            assert locked and not any(locked)
+            assert faq.model == "new-model"
+
+        # A query tagged with another model never matches, even at the same dimension
+        question = vector("What is product 3?", "new-model")[None, :]
+        assert faq.match(question, 0.99, model="old-model") is None
+        assert faq.match(question, 0.99, model="new-model")["chunk_id"] == 3
+    finally:
+        restore(originals)
+
+def test_resume_after_crash():
+    """A failed migration resumes from its last recorded batch, ignoring vectors written without state"""
+    def hook(model, texts, call):
+        if model == "new-model" and call == 3 and not resumed:
+            raise RuntimeError("upstream unavailable")
+
+    resumed = False
+    fake = FakeEmbeddings(hook)
+    originals = patched(fake)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = make_store(tmp, 250)
+            directory = os.path.join(tmp, "reembed")
+            first = Reembedder(store, directory=directory, batch_size=50, chunks_per_minute=0)
+            first.start("new-model")
+            first._thread.join(10)
+            assert first.state["status"] == "failed" and first.state["done"] == 100
+            assert store.embedding_model == "old-model"
+
+            # A crash between writing vectors and recording them leaves extra bytes behind
+            with open(first.shadow_file, "ab") as f:
+                f.write(b"\0" * 64)
+
+            resumed = True
+            before = fake.texts["new-model"]
+            second = Reembedder(store, directory=directory, batch_size=50, chunks_per_minute=0)
+            assert second.pending and second.resume()
+            second._thread.join(10)
+            print(f"🔁 Resumed: {second.get_stats()}, {fake.texts['new-model'] - before} chunks re-embedded")
+            assert second.state["status"] == "done" and fake.texts["new-model"] - before == 150
+            for doc in (0, 99, 100, 249):
+                assert np.allclose(store.index.reconstruct(doc), vector(store.meta[doc]["text"], "new-model"), atol=1e-6)
+            assert not second.resume()
+    finally:
+        restore(originals)
+
+def test_throttle_and_guards():
+    """Batches are spaced by chunks_per_minute; stale-model vectors and dimensions are rejected"""
+    fake = FakeEmbeddings()
+    originals = patched(fake)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = make_store(tmp, 150)
+            reembedder = Reembedder(store, directory=os.path.join(tmp, "reembed"), batch_size=50,
+                                    chunks_per_minute=12000)  # One 50-chunk batch per 0.25 s
+            started = time.monotonic()
+            reembedder.start("new-model")
+            reembedder._thread.join(10)
+            elapsed = time.monotonic() - started
+            print(f"🐢 Throttled migration took {elapsed:.2f}s")
+            assert elapsed >= 0.45 and store.embedding_model == "new-model"
+
+            try:
+                store.add_vectors(np.zeros((1, 16), dtype="float32"), [{"text": "x"}], model="old-model")
+                assert False, "expected ModelChanged"
+            except ModelChanged:
+                pass
+
+        # The semantic cache follows the dimension of the new generation's embeddings
+        cache = SemanticCache(dim=16)
+        cache.add(vector("q", "old-model")[None, :], "q", 5, 1, "a", [])
+        assert cache.get(vector("q", "new-model")[None, :], 5, 1) is None
+        cache.add(vector("q", "new-model")[None, :], "q", 5, 2, "a", [])
+        assert cache.get(vector("q", "new-model")[None, :], 5, 2) == ("a", [])
+    finally:
+        restore(originals)
+
+if __name__ == "__main__":
+    print("Starting Re-embedding Migration Test...\n")
+    test_migration_serves_old_index_then_cuts_over()
+    test_cutover_embeds_outside_write_lock()
+    test_resume_after_crash()
+    test_throttle_and_guards()
+    print("\n=== Test Complete ===")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test snapshot shipping from a primary to query-only replicas (no OpenAI API needed)
+"""
+import sys
+import os
+import tempfile
+sys.path.append('backend')
+
+import pytest
+
+from backend.app.faiss_store import FaissStore
+from backend.app.replication import (LocalObjectStore, ReplicaFollower, SnapshotPublisher, create_replication,
+                                     latest_version)
+from conftest import patch_embeddings
+
+DIM = 16
+
+def make_store(tmp, name):
+    return FaissStore(dim=DIM, index_file=os.path.join(tmp, name, "faiss.index"),
+                      meta_file=os.path.join(tmp, name, "meta.json"))
+
+def add_docs(store, numbers):
+    texts = [f"doc {n}" for n in numbers]
+    store.add(texts, [{"source": "a.pdf", "chunk_id": n, "text": t} for n, t in zip(numbers, texts)])
+
+def test_replica_follows_primary(fake_embeddings):
+    """Deltas reach the replica without re-embedding, and a late replica starts from a full snapshot"""
+    print("=== Testing Snapshot Replication ===\n")
+
+    fake_embeddings.dim, fake_embeddings.kind = DIM, "one_hot"
+    with tempfile.TemporaryDirectory() as tmp:
+        object_store = LocalObjectStore(os.path.join(tmp, "shared"))
+        primary = make_store(tmp, "primary")
+        add_docs(primary, [0, 1])
+        publisher = SnapshotPublisher(object_store, full_every=3)
+        publisher.attach(primary)
+        assert latest_version(object_store) == 1
+
+        replica = make_store(tmp, "replica")
+        follower = ReplicaFollower(replica, object_store)
+        assert follower.sync() and len(replica) == 2
+
+        add_docs(primary, [2, 3])
+        add_docs(primary, [4])
+        stats = follower.get_stats()
+        embed_calls = fake_embeddings.calls
+        assert follower.sync()
+        print(f"📋 Replica after deltas: {len(replica)} vectors, version {follower.version}, before sync: {stats}")
+        assert fake_embeddings.calls == embed_calls
+        assert len(replica) == replica.index.ntotal == 5
+        assert replica.meta == primary.meta
+        assert replica.query("doc 3", k=1)[0]["meta"]["chunk_id"] == 3
+        assert follower.get_stats()['lag_versions'] == 0 and follower.get_stats()['lag_seconds'] == 0.0
+        assert not follower.sync()
+
+        # Enough writes for another full version; older versions are pruned
+        for n in range(5, 11):
+            add_docs(primary, [n])
+        late = make_store(tmp, "late")
+        late_follower = ReplicaFollower(late, object_store)
+        late_follower.sync()
+        versions = object_store.list("versions")
+        print(f"📦 {len(versions)} versions kept, late replica at version {late_follower.version}")
+        assert int(versions[0]) > 1
+        assert late.meta == primary.meta
+
+        # The first replica catches up too, replaying deltas or the newest full version
+        follower.sync()
+        assert replica.meta == primary.meta and replica.generation > 1
+
+def test_replica_requires_local_index():
+    """Replicas replace their whole index from full snapshots, which sharded and bundle stores cannot do"""
+    from types import SimpleNamespace
+
+    with tempfile.TemporaryDirectory() as tmp:
+        settings = SimpleNamespace(node_role="replica", replication_dir=tmp, replica_poll_interval=1.0,
+                                   index_shards=0, index_bundle="")
+        assert isinstance(create_replication(settings, None), ReplicaFollower)
+        for override in ({"index_shards": 2}, {"index_bundle": "data/index.bundle"}):
+            try:
+                create_replication(SimpleNamespace(**dict(vars(settings), **override)), None)
+                assert False, f"expected ValueError for {override}"
+            except ValueError as e:
+                print(f"🚫 {e}")
+
+if __name__ == "__main__":
+    print("Starting Replication Test...\n")
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_replica_follows_primary(patch_embeddings(monkeypatch))
+    test_replica_requires_local_index()
+    print("\n=== Test Complete ===")
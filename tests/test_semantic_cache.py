@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Test the semantic answer cache with synthetic embeddings (no OpenAI API needed)
+"""
+import sys
+sys.path.append('backend')
+
+import faiss
+import numpy as np
+
+from backend.app.semantic_cache import SemanticCache
+
+def unit_vector(seed: int, dim: int = 32, base: np.ndarray = None, noise: float = 0.0):
+    """Make a normalized (1, dim) vector, optionally a small perturbation of base"""
+    rng = np.random.default_rng(seed)
+    vec = base.copy() if base is not None else rng.standard_normal((1, dim)).astype("float32")
+    if noise:
+        vec = vec + noise * rng.standard_normal((1, dim)).astype("float32")
+    vec = vec.astype("float32")
+    faiss.normalize_L2(vec)
+    return vec
+
+def test_paraphrase_hit():
+    """A near-duplicate question embedding returns the stored answer"""
+    print("=== Testing Semantic Cache Hits ===\n")
+
+    cache = SemanticCache(dim=32, max_entries=10, threshold=0.9)
+    question = unit_vector(1)
+    cache.add(question, "how do I become a distributor", 5, 0, "Sign up online", [])
+
+    paraphrase = unit_vector(2, base=question, noise=0.05)
+    unrelated = unit_vector(3)
+
+    assert cache.get(paraphrase, 5, 0) == ("Sign up online", [])
+    assert cache.get(unrelated, 5, 0) is None
+    assert cache.get(paraphrase, 3, 0) is None  # Different top_k
+
+    stats = cache.get_stats()
+    print(f"📊 Cache stats: {stats}")
+    assert stats['hits'] == 1 and stats['misses'] == 2
+
+def test_eviction_and_invalidation():
+    """The least recently used entry is evicted and a new generation clears the cache"""
+    print("\n=== Testing Eviction and Invalidation ===\n")
+
+    cache = SemanticCache(dim=32, max_entries=2, threshold=0.9)
+    first, second, third = unit_vector(10), unit_vector(11), unit_vector(12)
+    cache.add(first, "first", 5, 0, "one", [])
+    cache.add(second, "second", 5, 0, "two", [])
+    assert cache.get(first, 5, 0) is not None
+    cache.add(third, "third", 5, 0, "three", [])
+
+    assert cache.get(second, 5, 0) is None
+    assert cache.get(first, 5, 0) == ("one", [])
+    assert cache.get_stats()['evictions'] == 1
+
+    assert cache.get(first, 5, 1) is None
+    assert cache.get_stats()['entries'] == 0
+
+if __name__ == "__main__":
+    print("Starting Semantic Cache Test...\n")
+    test_paraphrase_hit()
+    test_eviction_and_invalidation()
+    print("\n=== Test Complete ===")
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Test server-side session memory with a fake model (no OpenAI API needed)
+"""
+import sys
+sys.path.append('backend')
+
+import pytest
+
+from backend.app import sessions
+from backend.app.sessions import SessionStore
+from conftest import patch_embeddings
+
+def fake_generate(prompt, system_prompt=None, max_tokens=1000, temperature=0.7):
+    """Summaries and condensed questions that are easy to recognise"""
+    if prompt.startswith("Current summary"):
+        return "Customer asked about joining."
+    follow_up = prompt.split("Follow-up question: ", 1)[1].split("\n", 1)[0]
+    return f"Standalone: {follow_up}"
+
+def test_condense_and_summarize():
+    """Follow-ups are condensed and old turns roll into a bounded summary"""
+    print("=== Testing Session Memory ===\n")
+
+    original = sessions.generate_text
+    sessions.generate_text = fake_generate
+    try:
+        store = SessionStore(max_sessions=10, max_turns=2, history_token_budget=200)
+
+        history, question = store.prepare("s1", "How do I join?")
+        assert history == "" and question == "How do I join?"
+        store.record_turn("s1", "How do I join?", "Register on our website.")
+
+        history, question = store.prepare("s1", "and what about the fee?")
+        assert "Register on our website." in history
+        assert question == "Standalone: and what about the fee?"
+
+        for i in range(3):
+            store.record_turn("s1", f"question {i}", "answer " * 50)
+        store.wait_for_summaries()
+        session = store.get("s1")
+        print(f"📋 Summary: {session.summary!r}, turns kept: {len(session.turns)}")
+        assert session.summary == "Customer asked about joining."
+        assert len(session.turns) <= 2
+        assert session.history_tokens() <= 200 or len(session.turns) == 1
+    finally:
+        sessions.generate_text = original
+
+def test_concurrent_turns_keep_every_turn():
+    """Turns recorded concurrently on one session are neither lost nor duplicated"""
+    import threading
+    import time
+
+    def slow_summary(prompt, system_prompt=None, max_tokens=1000, temperature=0.7):
+        time.sleep(0.01)  # The LLM call runs outside the store's lock
+        previous = prompt.split("Current summary: ", 1)[1].split("\n", 1)[0]
+        folded = [line[len("Customer: "):] for line in prompt.splitlines() if line.startswith("Customer: ")]
+        return " ".join(([] if previous == "(none)" else [previous]) + folded)
+
+    original = sessions.generate_text
+    sessions.generate_text = slow_summary
+    try:
+        store = SessionStore(max_turns=2, history_token_budget=10000)
+        threads = [threading.Thread(target=store.record_turn, args=("s1", f"q{i}", "a")) for i in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        store.wait_for_summaries()
+        session = store.get("s1")
+        kept = session.summary.split() + [q for q, _ in session.turns]
+        assert sorted(kept) == sorted(f"q{i}" for i in range(20))
+    finally:
+        sessions.generate_text = original
+
+def test_summary_does_not_delay_the_answer():
+    """Folding old turns into the summary happens after record_turn returns; they stay in the history meanwhile"""
+    import threading
+    import time
+
+    release = threading.Event()
+
+    def blocked_summary(prompt, system_prompt=None, max_tokens=1000, temperature=0.7):
+        release.wait(5)
+        return "Customer asked about joining."
+
+    original = sessions.generate_text
+    sessions.generate_text = blocked_summary
+    try:
+        store = SessionStore(max_turns=1)
+        store.record_turn("s1", "How do I join?", "Register on our website.")
+        started = time.monotonic()
+        store.record_turn("s1", "What is the fee?", "It is free.")
+        assert time.monotonic() - started < 1.0
+        history = store.get("s1").render()
+        assert "How do I join?" in history and "What is the fee?" in history
+
+        release.set()
+        store.wait_for_summaries()
+        session = store.get("s1")
+        assert session.summary == "Customer asked about joining." and not session.pending
+        assert "How do I join?" not in session.render()
+    finally:
+        release.set()
+        sessions.generate_text = original
+
+def test_session_answers_are_not_cached_for_others(fake_embeddings, monkeypatch):
+    """An answer generated with one caller's history never reaches the shared caches"""
+    import os
+    import tempfile
+    import numpy as np
+    from backend.app import rag
+    from backend.app.answer_cache import AnswerCache
+    from backend.app.faiss_store import FaissStore
+
+    fake_embeddings.dim, fake_embeddings.kind = 4, "constant"
+    monkeypatch.setattr(rag, "generate_text",
+                        lambda prompt, **kwargs: "with history" if "Conversation so far" in prompt else "plain")
+    monkeypatch.setattr(sessions, "generate_text", lambda prompt, **kwargs: "What is the joining fee?")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = FaissStore(dim=4, index_file=os.path.join(tmp, "faiss.index"),
+                           meta_file=os.path.join(tmp, "meta.json"), hybrid=False)
+        store.add_vectors(np.full((1, 4), 0.5, dtype="float32"),
+                          [{"source": "a.pdf", "chunk_id": 0, "text": "The joining fee is 500."}])
+        cache, session_store = AnswerCache(ttl=60), SessionStore()
+        session_store.record_turn("alice", "How do I join?", "Register online.")
+
+        answer, _, _ = rag.query_rag("and the fee?", store, answer_cache=cache, session_store=session_store,
+                                     session_id="alice")
+        assert answer == "with history" and cache.get("What is the joining fee?", 5, store.version) is None
+        answer, _, _ = rag.query_rag("What is the joining fee?", store, answer_cache=cache)
+        assert answer == "plain"
+
+def test_lru_and_idle_eviction():
+    """The store never holds more than max_sessions and drops idle sessions"""
+    print("\n=== Testing Session Eviction ===\n")
+
+    store = SessionStore(max_sessions=2, idle_ttl=60)
+    for session_id in ("a", "b", "c"):
+        store.get(session_id)
+    stats = store.get_stats()
+    print(f"📊 Session stats: {stats}")
+    assert stats['sessions'] == 2 and stats['evictions'] == 1
+
+    store.idle_ttl = 0
+    store.get("d")
+    assert store.get_stats()['sessions'] == 1
+
+if __name__ == "__main__":
+    print("Starting Session Memory Test...\n")
+    test_condense_and_summarize()
+    test_concurrent_turns_keep_every_turn()
+    test_summary_does_not_delay_the_answer()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_session_answers_are_not_cached_for_others(patch_embeddings(monkeypatch), monkeypatch)
+    test_lru_and_idle_eviction()
+    print("\n=== Test Complete ===")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test sharded scatter-gather search, partial failures and shard worker processes (no OpenAI API needed)
+"""
+import sys
+import os
+import time
+import tempfile
+sys.path.append('backend')
+
+import faiss
+import numpy as np
+import pytest
+
+from backend.app.faiss_store import FaissStore
+from backend.app.sharding import LocalShard, ShardRouter, shard_for, shard_paths
+from conftest import patch_embeddings
+
+DIM = 16
+
+def random_vectors(n, seed=0):
+    arr = np.random.default_rng(seed).standard_normal((n, DIM)).astype("float32")
+    faiss.normalize_L2(arr)
+    return arr
+
+class SlowShard(LocalShard):
+    """Local stand-in for a remote node that has stopped answering in time"""
+
+    def search(self, arr, k, timeout=None):
+        time.sleep(0.5)
+        return super().search(arr, k)
+
+def test_scatter_gather_matches_flat_index():
+    """Merged per-shard top-k is the same as searching one flat index"""
+    print("=== Testing Scatter-Gather Search ===\n")
+
+    vectors = random_vectors(200)
+    queries = random_vectors(5, seed=1)
+    flat = faiss.IndexFlatIP(DIM)
+    flat.add(vectors)
+
+    router = ShardRouter([LocalShard(DIM, name=f"shard-{i}") for i in range(4)], timeout=1.0)
+    router.add(np.arange(200), vectors)
+    assert router.counts == [50, 50, 50, 50]
+    assert shard_for(7, 4) == 3
+
+    expected_scores, expected_ids = flat.search(queries, 10)
+    scores, ids = router.search(queries, 10)
+    print(f"📋 Top ids flat {expected_ids[0][:5]}, sharded {ids[0][:5]}")
+    assert np.array_equal(ids, expected_ids)
+    assert np.allclose(scores, expected_scores, atol=1e-5)
+    assert np.allclose(router.reconstruct(37), vectors[37])
+
+    # A view taken earlier hides ids added after it
+    view = router.view()
+    router.add(np.arange(200, 210), random_vectors(10, seed=2))
+    _, ids = view.search(queries, 10)
+    assert ids.max() < 200 and (ids >= 0).all()
+
+def test_partial_results_when_a_shard_times_out():
+    """A slow shard is dropped from the merge and counted; the other shards still answer"""
+    print("\n=== Testing Partial Shard Failure ===\n")
+
+    vectors = random_vectors(90)
+    router = ShardRouter([LocalShard(DIM, name="shard-0"), SlowShard(DIM, name="shard-1"),
+                          LocalShard(DIM, name="shard-2")], timeout=0.1)
+    router.add(np.arange(90), vectors)
+
+    start = time.monotonic()
+    scores, ids = router.search(vectors[:1], 5)
+    elapsed = time.monotonic() - start
+    stats = router.get_stats()
+
+    print(f"⏱️  {elapsed:.3f}s, ids {ids[0]}, shard stats: {stats['shards']}")
+    assert elapsed < 0.4
+    assert ids[0][0] == 0
+    assert all(shard_for(int(i), 3) != 1 for i in ids[0])
+    assert stats['shards'][1]['timeouts'] == 1 and stats['partial_results'] == 1
+    router.close()
+
+def test_store_with_process_shards(fake_embeddings):
+    """FaissStore answers from worker-process shards and reloads them from their own files"""
+    print("\n=== Testing FaissStore With Process Shards ===\n")
+
+    fake_embeddings.dim, fake_embeddings.kind = DIM, "one_hot"
+    store = reloaded = None
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            index_file = os.path.join(tmp, "faiss.index")
+            store = FaissStore(dim=DIM, index_file=index_file, meta_file=os.path.join(tmp, "meta.json"),
+                               hybrid=False, num_shards=2)
+            texts = [f"doc {i}" for i in range(12)]
+            store.add(texts, [{"source": "a.pdf", "chunk_id": i, "text": t} for i, t in enumerate(texts)])
+
+            results = store.query("doc 5", k=3)
+            print(f"📋 Top result: {results[0]['meta']['text']}, stats: {store.get_stats()['sharding']['shards']}")
+            assert results[0]["meta"]["chunk_id"] == 5
+            assert all(os.path.exists(path) for path in shard_paths(index_file, 2))
+
+            reloaded = FaissStore(dim=DIM, index_file=index_file, meta_file=store.meta_file,
+                                  hybrid=False, num_shards=2)
+            assert len(reloaded) == reloaded.index.ntotal == 12
+            assert reloaded.query("doc 9", k=1)[0]["meta"]["chunk_id"] == 9
+    finally:
+        for s in (store, reloaded):
+            if s is not None:
+                s.router.close()
+
+if __name__ == "__main__":
+    print("Starting Sharding Test...\n")
+    test_scatter_gather_matches_flat_index()
+    test_partial_results_when_a_shard_times_out()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_store_with_process_shards(patch_embeddings(monkeypatch))
+    print("\n=== Test Complete ===")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test snapshot-isolated reads while concurrent writers add documents (no OpenAI API needed)
+"""
+import sys
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append('backend')
+
+import numpy as np
+
+import pytest
+
+from backend.app.faiss_store import FaissStore
+from conftest import patch_embeddings
+
+DIM = 16
+
+def test_held_snapshot_is_immutable(fake_embeddings):
+    """A snapshot grabbed before a write keeps its own vectors, metadata and generation"""
+    print("=== Testing Snapshot Immutability ===\n")
+
+    # Slow embeddings, so writes overlap with reads
+    fake_embeddings.dim, fake_embeddings.kind, fake_embeddings.delay = DIM, "one_hot", 0.005
+    with tempfile.TemporaryDirectory() as tmp:
+        store = FaissStore(dim=DIM, index_file=os.path.join(tmp, "faiss.index"),
+                           meta_file=os.path.join(tmp, "meta.json"), hybrid=False)
+        store.add(["doc 1"], [{"source": "a.pdf", "text": "doc 1"}])
+        before = store.snapshot
+
+        store.add(["doc 2", "doc 3"], [{"source": "b.pdf", "text": "doc 2"}, {"source": "b.pdf", "text": "doc 3"}])
+        after = store.snapshot
+
+        print(f"📋 Before: {before.index.ntotal} vectors, generation {before.generation}; "
+              f"after: {after.index.ntotal} vectors, generation {after.generation}")
+        assert before.index.ntotal == len(before.meta) == 1 and before.generation == 1
+        assert after.index.ntotal == len(after.meta) == 3 and after.generation == 2
+        assert len(store) == 3
+
+def test_concurrent_writers_and_readers(fake_embeddings):
+    """Readers never see ids without metadata and writers never lose each other's documents"""
+    print("\n=== Testing Concurrent Reads During Writes ===\n")
+
+    # Slow embeddings, so writes overlap with reads
+    fake_embeddings.dim, fake_embeddings.kind, fake_embeddings.delay = DIM, "one_hot", 0.005
+    with tempfile.TemporaryDirectory() as tmp:
+        store = FaissStore(dim=DIM, index_file=os.path.join(tmp, "faiss.index"),
+                           meta_file=os.path.join(tmp, "meta.json"))
+        store.add(["doc 0"], [{"source": "seed.pdf", "text": "doc 0"}])
+
+        writers_done = threading.Event()
+        problems = []
+
+        def write(batch: int):
+            texts = [f"doc {batch * 4 + i}" for i in range(4)]
+            store.add(texts, [{"source": f"{batch}.pdf", "text": t} for t in texts])
+
+        def read():
+            reads = 0
+            while not writers_done.is_set() or reads < 5:
+                snapshot = store.snapshot
+                if snapshot.index.ntotal != len(snapshot.meta):
+                    problems.append(("size", snapshot.index.ntotal, len(snapshot.meta)))
+                for result in store.query(f"doc {reads % DIM}", k=3):
+                    # The vector that matched must belong to the chunk whose metadata came back
+                    vector = store.snapshot.index.reconstruct(result["id"])
+                    if int(np.argmax(vector)) != int(result["meta"]["text"].split()[-1]) % DIM:
+                        problems.append(("mismatch", result["id"]))
+                reads += 1
+            return reads
+
+        with ThreadPoolExecutor(max_workers=12) as pool:
+            readers = [pool.submit(read) for _ in range(4)]
+            list(pool.map(write, range(1, 9)))
+            writers_done.set()
+            reads = sum(reader.result() for reader in readers)
+
+        print(f"📊 {reads} reads, {len(store)} documents, generation {store.generation}, problems: {problems[:3]}")
+        assert not problems
+        assert store.index.ntotal == len(store.meta) == 33
+        assert store.generation == 9
+        assert sorted(m["text"] for m in store.meta) == sorted(["doc 0"] + [f"doc {i}" for i in range(4, 36)])
+
+if __name__ == "__main__":
+    print("Starting Snapshot Isolation Test...\n")
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_held_snapshot_is_immutable(patch_embeddings(monkeypatch))
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_concurrent_writers_and_readers(patch_embeddings(monkeypatch))
+    print("\n=== Test Complete ===")
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test lazy imports, background index loading and the /ready probe (no OpenAI API needed)
+"""
+import sys
+import os
+import tempfile
+import subprocess
+sys.path.append('backend')
+
+from backend.app.faiss_store import FaissStore
+from backend.app.readiness import Readiness
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+
+def test_app_import_defers_heavy_work():
+    """Importing the app neither loads faiss/openai/PyPDF2 nor reads the index"""
+    print("=== Testing Lazy App Import ===\n")
+
+    script = (
+        "import sys, asyncio\n"
+        "import app.main as main\n"
+        "lazy = {name: type(sys.modules[name]).__name__ for name in ('faiss', 'openai', 'PyPDF2')}\n"
+        "print(lazy, main.faiss_store.loaded, main.readiness.state)\n"
+        "assert set(lazy.values()) == {'_LazyModule'}, lazy\n"
+        "assert not main.faiss_store.loaded\n"
+        "assert asyncio.run(main.readiness_check()).status_code == 503\n"
+        "main.load_and_warm_up()\n"
+        "main.readiness.step('ready')\n"
+        "assert main.faiss_store.loaded and type(sys.modules['openai']).__name__ == 'module'\n"
+        "print(asyncio.run(main.readiness_check()))\n"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, OPENAI_API_KEY="test-key")
+        # Run from an empty directory so the real data/ folder is never touched
+        os.symlink(os.path.abspath(os.path.join(BACKEND_DIR, "app")), os.path.join(tmp, "app"))
+        result = subprocess.run([sys.executable, "-c", script], cwd=tmp, env=env,
+                                capture_output=True, text=True, timeout=120)
+    print(result.stdout[-500:])
+    assert result.returncode == 0, result.stderr[-2000:]
+    assert "'state': 'ready'" in result.stdout
+
+def test_deferred_store_load():
+    """A store created with preload=False is empty until load() and reports it in its stats"""
+    print("\n=== Testing Deferred Store Load ===\n")
+
+    readiness = Readiness()
+    with tempfile.TemporaryDirectory() as tmp:
+        store = FaissStore(dim=8, index_file=os.path.join(tmp, "faiss.index"),
+                           meta_file=os.path.join(tmp, "meta.json"), preload=False)
+        assert not store.loaded and len(store) == 0
+        assert store.get_stats() == {'loaded': False, 'dimension': 8}
+
+        readiness.step("loading")
+        store.load()
+        readiness.step("warming")
+        store.warm_up()
+        readiness.step("ready")
+
+    stats = readiness.get_stats()
+    print(f"📋 Readiness: {stats}")
+    assert store.loaded and readiness.ready
+    assert set(stats['timings']) == {"starting", "loading", "warming"}
+    assert stats['seconds_to_ready'] is not None
+
+if __name__ == "__main__":
+    print("Starting Startup Test...\n")
+    test_app_import_defers_heavy_work()
+    test_deferred_store_load()
+    print("\n=== Test Complete ===")